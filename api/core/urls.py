@@ -12,6 +12,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from api.models import AuditLog
 from api.views_user_management import PermissionViewSet
+from api.views_analytics import analytics_export
 from django.contrib.auth.models import User
 
 @api_view(['GET'])
@@ -58,6 +59,9 @@ urlpatterns = [
     path('api/permissions/', PermissionViewSet.as_view({'get': 'list'}), name='permissions-direct'),
     path('api/reports/', ReportListView.as_view(), name='reports'),
     path('api/reports/generate/', ReportGenerateView.as_view(), name='reports-generate'),
+    path('api/analytics/export/', analytics_export, name='analytics-export'),
+    # Ruta explícita: en el router, 'export.xlsx' lo captura el sufijo de formato del detalle
+    path('api/maintenances/export.xlsx', MaintenanceViewSet.as_view({'get': 'export_xlsx'}), name='maintenance-export-xlsx-file'),
     path('api/', include(router.urls)),
     # Include main API url mappings (templates, template manager, etc.)
     path('api/', include('api.urls')),
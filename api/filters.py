@@ -21,7 +21,7 @@ class MaintenanceFilter(django_filters.FilterSet):
     equipment_brand = django_filters.CharFilter(field_name='equipment__brand', lookup_expr='icontains')
     equipment_model = django_filters.CharFilter(field_name='equipment__model', lookup_expr='icontains')
     equipment_location = django_filters.CharFilter(field_name='equipment__location', lookup_expr='icontains')
-    equipment_dependencia = django_filters.CharFilter(field_name='equipment__dependencia', lookup_expr='icontains')
+    equipment_dependencia = django_filters.CharFilter(field_name='equipment__dependencia_rel__nombre', lookup_expr='icontains')
 
     # Filtros jerárquicos por ID (relaciones ForeignKey)
     sede_id = django_filters.NumberFilter(field_name='sede_rel__id')
@@ -33,8 +33,12 @@ class MaintenanceFilter(django_filters.FilterSet):
     dependencia_nombre = django_filters.CharFilter(field_name='dependencia_rel__nombre', lookup_expr='icontains')
     subdependencia_nombre = django_filters.CharFilter(field_name='subdependencia__nombre', lookup_expr='icontains')
 
-    # Maintenance-specific filters (legacy)
-    sede = django_filters.CharFilter(field_name='sede', lookup_expr='icontains')
+    # Parámetros legacy por nombre: se buscan en las FKs (los textos se resuelven al guardar, ver location_backfill)
+    sede = django_filters.CharFilter(field_name='sede_rel__nombre', lookup_expr='icontains')
+    dependencia = django_filters.CharFilter(field_name='dependencia_rel__nombre', lookup_expr='icontains')
+    ubicacion = django_filters.CharFilter(field_name='subdependencia__nombre', lookup_expr='icontains')
+
+    # Maintenance-specific filters
     oficina = django_filters.CharFilter(field_name='oficina', lookup_expr='icontains')
     placa = django_filters.CharFilter(field_name='placa', lookup_expr='icontains')
 
@@ -65,10 +69,9 @@ class MaintenanceFilter(django_filters.FilterSet):
             Q(equipment__brand__icontains=value) |
             Q(equipment__model__icontains=value) |
             Q(equipment__location__icontains=value) |
-            Q(equipment__dependencia__icontains=value) |
+            Q(equipment__dependencia_rel__nombre__icontains=value) |
             Q(description__icontains=value) |
             Q(observations__icontains=value) |
-            Q(sede__icontains=value) |
             Q(sede_rel__nombre__icontains=value) |
             Q(dependencia_rel__nombre__icontains=value) |
             Q(subdependencia__nombre__icontains=value) |
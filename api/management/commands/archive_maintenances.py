@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Mueve los mantenimientos históricos (completados/cancelados, anteriores al
+horizonte) a las tablas de archivo y a bundles JSON gzip en el storage.
+"""
+from django.core.management.base import BaseCommand
+
+from api.services.maintenance_archive import CHUNK_SIZE, archive_horizon_days, archive_maintenances
+
+
+class Command(BaseCommand):
+    help = 'Archiva los mantenimientos anteriores a ARCHIVE_HORIZON_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Horizonte en días (por defecto ARCHIVE_HORIZON_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--limit', type=int, default=0, help='Máximo de mantenimientos a archivar (0 = todos)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar los mantenimientos a archivar')
+
+    def handle(self, *args, **options):
+        days = archive_horizon_days() if options['days'] is None else options['days']
+        result = archive_maintenances(
+            days=days,
+            chunk_size=options['chunk_size'],
+            limit=options['limit'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{result['archived']} mantenimientos anteriores a {days} días se archivarían")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['archived']} mantenimientos archivados ({result['bytes'] / 1024:.1f} KB comprimidos)"
+        ))
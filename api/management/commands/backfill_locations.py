@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Resuelve los textos legacy de ubicación (Equipment.dependencia, Maintenance.sede/
+dependencia/ubicacion) a las FKs Sede/Dependencia/Subdependencia.
+
+Se puede interrumpir y volver a ejecutar: solo procesa filas con FKs vacías.
+"""
+import csv
+
+from django.core.management.base import BaseCommand
+
+from api.services.location_backfill import CHUNK_SIZE, FUZZY_CUTOFF, FuzzyLocationIndex, backfill_locations
+
+
+class Command(BaseCommand):
+    help = 'Completa las FKs de ubicación a partir de los campos de texto legacy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', choices=['equipment', 'maintenance'], default=['equipment', 'maintenance'])
+        parser.add_argument('--after-id', type=int, default=0, help='Retomar desde este id')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--cutoff', type=float, default=FUZZY_CUTOFF, help='Similitud mínima (0-1) para coincidencias aproximadas')
+        parser.add_argument('--dry-run', action='store_true', help='No guardar cambios')
+        parser.add_argument('--report', help='CSV con los valores que no se pudieron resolver')
+
+    def handle(self, *args, **options):
+        def progress(model, last_id, count):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {model}: hasta id {last_id}, {count} actualizados')
+
+        result = backfill_locations(
+            models=options['models'],
+            after_id=options['after_id'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            index=FuzzyLocationIndex(cutoff=options['cutoff']),
+            progress=progress,
+        )
+
+        unresolved = result['unresolved']
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['campo', 'valor', 'filas'])
+                for (field, value), count in unresolved.most_common():
+                    writer.writerow([field, value, count])
+        else:
+            for (field, value), count in unresolved.most_common(20):
+                self.stdout.write(self.style.WARNING(f'  Sin resolver {field}: "{value}" ({count})'))
+
+        summary = ', '.join(f'{model}: {count}' for model, count in result['updated'].items())
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Actualizados {summary}; {len(unresolved)} valores sin resolver'
+        ))
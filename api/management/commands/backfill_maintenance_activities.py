@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Genera las filas MaintenanceActivity de los mantenimientos existentes (o de los
+que no tienen ninguna) a partir de su JSON `activities`.
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import Maintenance
+from api.services.maintenance_activities import backfill_activities
+
+
+class Command(BaseCommand):
+    help = 'Normaliza Maintenance.activities en la tabla maintenance_activity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help='Solo mantenimientos sin filas de actividades')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        qs = Maintenance.objects.all()
+        if options['missing']:
+            qs = qs.filter(activity_rows__isnull=True)
+        maintenances, rows = backfill_activities(qs, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{maintenances} mantenimientos procesados, {rows} actividades'))
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de `path_accessor`: resolver los `map_to` de una plantilla de
+N campos sobre M contextos, tokenizando cada ruta en cada búsqueda (como antes)
+contra las rutas compiladas una vez.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.path_accessor import _compile, compile_path, resolve_path, resolve_steps
+
+
+def _sample_context(i):
+    return {
+        'id': i,
+        'equipment': {'code': f'EQ-{i}', 'serial_number': f'SN{i:05d}', 'brand': 'HP', 'model': 'ProDesk'},
+        'activities': [{'task': f'Actividad {n}', 'done': n % 2 == 0} for n in range(10)],
+        'photos': [{'url': f'https://example.com/{i}/{n}.jpg', 'caption': ''} for n in range(3)],
+        'technician': {'name': 'Técnico', 'sede': {'name': 'Principal'}},
+        'observations': 'Sin novedad',
+    }
+
+
+def _sample_paths(fields):
+    base = [
+        'id', 'observations', 'equipment.code', 'equipment.serial_number', 'equipment.brand',
+        'equipment.model', 'technician.name', 'technician.sede.name', 'missing.path',
+    ]
+    base += [f'activities[{n}].task' for n in range(10)]
+    base += [f'activities[{n}].done' for n in range(10)]
+    base += [f'photos[{n}].url' for n in range(3)]
+    base += [f'photos.{n}.caption' for n in range(3)]
+    return [base[n % len(base)] + ('' if n < len(base) else f'.x{n}') for n in range(fields)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: resolución de rutas map_to tokenizadas vs. compiladas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields', type=int, default=60, help='Campos de la plantilla (rutas map_to)')
+        parser.add_argument('--contexts', type=int, default=1000, help='Contextos (documentos) a resolver')
+
+    def handle(self, *args, **options):
+        paths = _sample_paths(options['fields'])
+        contexts = [_sample_context(i) for i in range(options['contexts'])]
+        lookups = len(paths) * len(contexts)
+        results = []
+
+        start = time.perf_counter()
+        for context in contexts:
+            for path in paths:
+                _compile.cache_clear()
+                resolve_path(context, path)
+        results.append(('tokenizando cada vez', time.perf_counter() - start))
+
+        _compile.cache_clear()
+        start = time.perf_counter()
+        for context in contexts:
+            for path in paths:
+                resolve_path(context, path)
+        results.append(('rutas en caché', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        compiled = [compile_path(path) for path in paths]
+        for context in contexts:
+            for steps in compiled:
+                resolve_steps(context, steps)
+        results.append(('pasos precompilados', time.perf_counter() - start))
+
+        self.stdout.write(f'{len(paths)} campos x {len(contexts)} contextos = {lookups} búsquedas')
+        baseline = results[0][1]
+        for label, elapsed in results:
+            self.stdout.write(
+                f'  {label:<22} {elapsed * 1000:9.1f} ms  {elapsed / lookups * 1e6:6.2f} µs/búsqueda  x{baseline / elapsed:.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark completado'))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Compara el render de una plantilla PDF documento por documento contra el
+render por lotes (un único layout de WeasyPrint).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Maintenance, Template
+from api.services.maintenance_serializer import serialize_maintenances
+from api.services.template_cache import template_cache_key
+from api.views_template_manager import build_template_context
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: render por documento vs. render por lotes de una plantilla PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('template', type=str, help='ID o nombre de la plantilla (Template)')
+        parser.add_argument('--count', type=int, default=50, help='Cantidad de mantenimientos a renderizar')
+        parser.add_argument('--repeat', type=int, default=1, help='Repetir los datos N veces para simular lotes más grandes')
+
+    def handle(self, *args, **options):
+        key = options['template']
+        template = Template.objects.filter(id=int(key)).first() if key.isdigit() else Template.objects.filter(name=key).first()
+        if not template or template.type != 'pdf':
+            raise CommandError(f'Plantilla PDF no encontrada: {key}')
+        try:
+            from api.services.html_pdf_generator import HTMLPDFGenerator
+        except Exception as e:
+            raise CommandError(f'WeasyPrint no disponible: {e}')
+
+        count = options['count']
+        ids = list(Maintenance.objects.order_by('-id').values_list('id', flat=True)[:count])
+        if not ids:
+            raise CommandError('No hay mantenimientos para renderizar')
+        datasets = list(serialize_maintenances(ids))
+        if options['repeat'] > 1:
+            datasets = datasets * options['repeat']
+        contexts = [build_template_context(template, data) for data in datasets]
+
+        html, css = template.html_content or '', template.css_content or ''
+        cache_key = template_cache_key(template)
+        # Calentar la caché de plantillas para medir solo el render
+        HTMLPDFGenerator.render_template(html, css, contexts[0], cache_key=cache_key)
+
+        results = []
+
+        start = time.perf_counter()
+        for context in contexts:
+            HTMLPDFGenerator.render_template(html, css, context, cache_key=cache_key)
+        results.append(('por documento', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        HTMLPDFGenerator.render_batch(html, css, contexts, cache_key=cache_key)
+        results.append(('lote consolidado', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        HTMLPDFGenerator.render_batch_split(html, css, contexts, cache_key=cache_key)
+        results.append(('lote separado', time.perf_counter() - start))
+
+        n = len(contexts)
+        self.stdout.write(f'{n} documentos con la plantilla "{template.name}"')
+        baseline = results[0][1]
+        for label, elapsed in results:
+            self.stdout.write(
+                f'  {label:<18} {elapsed:8.2f}s  {n / elapsed:7.1f} doc/s  x{baseline / elapsed:.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark completado'))
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Genera los snapshots de reporte de mantenimientos completados que no lo tienen
+(p. ej. importados en bloque, que no disparan signals) o cuyo formato cambió.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import Maintenance
+from api.services.maintenance_serializer import SNAPSHOT_SCHEMA
+from api.services.maintenance_snapshot import SNAPSHOT_STATUSES, refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Genera/actualiza los snapshots de reporte de los mantenimientos completados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerar también los snapshots vigentes')
+        parser.add_argument('--limit', type=int, default=0, help='Máximo de mantenimientos a procesar (0 = todos)')
+
+    def handle(self, *args, **options):
+        qs = Maintenance.objects.filter(status__in=SNAPSHOT_STATUSES)
+        if not options['all']:
+            qs = qs.filter(Q(snapshot__isnull=True) | ~Q(snapshot__schema_version=SNAPSHOT_SCHEMA))
+        ids = qs.order_by('id').values_list('id', flat=True)
+        if options['limit']:
+            ids = ids[:options['limit']]
+
+        count = refresh_snapshots(ids.iterator(chunk_size=500))
+        self.stdout.write(self.style.SUCCESS(f'{count} snapshots generados'))
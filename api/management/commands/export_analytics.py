@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Exporta mantenimientos, actividades, equipos, incidentes y ubicaciones a
+Parquet particionado (ver `api.services.analytics_export`).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.analytics_export import ALL_TABLES, AnalyticsExportUnavailable, export_analytics
+
+
+class Command(BaseCommand):
+    help = 'Exporta los datos a Parquet para análisis (incremental por defecto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=ALL_TABLES, help='Tablas a exportar (todas por defecto)')
+        parser.add_argument('--full', action='store_true', help='Ignorar la marca de agua y exportar todo')
+        parser.add_argument('--output', help='Directorio destino (por defecto ANALYTICS_EXPORT_DIR)')
+
+    def handle(self, *args, **options):
+        try:
+            result = export_analytics(
+                tables=options['tables'],
+                incremental=not options['full'],
+                root=options['output'],
+            )
+        except AnalyticsExportUnavailable as e:
+            raise CommandError(str(e))
+
+        for table, count in result['rows'].items():
+            self.stdout.write(f'  {table}: {count} filas')
+        self.stdout.write(self.style.SUCCESS(f"Exportación {result['run_id']} en {result['root']}"))
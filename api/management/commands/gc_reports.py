@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Elimina los reports vencidos (`expires_at`) y los reemplazados por versiones
+más nuevas, borrando del storage los archivos que quedan sin referencias, y
+los renders obsoletos del caché `reports/cache/`.
+"""
+from django.core.management.base import BaseCommand
+
+from api.services.report_artifacts import BATCH_SIZE, collect_report_garbage, evict_render_cache
+
+
+class Command(BaseCommand):
+    help = 'Recolecta los archivos de reports vencidos o reemplazados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=1,
+                            help='Versiones a conservar por mantenimiento y tipo de reporte')
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='No tocar reports reemplazados más recientes que esto')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--render-cache-days', type=int, default=None,
+                            help='Antigüedad máxima de los renders en caché (por defecto REPORT_RENDER_CACHE_DAYS)')
+        parser.add_argument('--skip-render-cache', action='store_true', help='No tocar reports/cache/')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informar lo que se recuperaría')
+
+    def handle(self, *args, **options):
+        result = collect_report_garbage(
+            keep=max(options['keep'], 1),
+            grace_hours=options['grace_hours'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        summary = (
+            f"{result['expired']} vencidos, {result['superseded']} reemplazados; "
+            f"{result['files']} archivos ({result['bytes'] / (1024 * 1024):.2f} MB)"
+        )
+        failed = result['failed']
+        if not options['skip_render_cache']:
+            renders = evict_render_cache(dry_run=options['dry_run'], max_age_days=options['render_cache_days'])
+            summary += f"; {renders['renders']} renders en caché ({renders['bytes'] / (1024 * 1024):.2f} MB)"
+            failed += renders['failed']
+        if options['dry_run']:
+            self.stdout.write(f'Se eliminarían: {summary}')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Eliminados: {summary}'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} archivos no se pudieron borrar"))
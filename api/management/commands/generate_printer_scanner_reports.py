@@ -5,6 +5,8 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from api.models import Maintenance, Report
 from api.services.printer_scanner_excel_generator import PrinterScannerExcelGenerator
+from api.services.maintenance_serializer import with_report_relations
+from api.services.media_fetch import media_batches
 import os
 from datetime import datetime
 
@@ -35,6 +37,12 @@ class Command(BaseCommand):
             default=None,
             help='Directorio de salida personalizado'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Mantenimientos por bloque de precarga de imágenes (default: MEDIA_PREFETCH_CHUNK)'
+        )
 
     def handle(self, *args, **options):
         maintenance_id = options.get('maintenance_id')
@@ -74,50 +82,54 @@ class Command(BaseCommand):
         generator = PrinterScannerExcelGenerator()
         generated_files = []
 
-        for maintenance in queryset:
-            try:
-                self.stdout.write(f"Procesando mantenimiento id={maintenance.id} equipo={maintenance.equipment}")
+        # Imágenes precargadas en paralelo por bloques (memoria acotada al bloque)
+        ids = list(queryset.values_list('id', flat=True))
+        related = with_report_relations(Maintenance.objects.all())
+        for maintenances, media in media_batches(related, ids, options.get('chunk_size')):
+            for maintenance in maintenances:
+                try:
+                    self.stdout.write(f"Procesando mantenimiento id={maintenance.id} equipo={maintenance.equipment}")
                 
-                # Generar Excel
-                excel_bytes = generator.generate_report(maintenance)
+                    # Generar Excel
+                    excel_bytes = generator.generate_report(maintenance, media=media)
                 
-                # Crear nombre de archivo
-                equipment_code = maintenance.equipment.code or f'EQ-{maintenance.id}'
-                timestamp = datetime.now().strftime('%Y%m%d')
-                # Generar hash único corto
-                import hashlib
-                hash_str = hashlib.md5(f"{maintenance.id}{datetime.now().isoformat()}".encode()).hexdigest()[:8]
-                filename = f"rutina_impresora_escaner_{equipment_code}_{timestamp}_{hash_str}.xlsx"
+                    # Crear nombre de archivo
+                    equipment_code = maintenance.equipment.code or f'EQ-{maintenance.id}'
+                    timestamp = datetime.now().strftime('%Y%m%d')
+                    # Generar hash único corto
+                    import hashlib
+                    hash_str = hashlib.md5(f"{maintenance.id}{datetime.now().isoformat()}".encode()).hexdigest()[:8]
+                    filename = f"rutina_impresora_escaner_{equipment_code}_{timestamp}_{hash_str}.xlsx"
                 
-                # Guardar archivo
-                file_path = os.path.join(reports_dir, filename)
+                    # Guardar archivo
+                    file_path = os.path.join(reports_dir, filename)
                 
-                with open(file_path, 'wb') as f:
-                    f.write(excel_bytes)
+                    with open(file_path, 'wb') as f:
+                        f.write(excel_bytes)
                 
-                generated_files.append(file_path)
-                self.stdout.write(self.style.SUCCESS(f"  ✓ Generado: {file_path}"))
+                    generated_files.append(file_path)
+                    self.stdout.write(self.style.SUCCESS(f"  ✓ Generado: {file_path}"))
                 
-                # Crear registro Report (opcional)
-                try:
-                    report, created = Report.objects.get_or_create(
-                        maintenance=maintenance,
-                        defaults={
-                            'title': f'Reporte Impresora/Escáner - {equipment_code}',
-                            'content': f'Reporte generado: {filename}',
-                        }
-                    )
-                    if not created and report.pdf_file:
-                        # Actualizar archivo existente
-                        from django.core.files.base import ContentFile
-                        report.pdf_file.save(filename, ContentFile(excel_bytes), save=True)
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f"  ! No se pudo crear registro Report: {e}"))
+                    # Crear registro Report (opcional)
+                    try:
+                        report, created = Report.objects.get_or_create(
+                            maintenance=maintenance,
+                            defaults={
+                                'title': f'Reporte Impresora/Escáner - {equipment_code}',
+                                'content': f'Reporte generado: {filename}',
+                            }
+                        )
+                        if not created and report.pdf_file:
+                            # Actualizar archivo existente
+                            from django.core.files.base import ContentFile
+                            report.pdf_file.save(filename, ContentFile(excel_bytes), save=True)
+                    except Exception as e:
+                        self.stdout.write(self.style.WARNING(f"  ! No se pudo crear registro Report: {e}"))
                 
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"  ✗ Error procesando mantenimiento {maintenance.id}: {e}"))
-                import traceback
-                traceback.print_exc()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"  ✗ Error procesando mantenimiento {maintenance.id}: {e}"))
+                    import traceback
+                    traceback.print_exc()
 
         self.stdout.write(self.style.SUCCESS(f'\nSe generaron {len(generated_files)} archivos Excel:'))
         for file_path in generated_files:
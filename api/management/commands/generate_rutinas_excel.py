@@ -10,6 +10,8 @@ import uuid
 
 from api.models import Maintenance, Report
 from api.services.excel_report_generator import ExcelReportGenerator
+from api.services.maintenance_serializer import with_report_relations
+from api.services.media_fetch import media_batches
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
@@ -41,6 +43,12 @@ class Command(BaseCommand):
             default=None,
             help='ID específico de un mantenimiento a procesar'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Mantenimientos por bloque de precarga de imágenes (default: MEDIA_PREFETCH_CHUNK)'
+        )
 
     def handle(self, *args, **options):
         limit = options.get('limit') or 10
@@ -76,51 +84,55 @@ class Command(BaseCommand):
         User = get_user_model()
         generated_files = []
 
-        for maintenance in qs:
-            self.stdout.write(f'Procesando mantenimiento id={maintenance.id} equipo={maintenance.equipment}')
+        # Imágenes precargadas en paralelo por bloques (memoria acotada al bloque)
+        ids = list(qs.values_list('id', flat=True))
+        related = with_report_relations(Maintenance.objects.all())
+        for maintenances, media in media_batches(related, ids, options.get('chunk_size')):
+            for maintenance in maintenances:
+                self.stdout.write(f'Procesando mantenimiento id={maintenance.id} equipo={maintenance.equipment}')
             
-            try:
-                # Generar Excel
-                excel_bytes = generator.generate_report(maintenance)
-
-                # Generar nombre de archivo
-                fecha_str = maintenance.maintenance_date.strftime('%Y%m%d') if maintenance.maintenance_date else 'sin_fecha'
-                equipo_code = maintenance.equipment.code or f'eq{maintenance.equipment.id}'
-                filename = f"rutina_mantenimiento_{equipo_code}_{fecha_str}_{uuid.uuid4().hex[:8]}.xlsx"
-                filepath = os.path.join(output_dir, filename)
-
-                # Guardar archivo
-                with open(filepath, 'wb') as f:
-                    f.write(excel_bytes)
-
-                generated_files.append(filepath)
-
-                # Crear/actualizar registro Report
-                user = maintenance.technician or User.objects.filter(is_active=True).first()
-                report, created = Report.objects.get_or_create(
-                    maintenance=maintenance,
-                    defaults={
-                        'generated_by': user,
-                        'title': f'Rutina Mantenimiento - {equipo_code} - {fecha_str}'
-                    }
-                )
+                try:
+                    # Generar Excel
+                    excel_bytes = generator.generate_report(maintenance, media=media)
+
+                    # Generar nombre de archivo
+                    fecha_str = maintenance.maintenance_date.strftime('%Y%m%d') if maintenance.maintenance_date else 'sin_fecha'
+                    equipo_code = maintenance.equipment.code or f'eq{maintenance.equipment.id}'
+                    filename = f"rutina_mantenimiento_{equipo_code}_{fecha_str}_{uuid.uuid4().hex[:8]}.xlsx"
+                    filepath = os.path.join(output_dir, filename)
+
+                    # Guardar archivo
+                    with open(filepath, 'wb') as f:
+                        f.write(excel_bytes)
+
+                    generated_files.append(filepath)
+
+                    # Crear/actualizar registro Report
+                    user = maintenance.technician or User.objects.filter(is_active=True).first()
+                    report, created = Report.objects.get_or_create(
+                        maintenance=maintenance,
+                        defaults={
+                            'generated_by': user,
+                            'title': f'Rutina Mantenimiento - {equipo_code} - {fecha_str}'
+                        }
+                    )
                 
-                # Actualizar con la nueva ruta del archivo
-                report.pdf_file = os.path.join('maintenance-reports', filename)
-                report.generated_by = user
-                report.title = f'Rutina Mantenimiento - {equipo_code} - {fecha_str}'
-                report.save()
-
-                self.stdout.write(self.style.SUCCESS(
-                    f'  ✓ Generado: {filepath}'
-                ))
-
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(
-                    f'  ✗ Error procesando mantenimiento {maintenance.id}: {e}'
-                ))
-                import traceback
-                traceback.print_exc()
+                    # Actualizar con la nueva ruta del archivo
+                    report.pdf_file = os.path.join('maintenance-reports', filename)
+                    report.generated_by = user
+                    report.title = f'Rutina Mantenimiento - {equipo_code} - {fecha_str}'
+                    report.save()
+
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  ✓ Generado: {filepath}'
+                    ))
+
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(
+                        f'  ✗ Error procesando mantenimiento {maintenance.id}: {e}'
+                    ))
+                    import traceback
+                    traceback.print_exc()
 
         # Resumen final
         self.stdout.write('')
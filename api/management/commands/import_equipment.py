@@ -0,0 +1,40 @@
+"""
+Sincroniza el inventario de equipos desde el registro de activos (CSV/XLSX).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.equipment_inventory import CHUNK_SIZE, import_equipment_inventory, iter_inventory_rows
+
+
+class Command(BaseCommand):
+    help = 'Upsert equipment inventory by code/serial_number from a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or XLSX file exported from the asset register')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per bulk upsert')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count changes without writing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fh = open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+        with fh:
+            summary = import_equipment_inventory(
+                iter_inventory_rows(fh),
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+
+        for error in summary['errors']:
+            self.stdout.write(self.style.ERROR(f"Row {error['row']}: {'; '.join(error['errors'])}"))
+        for warning in summary['warnings']:
+            self.stdout.write(self.style.WARNING(f"Row {warning['row']}: {warning['warning']}"))
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{summary['total']} rows: {summary['created']} created, "
+            f"{summary['updated']} updated, {summary['failed']} failed"
+        ))
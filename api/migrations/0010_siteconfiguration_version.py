@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_alter_maintenance_maintenance_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteconfiguration',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
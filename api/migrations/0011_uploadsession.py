@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_siteconfiguration_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('photo', 'Foto'), ('signature', 'Firma'), ('second_signature', 'Segunda firma')], default='photo', max_length=20)),
+                ('upload_id', models.CharField(max_length=255, unique=True)),
+                ('object_key', models.CharField(max_length=500)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('size', models.PositiveBigIntegerField()),
+                ('part_size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('completed', 'Completada'), ('aborted', 'Cancelada')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('maintenance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='api.maintenance')),
+            ],
+            options={
+                'db_table': 'upload_session',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceSnapshot',
+            fields=[
+                ('maintenance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='api.maintenance')),
+                ('schema_version', models.PositiveSmallIntegerField(default=1)),
+                ('revision', models.PositiveIntegerField(default=1)),
+                ('data', models.JSONField(default=dict)),
+                ('source_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'maintenance_snapshot',
+                'indexes': [models.Index(fields=['schema_version', 'updated_at'], name='maint_snapshot_schema_upd')],
+            },
+        ),
+    ]
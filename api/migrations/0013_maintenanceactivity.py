@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_maintenancesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_key', models.CharField(max_length=150)),
+                ('activity_name', models.CharField(max_length=255)),
+                ('value', models.CharField(choices=[('SI', 'Sí'), ('NO', 'No'), ('NA', 'No aplica'), ('PENDIENTE', 'Pendiente')], max_length=10)),
+                ('maintenance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rows', to='api.maintenance')),
+            ],
+            options={
+                'db_table': 'maintenance_activity',
+                'indexes': [models.Index(fields=['activity_key', 'value'], name='maint_activity_key_value'), models.Index(fields=['value', 'maintenance'], name='maint_activity_value_maint')],
+                'constraints': [models.UniqueConstraint(fields=('maintenance', 'activity_key'), name='maint_activity_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_maintenanceactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMaintenance',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('codigo', models.CharField(blank=True, max_length=50, null=True)),
+                ('maintenance_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('scheduled_date', models.DateField()),
+                ('completion_date', models.DateField(blank=True, null=True)),
+                ('fields', models.JSONField(default=dict)),
+                ('bundle', models.FileField(max_length=255, upload_to='archive/maintenances/')),
+                ('bundle_size', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('dependencia_rel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.dependencia')),
+                ('equipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_maintenances', to='api.equipment')),
+                ('sede_rel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.sede')),
+                ('subdependencia', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.subdependencia')),
+                ('technician', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'maintenance_archive',
+                'ordering': ['-scheduled_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReport',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('pdf_file', models.FileField(blank=True, null=True, upload_to='reports/')),
+                ('generated_at', models.DateTimeField()),
+                ('generated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('maintenance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='api.archivedmaintenance')),
+            ],
+            options={
+                'db_table': 'report_archive',
+                'ordering': ['-generated_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedmaintenance',
+            index=models.Index(fields=['equipment', 'scheduled_date'], name='maint_archive_equipment_date'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmaintenance',
+            index=models.Index(fields=['sede_rel', 'scheduled_date'], name='maint_archive_sede_date'),
+        ),
+    ]
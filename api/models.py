@@ -173,6 +173,11 @@ class Maintenance(models.Model):
         Ensure `elaborado_por` mirrors the `technician` name when technician is set.
         Also keep backwards compatibility by not overwriting elaborado_por when no technician.
         """
+        self.sync_elaborado_por()
+        super().save(*args, **kwargs)
+
+    def sync_elaborado_por(self):
+        """Copy the technician display name into `elaborado_por` (also used before bulk_create)."""
         try:
             if self.technician:
                 name = self.technician.get_full_name() or self.technician.username
@@ -180,7 +185,6 @@ class Maintenance(models.Model):
                 self.elaborado_por = name
         except Exception:
             pass
-        super().save(*args, **kwargs)
 
     @property
     def performed_by(self):
@@ -211,6 +215,8 @@ class Photo(models.Model):
     maintenance = models.ForeignKey(Maintenance, on_delete=models.CASCADE, related_name='photos')
     photo = models.ImageField(upload_to='maintenance_photos/')
     caption = models.CharField(max_length=255, blank=True, default='')
+    # SHA-256 del archivo subido (dedupe, ver services/media_ingest.py)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -350,10 +356,18 @@ class Report(models.Model):
     pdf_file = models.FileField(upload_to='reports/', null=True, blank=True)
     generated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     generated_at = models.DateTimeField(auto_now_add=True)
+    # Ciclo de vida del archivo (ver services/report_artifacts.py)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    file_size = models.PositiveIntegerField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    report_data = models.JSONField(default=dict, blank=True)
 
     class Meta:
         db_table = 'report'
         ordering = ['-generated_at']
+        indexes = [
+            models.Index(fields=['maintenance', 'generated_at'], name='report_maint_generated'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.generated_at}"
@@ -366,6 +380,7 @@ class Signature(models.Model):
     signer_role = models.CharField(max_length=100, default='Técnico')
     signature_image = models.ImageField(upload_to='signatures/', null=True, blank=True)
     thumbnail = models.ImageField(upload_to='signatures/thumbnails/', null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
     signed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -387,6 +402,7 @@ class SecondSignature(models.Model):
     signer_role = models.CharField(max_length=100, default='Usuario')
     signature_image = models.ImageField(upload_to='signatures/second/', null=True, blank=True)
     thumbnail = models.ImageField(upload_to='signatures/second/thumbnails/', null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
     signed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -402,6 +418,145 @@ class SecondSignature(models.Model):
         return self.signature_image
 
 
+class UploadSession(models.Model):
+    """Carga directa (multipart S3 prefirmado) de una foto o firma hacia MinIO."""
+    KIND_CHOICES = [
+        ('photo', 'Foto'),
+        ('signature', 'Firma'),
+        ('second_signature', 'Segunda firma'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('completed', 'Completada'),
+        ('aborted', 'Cancelada'),
+    ]
+
+    maintenance = models.ForeignKey(Maintenance, on_delete=models.CASCADE, related_name='upload_sessions')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='photo')
+    upload_id = models.CharField(max_length=255, unique=True)
+    object_key = models.CharField(max_length=500)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    part_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'upload_session'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.kind} upload for maintenance {self.maintenance_id} ({self.status})"
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.size // self.part_size))
+
+
+class MaintenanceSnapshot(models.Model):
+    """Datos de reporte desnormalizados de un mantenimiento completado (ver services/maintenance_snapshot.py)."""
+    maintenance = models.OneToOneField(Maintenance, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    # Formato de `data` (SNAPSHOT_SCHEMA) y número de veces que se regeneró
+    schema_version = models.PositiveSmallIntegerField(default=1)
+    revision = models.PositiveIntegerField(default=1)
+    data = models.JSONField(default=dict)
+    source_updated_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'maintenance_snapshot'
+        indexes = [
+            models.Index(fields=['schema_version', 'updated_at'], name='maint_snapshot_schema_upd'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot r{self.revision} of maintenance {self.maintenance_id}"
+
+
+class MaintenanceActivity(models.Model):
+    """Fila normalizada de `Maintenance.activities` (ver services/maintenance_activities.py)."""
+    VALUE_CHOICES = [
+        ('SI', 'Sí'),
+        ('NO', 'No'),
+        ('NA', 'No aplica'),
+        ('PENDIENTE', 'Pendiente'),
+    ]
+
+    maintenance = models.ForeignKey(Maintenance, on_delete=models.CASCADE, related_name='activity_rows')
+    # Nombre de la actividad normalizado (alias de los generadores resueltos a la actividad de la plantilla)
+    activity_key = models.CharField(max_length=150)
+    activity_name = models.CharField(max_length=255)
+    value = models.CharField(max_length=10, choices=VALUE_CHOICES)
+
+    class Meta:
+        db_table = 'maintenance_activity'
+        constraints = [
+            models.UniqueConstraint(fields=['maintenance', 'activity_key'], name='maint_activity_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['activity_key', 'value'], name='maint_activity_key_value'),
+            models.Index(fields=['value', 'maintenance'], name='maint_activity_value_maint'),
+        ]
+
+    def __str__(self):
+        return f"{self.activity_name}: {self.value} (maintenance {self.maintenance_id})"
+
+
+class ArchivedMaintenance(models.Model):
+    """
+    Mantenimiento histórico movido fuera de las tablas activas (ver services/maintenance_archive.py).
+    Conserva el id original; el registro completo y sus dependientes están en `bundle` (JSON gzip).
+    """
+    id = models.IntegerField(primary_key=True)
+    equipment = models.ForeignKey(Equipment, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_maintenances')
+    technician = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    sede_rel = models.ForeignKey(Sede, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    dependencia_rel = models.ForeignKey(Dependencia, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    subdependencia = models.ForeignKey(Subdependencia, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    codigo = models.CharField(max_length=50, null=True, blank=True)
+    maintenance_type = models.CharField(max_length=50, null=True, blank=True)
+    status = models.CharField(max_length=20)
+    scheduled_date = models.DateField()
+    completion_date = models.DateField(null=True, blank=True)
+    # Campos de reporte ya formateados (serialize_maintenance)
+    fields = models.JSONField(default=dict)
+    bundle = models.FileField(upload_to='archive/maintenances/', max_length=255)
+    bundle_size = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'maintenance_archive'
+        ordering = ['-scheduled_date']
+        indexes = [
+            models.Index(fields=['equipment', 'scheduled_date'], name='maint_archive_equipment_date'),
+            models.Index(fields=['sede_rel', 'scheduled_date'], name='maint_archive_sede_date'),
+        ]
+
+    def __str__(self):
+        return f"Archived maintenance {self.id} ({self.scheduled_date})"
+
+
+class ArchivedReport(models.Model):
+    """Report de un mantenimiento archivado; el PDF sigue en el storage con el mismo nombre."""
+    id = models.IntegerField(primary_key=True)
+    maintenance = models.ForeignKey(ArchivedMaintenance, on_delete=models.CASCADE, related_name='reports')
+    title = models.CharField(max_length=255)
+    pdf_file = models.FileField(upload_to='reports/', null=True, blank=True)
+    generated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'report_archive'
+        ordering = ['-generated_at']
+
+    def __str__(self):
+        return f"{self.title} - {self.generated_at} (archived)"
+
+
 class Incident(models.Model):
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='incidents', db_column='equipment_id', null=True, blank=True)
     maintenance = models.ForeignKey(Maintenance, on_delete=models.SET_NULL, null=True, blank=True, related_name='incidents')
@@ -436,6 +591,9 @@ class Incident(models.Model):
 class SiteConfiguration(models.Model):
     """Singleton-style model to store site-wide configuration as JSON."""
     config = models.JSONField(default=dict, blank=True)
+    # Sello de versión: se incrementa en cada guardado para invalidar las
+    # copias en caché de la configuración en todos los procesos.
+    version = models.PositiveIntegerField(default=0, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -443,3 +601,15 @@ class SiteConfiguration(models.Model):
 
     def __str__(self):
         return 'Site configuration'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.version = (self.version or 0) + 1
+            super().save(*args, **kwargs)
+            return
+        # Incremento atómico para que guardados concurrentes nunca compartan versión
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
@@ -8,59 +8,59 @@ from io import BytesIO
 from datetime import datetime
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.platypus import (
     SimpleDocTemplate, 
     Table, 
-    TableStyle, 
     Paragraph, 
     Spacer, 
-    Image as RLImage,  # Renombrar para evitar conflictos
-    PageBreak,
     Flowable
 )
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from reportlab.lib.enums import TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
 from io import BytesIO
 from datetime import datetime
 import os
-from django.conf import settings
 
 # Importar modelos
 from .models import Maintenance, Incident, Equipment
+from .services.report_images import report_image
+from .services.report_styles import get_header_assets, get_report_styles
 
 
 class MaintenanceReportPDF:
     """Generate PDF report for maintenance with parametrized headers"""
     
-    def __init__(self, maintenance: Maintenance):
+    def __init__(self, maintenance: Maintenance, header_config: dict | None = None, media: dict | None = None):
         self.maintenance = maintenance
+        self.header_config = header_config
+        # Optional {file name: bytes} from services.media_fetch.prefetch_media
+        self.media = media
         self.buffer = BytesIO()
         self.width, self.height = A4
         
     def _header_footer(self, canvas, doc):
         """Add header and footer to each page"""
+        header = self._header
         canvas.saveState()
         
         # Header
         canvas.setFont('Helvetica-Bold', 8)
         
-        # Logo (if exists)
-        logo_path = os.path.join(settings.BASE_DIR, 'static', 'images', 'logo.png')
-        if os.path.exists(logo_path):
-            canvas.drawImage(logo_path, 30, self.height - 50, width=60, height=40, preserveAspectRatio=True)
+        # Logo (decoded once per process, see services.report_styles)
+        if header.get('logo') is not None:
+            canvas.drawImage(header['logo'], 30, self.height - 50, width=60, height=40, preserveAspectRatio=True)
         
         # Header table
         canvas.setFont('Helvetica-Bold', 10)
-        canvas.drawString(100, self.height - 30, "ALCALDÍA MUNICIPAL")
+        canvas.drawString(100, self.height - 30, str(header['organization']))
         canvas.setFont('Helvetica', 8)
-        canvas.drawString(100, self.height - 42, "Sistema de Gestión de Mantenimiento")
+        canvas.drawString(100, self.height - 42, str(header['department']))
         
         # Document info box (right side)
         canvas.setFont('Helvetica-Bold', 7)
-        canvas.drawString(self.width - 150, self.height - 25, "Código: GTI-F-015")
-        canvas.drawString(self.width - 150, self.height - 35, "Versión: 01")
+        canvas.drawString(self.width - 150, self.height - 25, f"Código: {header['codigo']}")
+        canvas.drawString(self.width - 150, self.height - 35, f"Versión: {header['version']}")
         canvas.drawString(self.width - 150, self.height - 45, f"Fecha: {datetime.now().strftime('%d/%m/%Y')}")
         
         # Header line
@@ -93,35 +93,13 @@ class MaintenanceReportPDF:
         
         # Container for elements
         elements: list[Flowable] = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#003366'),
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=12,
-            textColor=colors.HexColor('#003366'),
-            spaceAfter=10,
-            spaceBefore=15,
-            fontName='Helvetica-Bold'
-        )
+        styles = get_report_styles()
+        self._header = get_header_assets(self.header_config)
         
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=9,
-            alignment=TA_JUSTIFY
-        )
+        # Shared styles (built once per process)
+        title_style = styles.title
+        heading_style = styles.heading
+        normal_style = styles.normal
         
         # Title
         title = Paragraph("REPORTE DE MANTENIMIENTO", title_style)
@@ -142,21 +120,7 @@ class MaintenanceReportPDF:
         ]
         
         equipment_table = Table(equipment_data, colWidths=[2*cm, 6*cm, 2*cm, 6*cm])
-        equipment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#003366')),
-            ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#003366')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        equipment_table.setStyle(styles.info_table)
         elements.append(equipment_table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -179,21 +143,7 @@ class MaintenanceReportPDF:
             maintenance_data.append(['Calificación:', f"{self.maintenance.calificacion_servicio}/5", '', ''])
         
         maintenance_table = Table(maintenance_data, colWidths=[2*cm, 6*cm, 2.5*cm, 5.5*cm])
-        maintenance_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#003366')),
-            ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#003366')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        maintenance_table.setStyle(styles.info_table)
         elements.append(maintenance_table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -249,32 +199,21 @@ class MaintenanceReportPDF:
             elements.append(photos_heading)
             section_num += 1
             
-            photo_data = []
-            photo_row = []
-            for idx, photo in enumerate(photos):
-                if photo.photo:
-                    try:
-                        # Intentar obtener la ruta del archivo
-                        photo_path = photo.photo.path if hasattr(photo.photo, 'path') else None
-                        if photo_path and os.path.exists(photo_path):
-                            img = RLImage(photo_path, width=2.5*inch, height=2*inch)
-                            photo_row.append(img)
-                            
-                            if len(photo_row) == 2 or idx == len(photos) - 1:
-                                photo_data.append(photo_row)
-                                photo_row = []
-                    except Exception as e:
-                        print(f"Error loading image: {e}")
+            # Images come from any storage backend, pre-scaled and cached
+            # (services.report_images)
+            images = [
+                img for img in (
+                    report_image(photo.photo, 2.5*inch, 2*inch, media=self.media) for photo in photos
+                ) if img is not None
+            ]
+            photo_data = [
+                images[i:i + 2] + [''] * (2 - len(images[i:i + 2]))
+                for i in range(0, len(images), 2)
+            ]
             
             if photo_data:
                 photo_table = Table(photo_data, colWidths=[3*inch, 3*inch])
-                photo_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('TOPPADDING', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ]))
+                photo_table.setStyle(styles.photo_table)
                 elements.append(photo_table)
                 elements.append(Spacer(1, 0.3*inch))
         
@@ -283,71 +222,33 @@ class MaintenanceReportPDF:
         signatures_heading = Paragraph(f"{section_num}. FIRMAS", heading_style)
         elements.append(signatures_heading)
         
-        # Obtener firmas del mantenimiento
-        signatures = self.maintenance.signatures.all()
-        second_signatures = self.maintenance.second_signatures.all()
+        # Obtener firmas del mantenimiento (primera de cada tipo; usa el prefetch si existe)
+        signature = next(iter(self.maintenance.signatures.all()), None)
+        second_signature = next(iter(self.maintenance.second_signatures.all()), None)
         
         signature_data = []
         signature_images = []
         
-        # Primera firma (técnico)
-        if signatures:
-            sig = signatures.first()
-            if sig.signature_image:
-                try:
-                    sig_path = sig.signature_image.path if hasattr(sig.signature_image, 'path') else None
-                    if sig_path and os.path.exists(sig_path):
-                        sig_img = RLImage(sig_path, width=2*inch, height=1*inch)
-                        signature_images.append(sig_img)
-                    else:
-                        signature_images.append('')
-                except:
-                    signature_images.append('')
-            else:
-                signature_images.append('')
-        else:
-            signature_images.append('')
-        
-        # Segunda firma (usuario/supervisor)
-        if second_signatures:
-            sig2 = second_signatures.first()
-            if sig2.signature_image:
-                try:
-                    sig2_path = sig2.signature_image.path if hasattr(sig2.signature_image, 'path') else None
-                    if sig2_path and os.path.exists(sig2_path):
-                        sig2_img = RLImage(sig2_path, width=2*inch, height=1*inch)
-                        signature_images.append(sig2_img)
-                    else:
-                        signature_images.append('')
-                except:
-                    signature_images.append('')
-            else:
-                signature_images.append('')
-        else:
-            signature_images.append('')
+        # Primera firma (técnico) y segunda firma (usuario/supervisor)
+        for sig in (signature, second_signature):
+            img = report_image(sig.signature_image, 2*inch, 1*inch, media=self.media) if sig else None
+            signature_images.append(img if img is not None else '')
         
         signature_data.append(signature_images)
         signature_data.append(['_' * 40, '_' * 40])
         
         # Nombres
-        tech_name = signatures.first().signer_name if signatures else (
+        tech_name = signature.signer_name if signature else (
             self.maintenance.technician.get_full_name() if self.maintenance.technician else 
             self.maintenance.performed_by or 'Técnico'
         )
-        user_name = second_signatures.first().signer_name if second_signatures else 'Usuario/Supervisor'
+        user_name = second_signature.signer_name if second_signature else 'Usuario/Supervisor'
         
         signature_data.append(['Técnico Responsable', 'Usuario/Supervisor'])
         signature_data.append([tech_name, user_name])
         
         signature_table = Table(signature_data, colWidths=[3.5*inch, 3.5*inch])
-        signature_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 5),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        signature_table.setStyle(styles.signature_table)
         elements.append(signature_table)
         
         # Build PDF
@@ -380,7 +281,8 @@ class IncidentReportPDF:
         """Generate incident PDF report"""
         doc = SimpleDocTemplate(self.buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=80, bottomMargin=60)
         elements: list[Flowable] = []
-        styles = getSampleStyleSheet()
+        shared = get_report_styles()
+        styles = shared.sample
         
         # Title
         title = Paragraph(f"REPORTE DE INCIDENTE #{self.incident.id}", styles['Title'])
@@ -397,14 +299,7 @@ class IncidentReportPDF:
         ]
         
         table = Table(data, colWidths=[2*cm, 6*cm, 2*cm, 6*cm])
-        table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        table.setStyle(shared.incident_table)
         elements.append(table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -428,52 +323,61 @@ class IncidentReportPDF:
 
 
 class BatchMaintenanceReportPDF:
-    """Generate batch PDF reports for multiple maintenances"""
+    """
+    Generate one consolidated PDF for multiple maintenances.
+
+    Each maintenance PDF is rendered once (or taken from the render cache) and
+    appended at page level after a cover page, with one bookmark per report.
+    Requires pypdf (see services.pdf_merge).
+    """
     
-    def __init__(self, maintenances: list[Maintenance]):
+    def __init__(self, maintenances: list[Maintenance], title: str = 'REPORTES DE MANTENIMIENTO'):
         self.maintenances = maintenances
+        self.title = title
         self.buffer = BytesIO()
     
-    def generate(self) -> BytesIO:
-        """Generate batch PDF report"""
-        doc = SimpleDocTemplate(self.buffer, pagesize=A4)
-        elements: list[Flowable] = []
-        styles = getSampleStyleSheet()
-        
-        # Cover page
-        cover_title = Paragraph(
-            f"REPORTES DE MANTENIMIENTO<br/>{len(self.maintenances)} Registros",
-            styles['Title']
-        )
-        elements.append(cover_title)
-        elements.append(Spacer(1, 0.5*inch))
-        
-        cover_date = Paragraph(
-            f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
-            styles['Normal']
-        )
-        elements.append(cover_date)
-        elements.append(PageBreak())
-        
-        # Add each maintenance report
-        for idx, maintenance in enumerate(self.maintenances):
-            report_gen = MaintenanceReportPDF(maintenance)
-            # Note: This is simplified - in production you'd merge the PDFs properly
-            
-            placa_repr = maintenance.placa or (maintenance.equipment.serial_number if getattr(maintenance, 'equipment', None) and getattr(maintenance.equipment, 'serial_number', None) else (maintenance.equipment.name if getattr(maintenance, 'equipment', None) else maintenance.id))
-            heading = Paragraph(
-                f"Reporte {idx + 1}: {placa_repr}",
-                styles['Heading1']
-            )
-            elements.append(heading)
-            elements.append(Spacer(1, 0.2*inch))
-            
-            if idx < len(self.maintenances) - 1:
-                elements.append(PageBreak())
-        
+    def _cover(self) -> bytes:
+        """Cover page with the report count and generation date"""
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        styles = get_report_styles().sample
+        elements: list[Flowable] = [
+            Paragraph(f"{self.title}<br/>{len(self.maintenances)} Registros", styles['Title']),
+            Spacer(1, 0.5*inch),
+            Paragraph(f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']),
+        ]
         doc.build(elements)
-        self.buffer.seek(0)
-        return self.buffer
+        return buffer.getvalue()
+    
+    @staticmethod
+    def bookmark_title(idx: int, maintenance: Maintenance) -> str:
+        equipment = getattr(maintenance, 'equipment', None)
+        placa_repr = maintenance.placa or (
+            equipment.serial_number if equipment and getattr(equipment, 'serial_number', None)
+            else (equipment.name if equipment else maintenance.id)
+        )
+        fecha = maintenance.scheduled_date.strftime('%d/%m/%Y') if getattr(maintenance, 'scheduled_date', None) else ''
+        return f"Reporte {idx + 1}: {placa_repr}" + (f" ({fecha})" if fecha else '')
+    
+    def _parts(self):
+        from .services.render_cache import pdf_render_blocks, render_maintenance_pdf
+
+        yield 'Portada', self._cover()
+        idx = 0
+        # Images prefetched per block, only for reports missing from the render cache
+        for block, media in pdf_render_blocks(self.maintenances):
+            for maintenance in block:
+                yield self.bookmark_title(idx, maintenance), render_maintenance_pdf(maintenance, media=media)
+                idx += 1
+    
+    def generate(self, output=None):
+        """
+        Generate the consolidated PDF into `output` (defaults to self.buffer).
+        Returns the file object positioned at the start.
+        """
+        from .services.pdf_merge import merge_pdfs
+
+        return merge_pdfs(self._parts(), output=output if output is not None else self.buffer)
 
 
 class CheckboxFlowable(Flowable):
@@ -540,16 +444,17 @@ class ReportLabGenerator:
     def __init__(self, config=None):
         self.config = config or {}
     
-    def generate(self, maintenance):
+    def generate(self, maintenance, media=None):
         """
         Genera un PDF para un mantenimiento.
         
         Args:
             maintenance: Instancia de Maintenance
+            media: Imágenes precargadas {nombre: bytes} (opcional)
             
         Returns:
             BytesIO buffer con el PDF generado
         """
-        report_pdf = MaintenanceReportPDF(maintenance)
+        report_pdf = MaintenanceReportPDF(maintenance, header_config=self.config or None, media=media)
         return report_pdf.generate()
 
@@ -190,9 +190,9 @@ class MaintenanceSerializer(serializers.ModelSerializer):
             return f"{obj.technician.first_name} {obj.technician.last_name}".strip() or obj.technician.username
         return None
 
-    def create(self, validated_data):
-        request = self.context.get('request')
-        
+    @staticmethod
+    def normalize_validated_data(validated_data):
+        """Coerce multipart-style values (JSON strings, 'true'/'false') in place."""
         # Extract and validate activities
         activities = validated_data.get('activities', {})
         if isinstance(activities, str):
@@ -208,6 +208,12 @@ class MaintenanceSerializer(serializers.ModelSerializer):
             is_incident = validated_data.get('is_incident')
             if isinstance(is_incident, str):
                 validated_data['is_incident'] = is_incident.lower() == 'true'
+        return validated_data
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        
+        self.normalize_validated_data(validated_data)
         
         maintenance = Maintenance.objects.create(**validated_data)
 
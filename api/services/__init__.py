@@ -37,6 +37,6 @@ except Exception:
 	HTMLPDFGenerator = None  # type: ignore
 
 try:
-	from .maintenance_serializer import serialize_maintenance  # type: ignore
+	from .maintenance_serializer import serialize_maintenance, serialize_maintenances  # type: ignore
 except Exception:
-	serialize_maintenance = None  # type: ignore
+	serialize_maintenance = serialize_maintenances = None  # type: ignore
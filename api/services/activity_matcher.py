@@ -0,0 +1,197 @@
+"""
+Matcher precompilado entre las actividades de una plantilla Excel y las claves
+del JSON `Maintenance.activities`.
+
+Cada generador construye un `ActivityMatcher` una sola vez (atributo de clase)
+con sus actividades, alias y mapeo genérico ya normalizados (minúsculas, sin
+tildes, espacios colapsados). Por reporte se normalizan las claves del JSON una
+sola vez y `match()` devuelve el valor (si, na) de todas las actividades.
+
+Orden de búsqueda por actividad (igual al de los generadores):
+  1. clave igual al nombre de la actividad;
+  2. alias, en orden (igualdad o, si `alias_substring`, alias contenido en la clave);
+  3. coincidencia parcial (`partial='two_words'`: las dos primeras palabras de la
+     actividad están en la clave; `partial='contains'`: la actividad está en la
+     clave, o la clave, de al menos dos palabras, está en la actividad; siempre
+     por palabras completas, así una clave genérica como 'limpieza' no marca
+     todas las filas "Limpieza ...");
+  4. clave genérica (`generic_map`, p. ej. 'limpieza' para todas las limpiezas).
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+MARK = '■'
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_activity(name: Any) -> str:
+    """'Limpiéza  de Carcaza ' -> 'limpieza de carcaza'."""
+    text = unicodedata.normalize('NFKD', str(name or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _SPACES.sub(' ', text).strip().lower()
+
+
+def parse_activity_value(value) -> Tuple[str, str]:
+    """
+    Valor de una actividad -> (si, na).
+
+    - True/'si'/'x'... -> ('■', ''); False/'no' y 'na'/'n.a' -> ('', '■')
+    - dict con 'si'/'na' -> el que esté marcado
+    """
+    if value is None:
+        return ('', '')
+
+    if isinstance(value, bool):
+        return (MARK, '') if value else ('', MARK)
+
+    if isinstance(value, str):
+        val_lower = value.lower().strip()
+        if val_lower in ('si', 'sí', 'yes', 'true', '1', 'x', MARK):
+            return (MARK, '')
+        elif val_lower in ('no', 'false', '0'):
+            return ('', MARK)
+        elif val_lower in ('na', 'n.a', 'n/a', 'n.a.'):
+            return ('', MARK)
+
+    if isinstance(value, dict):
+        si = MARK if value.get('si') or value.get('SI') else ''
+        na = MARK if value.get('na') or value.get('NA') or value.get('n.a') else ''
+        return (si, na)
+
+    return ('', '')
+
+
+def activity_status(value) -> Optional[str]:
+    """
+    Valor de una actividad -> 'SI' | 'NO' | 'NA' | 'PENDIENTE' (None si no se reconoce).
+    A diferencia de `parse_activity_value`, distingue NO de N/A.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'SI' if value else 'NO'
+    if isinstance(value, dict):
+        if value.get('si') or value.get('SI'):
+            return 'SI'
+        if value.get('na') or value.get('NA') or value.get('n.a'):
+            return 'NA'
+        if value.get('no') or value.get('NO'):
+            return 'NO'
+        return None
+    text = normalize_activity(value)
+    if text in ('si', 'yes', 'true', '1', 'x', MARK):
+        return 'SI'
+    if text in ('no', 'false', '0'):
+        return 'NO'
+    if text in ('na', 'n.a', 'n/a', 'n.a.'):
+        return 'NA'
+    if 'pendiente' in text:
+        return 'PENDIENTE'
+    return None
+
+
+class ActivityMatcher:
+    def __init__(
+        self,
+        activity_names: Iterable[str],
+        aliases: Optional[Dict[str, Sequence[str]]] = None,
+        generic_map: Optional[Dict[str, Sequence[str]]] = None,
+        alias_substring: bool = False,
+        partial: str = 'contains',
+    ):
+        if partial not in ('two_words', 'contains'):
+            raise ValueError(f'partial inválido: {partial}')
+        self.alias_substring = alias_substring
+        self.partial = partial
+
+        alias_index: Dict[str, List[str]] = {}
+        for canonical, names in (aliases or {}).items():
+            bucket = alias_index.setdefault(normalize_activity(canonical), [])
+            for alias in names:
+                norm = normalize_activity(alias)
+                if norm and norm not in bucket:
+                    bucket.append(norm)
+
+        generic = [
+            (normalize_activity(key), [normalize_activity(t) for t in targets])
+            for key, targets in (generic_map or {}).items()
+        ]
+
+        # Por actividad: (nombre normalizado, alias, palabras clave, claves genéricas)
+        self._specs: Dict[str, tuple] = {}
+        # Nombre o alias normalizado -> actividad de la plantilla
+        self._canonical: Dict[str, str] = {}
+        for name in activity_names:
+            if not name or name in self._specs:
+                continue
+            norm = normalize_activity(name)
+            words = norm.split()
+            generic_keys = [
+                key for key, targets in generic
+                if any(t == norm or norm in t for t in targets)
+            ]
+            self._specs[name] = (
+                norm,
+                tuple(alias_index.get(norm, ())),
+                tuple(words[:2]) if len(words) >= 2 else (),
+                tuple(generic_keys),
+            )
+            for key in (norm, *self._specs[name][1]):
+                self._canonical.setdefault(key, name)
+
+    @property
+    def activity_names(self) -> List[str]:
+        return list(self._specs)
+
+    def canonical_name(self, key: str) -> Optional[str]:
+        """Actividad de la plantilla a la que corresponde una clave (nombre o alias exacto)."""
+        return self._canonical.get(normalize_activity(key))
+
+    def _find(self, spec, keys: List[Tuple[str, Any]], exact: Dict[str, Any]):
+        norm, aliases, first_words, generic_keys = spec
+        if norm in exact:
+            return exact[norm]
+
+        for alias in aliases:
+            if not self.alias_substring:
+                if alias in exact:
+                    return exact[alias]
+                continue
+            # La igualdad es un caso de "contenido": se respeta el orden del JSON
+            for key, value in keys:
+                if alias in key:
+                    return value
+
+        if self.partial == 'two_words':
+            if first_words:
+                for key, value in keys:
+                    if all(w in key for w in first_words):
+                        return value
+        else:
+            padded = f' {norm} '
+            for key, value in keys:
+                padded_key = f' {key} '
+                if padded in padded_key or (' ' in key and padded_key in padded):
+                    return value
+
+        for generic in generic_keys:
+            if generic in exact:
+                return exact[generic]
+        return None
+
+    def match(self, activities) -> Dict[str, Tuple[str, str]]:
+        """{actividad de la plantilla: (si, na)} para todas las actividades."""
+        if not isinstance(activities, dict) or not activities:
+            return {name: ('', '') for name in self._specs}
+
+        keys = [(normalize_activity(k), v) for k, v in activities.items()]
+        keys = [(k, v) for k, v in keys if k]
+        exact: Dict[str, Any] = {}
+        for key, value in keys:
+            exact.setdefault(key, value)
+
+        return {
+            name: parse_activity_value(self._find(spec, keys, exact))
+            for name, spec in self._specs.items()
+        }
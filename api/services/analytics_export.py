@@ -0,0 +1,421 @@
+"""
+Exportación analítica a Parquet (pandas/DuckDB).
+
+Tablas exportadas bajo `ANALYTICS_EXPORT_DIR` (por defecto `BASE_DIR/analytics`):
+
+- `maintenances/year=YYYY/sede_id=N/part-<run>.parquet` (particiones Hive por
+  año de `scheduled_date` y sede);
+- `maintenance_activities/year=YYYY/...`: `Maintenance.activities` aplanado,
+  una fila por (mantenimiento, actividad);
+- `incidents/year=YYYY/...`, `equipment/`, `sedes/`, `dependencias/`,
+  `subdependencias/`.
+
+Las filas se leen con `values()` por bloques con paginación por clave
+(`bulk.keyset_chunks`; en MySQL `.iterator()` carga todo el resultado) y se
+escriben en row groups de hasta `ROW_GROUP_SIZE` filas. Lo pendiente de
+escribir se acota por bytes estimados (`ANALYTICS_EXPORT_BUFFER_BYTES`, 32 MB
+por tabla): al superarlo se vuelca solo la partición más grande.
+
+`start_background_export` ejecuta la exportación en un hilo (una a la vez por
+proceso) y deja el estado en la caché (`export_status`); es lo que usa el
+endpoint de administración, para no ocupar el request.
+
+En modo incremental solo se exportan las filas con `updated_at` posterior a la
+marca de agua de la corrida anterior (`_watermarks.json`); cada corrida escribe
+archivos `part-<run>` nuevos, así que una fila modificada aparece en varias
+corridas y el consumidor debe quedarse con la de `updated_at` más reciente.
+Las eliminaciones no se propagan.
+
+Requiere `pyarrow`; si no está instalado `pa` queda en None y
+`export_analytics` lanza `AnalyticsExportUnavailable`.
+"""
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import Dependencia, Equipment, Incident, Maintenance, Sede, Subdependencia
+
+from .activity_matcher import MARK, parse_activity_value
+from .bulk import keyset_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+ROW_GROUP_SIZE = 50000
+STATUS_CACHE_KEY = 'analytics_export:status'
+STATUS_TTL = 24 * 3600
+WATERMARK_FILE = '_watermarks.json'
+NULL_PARTITION = '__null__'
+
+# (columna, campo de values(), tipo arrow)
+MAINTENANCE_COLUMNS = [
+    ('id', 'id', 'int64'),
+    ('codigo', 'codigo', 'string'),
+    ('equipment_id', 'equipment_id', 'int64'),
+    ('equipment_type', 'equipment_type', 'string'),
+    ('maintenance_type', 'maintenance_type', 'string'),
+    ('status', 'status', 'string'),
+    ('scheduled_date', 'scheduled_date', 'date'),
+    ('completion_date', 'completion_date', 'date'),
+    ('hora_inicio', 'hora_inicio', 'time'),
+    ('hora_final', 'hora_final', 'time'),
+    ('technician_id', 'technician_id', 'int64'),
+    ('technician', 'technician__username', 'string'),
+    ('sede_id', 'sede_rel_id', 'int64'),
+    ('dependencia_id', 'dependencia_rel_id', 'int64'),
+    ('subdependencia_id', 'subdependencia_id', 'int64'),
+    ('sede_legacy', 'sede', 'string'),
+    ('dependencia_legacy', 'dependencia', 'string'),
+    ('oficina', 'oficina', 'string'),
+    ('placa', 'placa', 'string'),
+    ('cost', 'cost', 'float64'),
+    ('calificacion_servicio', 'calificacion_servicio', 'string'),
+    ('is_incident', 'is_incident', 'bool'),
+    ('created_at', 'created_at', 'timestamp'),
+    ('updated_at', 'updated_at', 'timestamp'),
+]
+
+ACTIVITY_COLUMNS = [
+    ('maintenance_id', None, 'int64'),
+    ('activity', None, 'string'),
+    ('done', None, 'bool'),
+    ('value', None, 'string'),
+]
+
+EQUIPMENT_COLUMNS = [
+    ('id', 'id', 'int64'),
+    ('code', 'code', 'string'),
+    ('serial_number', 'serial_number', 'string'),
+    ('name', 'name', 'string'),
+    ('brand', 'brand', 'string'),
+    ('model', 'model', 'string'),
+    ('location', 'location', 'string'),
+    ('sede_id', 'sede_rel_id', 'int64'),
+    ('dependencia_id', 'dependencia_rel_id', 'int64'),
+    ('subdependencia_id', 'subdependencia_id', 'int64'),
+    ('purchase_date', 'purchase_date', 'date'),
+    ('warranty_expiry', 'warranty_expiry', 'date'),
+    ('created_at', 'created_at', 'timestamp'),
+    ('updated_at', 'updated_at', 'timestamp'),
+]
+
+INCIDENT_COLUMNS = [
+    ('id', 'id', 'int64'),
+    ('equipment_id', 'equipment_id', 'int64'),
+    ('maintenance_id', 'maintenance_id', 'int64'),
+    ('reported_by_id', 'reported_by_id', 'int64'),
+    ('incident_date', 'incident_date', 'timestamp'),
+    ('severity', 'severity', 'string'),
+    ('status', 'status', 'string'),
+    ('description', 'description', 'string'),
+    ('resolution', 'resolution', 'string'),
+    ('resolved_at', 'resolved_at', 'timestamp'),
+    ('created_at', 'created_at', 'timestamp'),
+    ('updated_at', 'updated_at', 'timestamp'),
+]
+
+_LOCATION_COMMON = [
+    ('codigo', 'codigo', 'string'),
+    ('nombre', 'nombre', 'string'),
+    ('activo', 'activo', 'bool'),
+    ('created_at', 'created_at', 'timestamp'),
+    ('updated_at', 'updated_at', 'timestamp'),
+]
+SEDE_COLUMNS = [('id', 'id', 'int64')] + _LOCATION_COMMON
+DEPENDENCIA_COLUMNS = [('id', 'id', 'int64'), ('sede_id', 'sede_id', 'int64')] + _LOCATION_COMMON
+SUBDEPENDENCIA_COLUMNS = [('id', 'id', 'int64'), ('dependencia_id', 'dependencia_id', 'int64')] + _LOCATION_COMMON
+
+# tabla -> (modelo, columnas, campo de fecha para la partición por año o None)
+TABLES = {
+    'equipment': (Equipment, EQUIPMENT_COLUMNS, None),
+    'incidents': (Incident, INCIDENT_COLUMNS, 'incident_date'),
+    'sedes': (Sede, SEDE_COLUMNS, None),
+    'dependencias': (Dependencia, DEPENDENCIA_COLUMNS, None),
+    'subdependencias': (Subdependencia, SUBDEPENDENCIA_COLUMNS, None),
+}
+ALL_TABLES = ('maintenances',) + tuple(TABLES)
+
+
+class AnalyticsExportUnavailable(RuntimeError):
+    pass
+
+
+def export_available() -> bool:
+    return pa is not None
+
+
+def export_dir() -> str:
+    return getattr(settings, 'ANALYTICS_EXPORT_DIR', None) or os.path.join(settings.BASE_DIR, 'analytics')
+
+
+def _arrow_type(name: str):
+    return {
+        'int64': pa.int64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'float64': pa.float64(),
+        'date': pa.date32(),
+        'time': pa.time64('us'),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+    }[name]
+
+
+def _schema(columns):
+    return pa.schema([(column, _arrow_type(kind)) for column, _, kind in columns])
+
+
+def _partition_value(value) -> str:
+    return NULL_PARTITION if value is None else str(value)
+
+
+def _buffer_bytes() -> int:
+    return int(getattr(settings, 'ANALYTICS_EXPORT_BUFFER_BYTES', 32 * 1024 * 1024))
+
+
+def _row_bytes(row: dict) -> int:
+    # Estimación: dict + un objeto por valor; los textos según su largo
+    return 232 + sum(49 + len(v) if isinstance(v, str) else 32 for v in row.values())
+
+
+class _PartitionedWriter:
+    """
+    Un `ParquetWriter` por partición, abierto al escribir su primer row group.
+    Las filas se acumulan por partición y se vuelcan al llegar a `row_group_size`;
+    si lo pendiente supera `max_bytes` se vuelca la partición con más datos.
+    """
+
+    def __init__(self, root: str, table: str, columns, run_id: str, row_group_size: int = ROW_GROUP_SIZE,
+                 max_bytes: Optional[int] = None):
+        self.base = os.path.join(root, table)
+        self.schema = _schema(columns)
+        self.names = [column for column, _, _ in columns]
+        self.run_id = run_id
+        self.row_group_size = row_group_size
+        self.max_bytes = max_bytes or _buffer_bytes()
+        self.pending: Dict[Tuple, List[dict]] = defaultdict(list)
+        self.pending_bytes: Dict[Tuple, int] = defaultdict(int)
+        self.buffered_bytes = 0
+        self.writers: Dict[Tuple, Any] = {}
+        self.rows = 0
+
+    def write(self, row: dict, partition: Tuple[Tuple[str, Any], ...] = ()) -> None:
+        rows = self.pending[partition]
+        rows.append(row)
+        size = _row_bytes(row)
+        self.pending_bytes[partition] += size
+        self.buffered_bytes += size
+        self.rows += 1
+        if len(rows) >= self.row_group_size:
+            self._flush(partition)
+        elif self.buffered_bytes >= self.max_bytes:
+            self._flush(max(self.pending_bytes, key=self.pending_bytes.get))
+
+    def _flush(self, partition) -> None:
+        rows = self.pending.pop(partition, None)
+        self.buffered_bytes -= self.pending_bytes.pop(partition, 0)
+        if not rows:
+            return
+        writer = self.writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.base, *(f'{k}={_partition_value(v)}' for k, v in partition))
+            os.makedirs(directory, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(directory, f'part-{self.run_id}.parquet'), self.schema)
+            self.writers[partition] = writer
+        data = {name: [row.get(name) for row in rows] for name in self.names}
+        writer.write_table(pa.Table.from_pydict(data, schema=self.schema))
+
+    def close(self) -> int:
+        try:
+            for key in list(self.pending):
+                self._flush(key)
+        finally:
+            for writer in self.writers.values():
+                writer.close()
+        return self.rows
+
+
+def _row(values: dict, columns) -> dict:
+    row = {}
+    for column, field, kind in columns:
+        value = values[field]
+        if value is not None and kind == 'float64':
+            value = float(value)
+        row[column] = value
+    return row
+
+
+def _iter_values(model, columns, since=None, chunk_size: int = CHUNK_SIZE, extra=()) -> Iterator[dict]:
+    qs = model.objects.all()
+    if since is not None:
+        qs = qs.filter(updated_at__gt=since)
+    fields = [field for _, field, _ in columns if field] + list(extra)
+    for chunk in keyset_chunks(qs.values(*fields), chunk_size):
+        yield from chunk
+
+
+def iter_activity_rows(maintenance_id: int, activities) -> Iterator[dict]:
+    """`Maintenance.activities` (dict nombre -> valor, o lista de dicts) en filas planas."""
+    if isinstance(activities, dict):
+        items = activities.items()
+    elif isinstance(activities, list):
+        items = []
+        for item in activities:
+            if isinstance(item, dict):
+                name = item.get('name') or item.get('activity') or item.get('task')
+                value = item.get('value', item.get('done'))
+                if name:
+                    items.append((name, value))
+    else:
+        return
+    for name, value in items:
+        si, na = parse_activity_value(value)
+        yield {
+            'maintenance_id': maintenance_id,
+            'activity': str(name),
+            'done': True if si == MARK else False if na == MARK else None,
+            'value': None if value is None else json.dumps(value, ensure_ascii=False, default=str),
+        }
+
+
+def _export_maintenances(root: str, run_id: str, since, chunk_size: int) -> Dict[str, int]:
+    maintenances = _PartitionedWriter(root, 'maintenances', MAINTENANCE_COLUMNS, run_id)
+    activities = _PartitionedWriter(root, 'maintenance_activities', ACTIVITY_COLUMNS, run_id)
+    try:
+        for values in _iter_values(Maintenance, MAINTENANCE_COLUMNS, since, chunk_size, extra=('activities',)):
+            year = values['scheduled_date'].year if values['scheduled_date'] else None
+            maintenances.write(_row(values, MAINTENANCE_COLUMNS), (('year', year), ('sede_id', values['sede_rel_id'])))
+            for activity in iter_activity_rows(values['id'], values['activities']):
+                activities.write(activity, (('year', year),))
+    finally:
+        counts = {'maintenances': maintenances.close(), 'maintenance_activities': activities.close()}
+    return counts
+
+
+def _export_table(root: str, table: str, run_id: str, since, chunk_size: int) -> int:
+    model, columns, date_field = TABLES[table]
+    writer = _PartitionedWriter(root, table, columns, run_id)
+    try:
+        for values in _iter_values(model, columns, since, chunk_size):
+            partition = ()
+            if date_field:
+                when = values[date_field]
+                partition = (('year', when.year if when else None),)
+            writer.write(_row(values, columns), partition)
+    finally:
+        count = writer.close()
+    return count
+
+
+def read_watermarks(root: Optional[str] = None) -> Dict[str, datetime]:
+    path = os.path.join(root or export_dir(), WATERMARK_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {table: parse_datetime(value) for table, value in raw.items() if parse_datetime(value or '')}
+
+
+def _write_watermarks(root: str, watermarks: Dict[str, datetime]) -> None:
+    path = os.path.join(root, WATERMARK_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({table: value.isoformat() for table, value in watermarks.items()}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def export_analytics(tables=None, incremental: bool = True, root: Optional[str] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Exporta `tables` (todas por defecto) a Parquet bajo `root`. Devuelve
+    {'run_id', 'root', 'rows': {tabla: filas}}.
+    """
+    if pa is None:
+        raise AnalyticsExportUnavailable('pyarrow no está instalado')
+
+    tables = list(tables or ALL_TABLES)
+    unknown = [t for t in tables if t not in ALL_TABLES]
+    if unknown:
+        raise ValueError(f"Tablas desconocidas: {', '.join(unknown)}")
+
+    root = root or export_dir()
+    os.makedirs(root, exist_ok=True)
+    watermarks = read_watermarks(root)
+    run_id = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    rows: Dict[str, int] = {}
+
+    for table in tables:
+        # La marca se toma antes de leer: lo modificado durante la corrida entra en la siguiente
+        started = timezone.now()
+        since = watermarks.get(table) if incremental else None
+        if table == 'maintenances':
+            rows.update(_export_maintenances(root, run_id, since, chunk_size))
+        else:
+            rows[table] = _export_table(root, table, run_id, since, chunk_size)
+        watermarks[table] = started
+        _write_watermarks(root, watermarks)
+
+    return {'run_id': run_id, 'root': root, 'rows': rows}
+
+
+_run_lock = threading.Lock()
+
+
+def export_status() -> Dict[str, Any]:
+    """Estado de la última exportación en segundo plano ({'state': 'idle'} si no hubo)."""
+    return cache.get(STATUS_CACHE_KEY) or {'state': 'idle'}
+
+
+def _set_status(**status) -> None:
+    cache.set(STATUS_CACHE_KEY, status, STATUS_TTL)
+
+
+def _run_background(tables, incremental: bool, started_at: str) -> None:
+    try:
+        result = export_analytics(tables=tables, incremental=incremental)
+        _set_status(state='done', started_at=started_at, finished_at=timezone.now().isoformat(), **result)
+    except Exception as e:
+        logger.exception('Error en la exportación analítica')
+        _set_status(state='failed', started_at=started_at, finished_at=timezone.now().isoformat(), error=str(e))
+    finally:
+        connection.close()
+        _run_lock.release()
+
+
+def start_background_export(tables=None, incremental: bool = True) -> bool:
+    """
+    Lanza `export_analytics` en un hilo. Devuelve False si ya hay una corrida en
+    este proceso. Valida tablas y dependencia antes de lanzar.
+    """
+    if pa is None:
+        raise AnalyticsExportUnavailable('pyarrow no está instalado')
+    unknown = [t for t in (tables or ()) if t not in ALL_TABLES]
+    if unknown:
+        raise ValueError(f"Tablas desconocidas: {', '.join(unknown)}")
+    if not _run_lock.acquire(blocking=False):
+        return False
+    started_at = timezone.now().isoformat()
+    _set_status(state='running', started_at=started_at, tables=list(tables or ALL_TABLES))
+    try:
+        threading.Thread(target=_run_background, args=(tables, incremental, started_at),
+                         name='analytics-export', daemon=True).start()
+    except Exception:
+        _run_lock.release()
+        raise
+    return True
@@ -0,0 +1,78 @@
+"""
+Utilidades compartidas para lecturas y escrituras masivas (importaciones,
+exportaciones, backfills).
+
+`bulk_create` no dispara `post_save`, así que la auditoría por fila de
+`api.signals` no se ejecuta; `bulk_audit` la reemplaza con una sola inserción.
+
+`keyset_chunks` recorre tablas grandes por bloques con paginación por clave:
+en MySQL `.iterator()` no transmite por streaming (mysqlclient carga el
+resultado completo del lado del cliente), así que las lecturas masivas usan
+consultas `WHERE id > último ORDER BY id LIMIT n`.
+"""
+from typing import Iterable, Iterator, List
+
+from django.db import connection
+
+from api.models import AuditLog
+
+
+def keyset_chunks(queryset, chunk_size: int, field: str = 'id') -> Iterator[List]:
+    """
+    Bloques de hasta `chunk_size` filas de `queryset` en orden de `field` (único).
+    Sirve para instancias, `values()` y `values_list()` (con `field` como primera columna).
+    """
+    queryset = queryset.order_by(field)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(**{f'{field}__gt': last})
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            # Bloque incompleto: no quedan filas, sin consulta extra
+            return
+        tail = chunk[-1]
+        if isinstance(tail, dict):
+            last = tail[field]
+        elif isinstance(tail, tuple):
+            last = tail[0]
+        else:
+            last = getattr(tail, field)
+
+
+def bulk_insert(model, objs: List) -> List:
+    """
+    Inserta `objs` asegurando que cada instancia quede con su PK asignada.
+
+    En backends sin RETURNING (p. ej. MySQL) `bulk_create` no devuelve PKs;
+    en ese caso se guarda fila a fila (llamar dentro de una transacción) y se
+    marca cada instancia (`_bulk_insert`) para que los signals la traten como
+    a un `bulk_create`: sin auditoría individual, snapshot ni actividades, que
+    el llamador resuelve en bloque igual en ambos backends.
+    """
+    if not objs:
+        return objs
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+    for obj in objs:
+        obj._skip_audit = True
+        obj._bulk_insert = True
+        obj.save(force_insert=True)
+    return objs
+
+
+def bulk_audit(objs: Iterable, model_name: str, action: str, user=None, changes: str = '') -> None:
+    """Registra una entrada de auditoría por objeto con un único `bulk_create`."""
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            model_name=model_name,
+            object_id=obj.id,
+            object_repr=str(obj)[:200],
+            action=action,
+            user=user,
+            changes=changes
+        )
+        for obj in objs
+    ])
@@ -0,0 +1,154 @@
+"""
+Entrega de archivos sin que los bytes pasen por el worker de la aplicación.
+
+En orden de preferencia:
+
+1. Storage S3/MinIO: redirección 302 a una URL prefirmada de corta duración
+   (`DELIVERY_URL_TTL` segundos, 300 por defecto). Se desactiva con
+   `DELIVERY_PRESIGNED_REDIRECTS = False`.
+2. Archivo local bajo un directorio publicado por nginx como `internal`:
+   respuesta vacía con `X-Accel-Redirect`. `DELIVERY_ACCEL_REDIRECT` mapea
+   directorios locales a prefijos internos, p. ej.
+   `{'/srv/app/backups': '/protected/backups/'}`.
+3. Si no aplica ninguna, se sirve el archivo desde Django con soporte de
+   `Range` (206 Partial Content), para que las descargas grandes se puedan
+   reanudar.
+"""
+import mimetypes
+import os
+import re
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+
+from .media_fetch import get_s3_client, is_s3_storage, storage_object_key
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _content_disposition(filename: Optional[str], as_attachment: bool) -> Optional[str]:
+    if not filename:
+        return 'attachment' if as_attachment else None
+    kind = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{kind}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=utf-8''{quote(filename)}"
+
+
+def _guess_type(name: str, content_type: Optional[str]) -> str:
+    return content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def presigned_url(storage, name: str, filename: Optional[str] = None, content_type: Optional[str] = None,
+                  as_attachment: bool = True, expires: Optional[int] = None) -> Optional[str]:
+    """URL GET prefirmada para `name` en un storage S3/MinIO (None en otros storages)."""
+    if not is_s3_storage(storage) or not getattr(settings, 'DELIVERY_PRESIGNED_REDIRECTS', True):
+        return None
+    params = {'Bucket': storage.bucket_name, 'Key': storage_object_key(storage, name)}
+    disposition = _content_disposition(filename, as_attachment)
+    if disposition:
+        params['ResponseContentDisposition'] = disposition
+    if content_type:
+        params['ResponseContentType'] = content_type
+    ttl = expires or int(getattr(settings, 'DELIVERY_URL_TTL', 300))
+    return get_s3_client(storage).generate_presigned_url('get_object', Params=params, ExpiresIn=ttl)
+
+
+def accel_redirect_path(path: str) -> Optional[str]:
+    """Ruta interna de nginx para un archivo local, según `DELIVERY_ACCEL_REDIRECT`."""
+    path = os.path.abspath(path)
+    for root, prefix in (getattr(settings, 'DELIVERY_ACCEL_REDIRECT', None) or {}).items():
+        root = os.path.abspath(root)
+        if path.startswith(root + os.sep):
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            return prefix.rstrip('/') + '/' + quote(relative)
+    return None
+
+
+def ranged_file_response(request, fileobj, size: int, content_type: str,
+                         filename: Optional[str] = None, as_attachment: bool = False) -> HttpResponse:
+    """
+    Respuesta de archivo con `Accept-Ranges`; un encabezado `Range: bytes=a-b`
+    (un solo rango) produce 206 con solo ese fragmento, o 416 si no es válido.
+    """
+    disposition = _content_disposition(filename, as_attachment)
+    range_header = (request.META.get('HTTP_RANGE') or '').strip()
+    match = _RANGE_RE.match(range_header) if range_header else None
+
+    if match is None or size <= 0:
+        response = FileResponse(fileobj, content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        first, last = match.groups()
+        if first == '' and last == '':
+            start, end = 0, size - 1
+        elif first == '':
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start > end or start >= size:
+            fileobj.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        def _stream(remaining=end - start + 1):
+            try:
+                fileobj.seek(start)
+                while remaining > 0:
+                    chunk = fileobj.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                fileobj.close()
+
+        response = StreamingHttpResponse(_stream(), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    if disposition:
+        response['Content-Disposition'] = disposition
+    return response
+
+
+def serve_local_file(request, path: str, content_type: Optional[str] = None,
+                     filename: Optional[str] = None, as_attachment: bool = True) -> HttpResponse:
+    """Archivo del disco local: `X-Accel-Redirect` si está configurado, si no respuesta con rangos."""
+    content_type = _guess_type(path, content_type)
+    filename = filename or os.path.basename(path)
+    internal = accel_redirect_path(path)
+    if internal:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = internal
+        response['Content-Disposition'] = _content_disposition(filename, as_attachment)
+        return response
+    return ranged_file_response(request, open(path, 'rb'), os.path.getsize(path), content_type,
+                                filename=filename, as_attachment=as_attachment)
+
+
+def serve_storage_file(request, storage, name: str, content_type: Optional[str] = None,
+                       filename: Optional[str] = None, as_attachment: bool = True) -> HttpResponse:
+    """Archivo existente en un storage de Django: URL prefirmada, X-Accel-Redirect o respuesta con rangos."""
+    content_type = _guess_type(name, content_type)
+    filename = filename or os.path.basename(name)
+    url = presigned_url(storage, name, filename=filename, content_type=content_type, as_attachment=as_attachment)
+    if url:
+        return HttpResponseRedirect(url)
+
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path and os.path.exists(path):
+        return serve_local_file(request, path, content_type=content_type, filename=filename, as_attachment=as_attachment)
+
+    return ranged_file_response(request, storage.open(name, 'rb'), storage.size(name), content_type,
+                                filename=filename, as_attachment=as_attachment)
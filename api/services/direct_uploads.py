@@ -0,0 +1,326 @@
+"""
+Cargas directas de fotos y firmas hacia MinIO (multipart S3 con URLs prefirmadas).
+
+Flujo:
+  1. `start_upload` crea la carga multipart y devuelve una URL prefirmada por parte.
+  2. El cliente sube cada parte con PUT directamente a MinIO (el servidor de la
+     API no recibe los bytes). Si la conexión se corta, `upload_status` indica
+     qué partes ya están en MinIO y devuelve URLs nuevas para las faltantes.
+  3. `complete_upload` cierra la carga con las ETags que lista MinIO, descarga el
+     objeto y aplica la ingesta de `media_ingest` (dedupe por hash; si no, la
+     versión orientada, sin EXIF/GPS y reducida reemplaza al original) y lo
+     registra como `Photo`/`Signature`/`SecondSignature`.
+
+Requiere que el storage del campo de imagen sea S3/MinIO (django-storages).
+
+S3 no acepta partes menores de 5 MiB (salvo la última), así que un archivo de
+hasta `DIRECT_UPLOAD_PART_SIZE` viaja en una sola parte y, si se corta, se
+reintenta completo: la reanudación por partes solo aplica a archivos mayores.
+Por eso las fotos admiten hasta `DIRECT_UPLOAD_PHOTO_MAX_SIZE` (25 MB por
+defecto, fotos sin reducir del teléfono) y las firmas `DIRECT_UPLOAD_MAX_SIZE`.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from api.models import Photo, SecondSignature, Signature, UploadSession
+
+from .media_fetch import get_s3_client, is_s3_storage, storage_object_key
+from .media_ingest import CONTENT_TYPES, _max_px, find_duplicate, ingest_enabled, normalize_image
+
+logger = logging.getLogger(__name__)
+
+# S3/MinIO exigen partes de al menos 5 MiB (salvo la última)
+MIN_PART_SIZE = 5 * 1024 * 1024
+ALLOWED_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+MAX_PHOTOS_PER_MAINTENANCE = 10
+
+KIND_FIELDS = {
+    'photo': (Photo, 'photo'),
+    'signature': (Signature, 'signature_image'),
+    'second_signature': (SecondSignature, 'signature_image'),
+}
+
+
+class DirectUploadError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _max_size(kind: str) -> int:
+    if kind == 'photo':
+        return int(getattr(settings, 'DIRECT_UPLOAD_PHOTO_MAX_SIZE', 25 * 1024 * 1024))
+    return int(getattr(settings, 'DIRECT_UPLOAD_MAX_SIZE', 5 * 1024 * 1024))
+
+
+def _part_size() -> int:
+    return max(MIN_PART_SIZE, int(getattr(settings, 'DIRECT_UPLOAD_PART_SIZE', MIN_PART_SIZE)))
+
+
+def _url_expiry() -> int:
+    return int(getattr(settings, 'DIRECT_UPLOAD_URL_EXPIRY', 3600))
+
+
+def _field_storage(kind: str):
+    model, field_name = KIND_FIELDS[kind]
+    field = model._meta.get_field(field_name)
+    storage = field.storage
+    if not is_s3_storage(storage):
+        raise DirectUploadError(
+            'Las cargas directas requieren almacenamiento S3/MinIO; use la carga multipart del API',
+            status_code=501,
+        )
+    return field, storage
+
+
+def _client(storage):
+    return get_s3_client(storage)
+
+
+def _storage_name(storage, key: str) -> str:
+    """Nombre relativo al storage (lo que se guarda en el FileField)."""
+    location = (getattr(storage, 'location', '') or '').strip('/')
+    if location and key.startswith(location + '/'):
+        return key[len(location) + 1:]
+    return key
+
+
+def _presign_parts(storage, session: UploadSession, part_numbers: List[int]) -> List[Dict[str, Any]]:
+    client = _client(storage)
+    return [
+        {
+            'part_number': n,
+            'url': client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': storage.bucket_name,
+                    'Key': session.object_key,
+                    'UploadId': session.upload_id,
+                    'PartNumber': n,
+                },
+                ExpiresIn=_url_expiry(),
+            ),
+        }
+        for n in part_numbers
+    ]
+
+
+def _uploaded_parts(storage, session: UploadSession) -> List[Dict[str, Any]]:
+    client = _client(storage)
+    parts, marker = [], 0
+    while True:
+        resp = client.list_parts(
+            Bucket=storage.bucket_name,
+            Key=session.object_key,
+            UploadId=session.upload_id,
+            PartNumberMarker=marker,
+        )
+        parts.extend(resp.get('Parts', []))
+        if not resp.get('IsTruncated'):
+            return parts
+        marker = resp.get('NextPartNumberMarker', 0)
+
+
+def _ingest_object(storage, session: UploadSession) -> Tuple[str, str]:
+    """
+    Ingesta del objeto recién completado, como `media_ingest.ingest_instance`
+    para las cargas por la API. Devuelve (nombre en storage, content_hash); si
+    MinIO falla se conserva el original.
+    """
+    model, field_name = KIND_FIELDS[session.kind]
+    name = _storage_name(storage, session.object_key)
+    if not ingest_enabled():
+        return name, ''
+    client = _client(storage)
+    bucket = storage.bucket_name
+    try:
+        data = client.get_object(Bucket=bucket, Key=session.object_key)['Body'].read()
+        digest = hashlib.sha256(data).hexdigest()
+        existing = find_duplicate(model, field_name, digest, storage)
+        if existing and existing != name:
+            client.delete_object(Bucket=bucket, Key=session.object_key)
+            return existing, digest
+        normalized = normalize_image(data, _max_px(model.__name__))
+        if normalized is None:
+            return name, digest
+        content, ext = normalized
+        key = os.path.splitext(session.object_key)[0] + ext
+        client.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=content,
+            ContentType=CONTENT_TYPES[ext],
+            **({'ACL': storage.default_acl} if getattr(storage, 'default_acl', None) else {}),
+        )
+        if key != session.object_key:
+            client.delete_object(Bucket=bucket, Key=session.object_key)
+        return _storage_name(storage, key), digest
+    except (BotoCoreError, ClientError) as e:
+        logger.warning('No se pudo normalizar la carga directa %s: %s', session.object_key, e)
+        return name, ''
+
+
+def _session_payload(session: UploadSession, parts=None, uploaded=None) -> Dict[str, Any]:
+    payload = {
+        'id': session.id,
+        'maintenance': session.maintenance_id,
+        'kind': session.kind,
+        'status': session.status,
+        'filename': session.filename,
+        'size': session.size,
+        'part_size': session.part_size,
+        'part_count': session.part_count,
+        'expires_in': _url_expiry(),
+    }
+    if uploaded is not None:
+        payload['uploaded_parts'] = uploaded
+    if parts is not None:
+        payload['parts'] = parts
+    return payload
+
+
+def start_upload(maintenance, data: Dict[str, Any], user=None) -> Dict[str, Any]:
+    """Valida la solicitud, crea la carga multipart y devuelve las URLs de cada parte."""
+    kind = data.get('kind') or 'photo'
+    if kind not in KIND_FIELDS:
+        raise DirectUploadError(f"kind inválido: {kind}")
+    filename = get_valid_filename(os.path.basename(str(data.get('filename') or ''))) or 'upload'
+    content_type = data.get('content_type') or ''
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise DirectUploadError('Solo se permiten imágenes (JPEG, PNG, GIF, WebP)')
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        raise DirectUploadError('size es requerido (bytes)')
+    max_size = _max_size(kind)
+    if size <= 0 or size > max_size:
+        raise DirectUploadError(f'El archivo debe tener entre 1 byte y {max_size} bytes')
+
+    if kind == 'photo':
+        pending = maintenance.upload_sessions.filter(kind='photo', status='pending').count()
+        if maintenance.photos.count() + pending >= MAX_PHOTOS_PER_MAINTENANCE:
+            raise DirectUploadError(f'Máximo {MAX_PHOTOS_PER_MAINTENANCE} fotos por mantenimiento.')
+
+    field, storage = _field_storage(kind)
+    name = field.generate_filename(None, f'{uuid.uuid4().hex}_{filename}')
+    key = storage_object_key(storage, name)
+    try:
+        resp = _client(storage).create_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=key,
+            ContentType=content_type,
+            **({'ACL': storage.default_acl} if getattr(storage, 'default_acl', None) else {}),
+        )
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError(f'No se pudo iniciar la carga: {e}', status_code=502)
+
+    session = UploadSession.objects.create(
+        maintenance=maintenance,
+        kind=kind,
+        upload_id=resp['UploadId'],
+        object_key=key,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        part_size=_part_size(),
+        created_by=user if getattr(user, 'is_authenticated', False) else None,
+    )
+    parts = _presign_parts(storage, session, list(range(1, session.part_count + 1)))
+    return _session_payload(session, parts=parts, uploaded=[])
+
+
+def upload_status(session: UploadSession) -> Dict[str, Any]:
+    """Partes ya recibidas por MinIO y URLs nuevas para las que faltan (reanudación)."""
+    if session.status != 'pending':
+        return _session_payload(session)
+    _, storage = _field_storage(session.kind)
+    try:
+        uploaded = [p['PartNumber'] for p in _uploaded_parts(storage, session)]
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError(f'No se pudo consultar la carga: {e}', status_code=502)
+    received = set(uploaded)
+    missing = [n for n in range(1, session.part_count + 1) if n not in received]
+    return _session_payload(session, parts=_presign_parts(storage, session, missing), uploaded=uploaded)
+
+
+def complete_upload(session: UploadSession, user=None):
+    """Cierra la carga multipart y registra el objeto en el modelo correspondiente."""
+    if session.status != 'pending':
+        raise DirectUploadError('La carga ya fue cerrada', status_code=409)
+    _, storage = _field_storage(session.kind)
+    client = _client(storage)
+    try:
+        parts = _uploaded_parts(storage, session)
+        numbers = {p['PartNumber'] for p in parts}
+        missing = [n for n in range(1, session.part_count + 1) if n not in numbers]
+        if missing:
+            raise DirectUploadError(f'Faltan partes por subir: {missing}', status_code=409)
+        client.complete_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=session.object_key,
+            UploadId=session.upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': p['PartNumber'], 'ETag': p['ETag']}
+                for p in sorted(parts, key=lambda p: p['PartNumber'])
+            ]},
+        )
+        head = client.head_object(Bucket=storage.bucket_name, Key=session.object_key)
+    except (BotoCoreError, ClientError) as e:
+        raise DirectUploadError(f'No se pudo completar la carga: {e}', status_code=502)
+
+    if head.get('ContentLength') != session.size:
+        client.delete_object(Bucket=storage.bucket_name, Key=session.object_key)
+        session.status = 'aborted'
+        session.save(update_fields=['status'])
+        raise DirectUploadError('El tamaño recibido no coincide con el declarado')
+
+    maintenance = session.maintenance
+    # El FileField recibe un nombre ya guardado: el signal pre_save no lo procesa
+    name, content_hash = _ingest_object(storage, session)
+    if session.kind == 'photo':
+        obj = Photo(maintenance=maintenance, photo=name, uploaded_by=session.created_by or user)
+    elif session.kind == 'signature':
+        signer_name = 'Técnico'
+        if maintenance.technician:
+            signer_name = maintenance.technician.get_full_name() or maintenance.technician.username
+        obj = Signature(maintenance=maintenance, signature_image=name, signer_name=signer_name, signer_role='Técnico')
+    else:
+        obj = SecondSignature(maintenance=maintenance, signature_image=name, signer_name='Usuario', signer_role='Usuario del equipo')
+    obj.content_hash = content_hash
+    obj.save()
+
+    session.status = 'completed'
+    session.completed_at = timezone.now()
+    session.save(update_fields=['status', 'completed_at'])
+    return obj
+
+
+def abort_upload(session: UploadSession) -> None:
+    if session.status != 'pending':
+        return
+    _, storage = _field_storage(session.kind)
+    try:
+        _client(storage).abort_multipart_upload(
+            Bucket=storage.bucket_name,
+            Key=session.object_key,
+            UploadId=session.upload_id,
+        )
+    except ClientError as e:
+        # La carga puede haber expirado en MinIO; igual se marca como cancelada
+        if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+            raise DirectUploadError(f'No se pudo cancelar la carga: {e}', status_code=502)
+    session.status = 'aborted'
+    session.save(update_fields=['status'])
+
+
+def get_session(maintenance, session_id) -> Optional[UploadSession]:
+    return maintenance.upload_sessions.filter(id=session_id).first()
@@ -0,0 +1,371 @@
+"""
+Importación/exportación masiva del inventario de equipos.
+
+La importación lee CSV o XLSX de forma incremental (openpyxl en modo
+`read_only`), procesa las filas en bloques y hace upsert por `code` /
+`serial_number` con `bulk_create` + `bulk_update`: dos consultas de búsqueda y
+dos escrituras por bloque en lugar de varias consultas por equipo. Sede,
+dependencia y subdependencia se resuelven por nombre (o código) contra un
+índice en memoria construido una sola vez.
+
+La exportación genera CSV fila a fila o un XLSX con un workbook `write_only`,
+leyendo por bloques con paginación por clave (`keyset_chunks`), de modo que la
+memoria no crece con el tamaño del inventario.
+"""
+import csv
+import io
+import tempfile
+import unicodedata
+import zipfile
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from api.models import Dependencia, Equipment, Sede, Subdependencia
+
+from .bulk import bulk_audit, bulk_insert, keyset_chunks
+from .maintenance_snapshot import invalidate_snapshots
+
+CHUNK_SIZE = 500
+
+# Columnas exportadas (y reconocidas al importar), en orden
+EXPORT_COLUMNS = [
+    'code', 'serial_number', 'name', 'brand', 'model', 'location',
+    'sede', 'dependencia', 'subdependencia',
+    'purchase_date', 'warranty_expiry', 'notes',
+]
+
+# Campos de Equipment que una fila puede actualizar
+UPDATE_FIELDS = [
+    'code', 'serial_number', 'name', 'brand', 'model', 'location',
+    'sede_rel', 'dependencia_rel', 'subdependencia',
+    'purchase_date', 'warranty_expiry', 'notes',
+]
+
+# Errores de lectura de un archivo corrupto o con otra codificación/formato
+# (openpyxl lanza KeyError si al ZIP le faltan partes del XLSX)
+PARSE_ERRORS = (csv.Error, UnicodeDecodeError, ValueError, KeyError, zipfile.BadZipFile, InvalidFileException)
+
+# Encabezados alternativos usados en el registro de activos municipal
+HEADER_ALIASES = {
+    'codigo': 'code', 'placa': 'code', 'codigo_equipo': 'code',
+    'serial': 'serial_number', 'serie': 'serial_number', 'numero_serie': 'serial_number',
+    'nombre': 'name', 'equipo': 'name', 'tipo': 'name',
+    'marca': 'brand',
+    'modelo': 'model',
+    'ubicacion': 'location',
+    'oficina': 'location',
+    'fecha_compra': 'purchase_date',
+    'garantia': 'warranty_expiry', 'fin_garantia': 'warranty_expiry',
+    'notas': 'notes', 'observaciones': 'notes',
+}
+
+
+def normalize_name(value: Any) -> str:
+    """Minúsculas, sin tildes ni espacios repetidos: clave de búsqueda por nombre."""
+    text = unicodedata.normalize('NFKD', str(value or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _normalize_header(value: Any) -> str:
+    key = normalize_name(value).replace(' ', '_').replace('-', '_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Fecha inválida: {value}')
+
+
+def iter_csv_rows(fileobj) -> Iterator[Dict[str, Any]]:
+    """Recorre un CSV (UTF-8, `,` o `;`) devolviendo dicts con claves normalizadas."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    headers = [_normalize_header(h) for h in next(reader, [])]
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        yield {h: _clean(v) for h, v in zip(headers, values) if h}
+
+
+def iter_xlsx_rows(fileobj) -> Iterator[Dict[str, Any]]:
+    """Recorre la primera hoja de un XLSX en modo de solo lectura (sin cargarlo completo)."""
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for values in rows:
+            if not any(v not in (None, '') for v in values):
+                continue
+            yield {h: _clean(v) for h, v in zip(headers, values) if h}
+    finally:
+        wb.close()
+
+
+def iter_inventory_rows(upload) -> Iterator[Dict[str, Any]]:
+    name = (getattr(upload, 'name', '') or '').lower()
+    if name.endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_rows(upload)
+    return iter_csv_rows(upload)
+
+
+class LocationIndex:
+    """Índice en memoria de sedes/dependencias/subdependencias por nombre y código."""
+
+    def __init__(self):
+        self.sedes: Dict[str, int] = {}
+        self.dependencias: Dict[Tuple[Optional[int], str], int] = {}
+        self.subdependencias: Dict[Tuple[Optional[int], str], int] = {}
+        for pk, nombre, codigo in Sede.objects.values_list('id', 'nombre', 'codigo'):
+            self.sedes[normalize_name(nombre)] = pk
+            if codigo:
+                self.sedes.setdefault(normalize_name(codigo), pk)
+        for pk, nombre, codigo, sede_id in Dependencia.objects.values_list('id', 'nombre', 'codigo', 'sede_id'):
+            for key in filter(None, (normalize_name(nombre), normalize_name(codigo))):
+                self.dependencias.setdefault((sede_id, key), pk)
+                # Búsqueda sin sede: solo si el nombre no es ambiguo
+                if (None, key) in self.dependencias and self.dependencias[(None, key)] != pk:
+                    self.dependencias[(None, key)] = 0
+                else:
+                    self.dependencias[(None, key)] = pk
+        for pk, nombre, dependencia_id in Subdependencia.objects.values_list('id', 'nombre', 'dependencia_id'):
+            key = normalize_name(nombre)
+            self.subdependencias[(dependencia_id, key)] = pk
+            if (None, key) in self.subdependencias and self.subdependencias[(None, key)] != pk:
+                self.subdependencias[(None, key)] = 0
+            else:
+                self.subdependencias[(None, key)] = pk
+
+    def resolve(self, sede=None, dependencia=None, subdependencia=None):
+        """Devuelve `(sede_id, dependencia_id, subdependencia_id, avisos)`."""
+        warnings = []
+        sede_id = dep_id = sub_id = None
+        if sede:
+            sede_id = self.sedes.get(normalize_name(sede))
+            if not sede_id:
+                warnings.append(f'Sede no encontrada: {sede}')
+        if dependencia:
+            dep_id = self.dependencias.get((sede_id, normalize_name(dependencia))) or None
+            if not dep_id:
+                warnings.append(f'Dependencia no encontrada o ambigua: {dependencia}')
+        if subdependencia:
+            sub_id = self.subdependencias.get((dep_id, normalize_name(subdependencia))) or None
+            if not sub_id:
+                warnings.append(f'Subdependencia no encontrada o ambigua: {subdependencia}')
+        return sede_id, dep_id, sub_id, warnings
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _field_values(row: Dict[str, Any], index: LocationIndex):
+    """Traduce una fila a valores de campos de Equipment (solo columnas presentes)."""
+    values = {}
+    for field in ('code', 'serial_number', 'name', 'brand', 'model', 'location', 'notes'):
+        if field in row:
+            value = row[field]
+            if value is None:
+                # Campos de texto NOT NULL (name, notes) se guardan vacíos
+                value = None if Equipment._meta.get_field(field).null else ''
+            values[field] = str(value) if value is not None and not isinstance(value, str) else value
+    for field in ('purchase_date', 'warranty_expiry'):
+        if field in row:
+            values[field] = _parse_date(row[field])
+    warnings = []
+    if any(row.get(k) for k in ('sede', 'dependencia', 'subdependencia')):
+        sede_id, dep_id, sub_id, warnings = index.resolve(row.get('sede'), row.get('dependencia'), row.get('subdependencia'))
+        if row.get('sede'):
+            values['sede_rel_id'] = sede_id
+        if row.get('dependencia'):
+            values['dependencia_rel_id'] = dep_id
+        if row.get('subdependencia'):
+            values['subdependencia_id'] = sub_id
+    return values, warnings
+
+
+def _upsert_chunk(chunk, index: LocationIndex, summary: Dict[str, Any], user=None, dry_run=False) -> None:
+    codes = {str(r['code']) for _, r in chunk if r.get('code')}
+    serials = {str(r['serial_number']) for _, r in chunk if r.get('serial_number')}
+    existing = Equipment.objects.filter(Q(code__in=codes) | Q(serial_number__in=serials)) if (codes or serials) else []
+    by_code, by_serial = {}, {}
+    for eq in existing:
+        if eq.code:
+            by_code[eq.code] = eq
+        if eq.serial_number:
+            by_serial[eq.serial_number] = eq
+
+    to_create: List[Equipment] = []
+    to_update: Dict[int, Equipment] = {}
+    for line, row in chunk:
+        try:
+            values, warnings = _field_values(row, index)
+        except ValueError as e:
+            summary['errors'].append({'row': line, 'errors': [str(e)]})
+            continue
+        code, serial = values.get('code'), values.get('serial_number')
+        if not code and not serial:
+            summary['errors'].append({'row': line, 'errors': ['Se requiere code o serial_number']})
+            continue
+        match_code = by_code.get(code) if code else None
+        match_serial = by_serial.get(serial) if serial else None
+        if match_code and match_serial and match_code is not match_serial:
+            summary['errors'].append({'row': line, 'errors': [f'code {code} y serial {serial} pertenecen a equipos distintos']})
+            continue
+        equipment = match_code or match_serial
+        if equipment is None:
+            if not values.get('name'):
+                summary['errors'].append({'row': line, 'errors': ['name es obligatorio para equipos nuevos']})
+                continue
+            equipment = Equipment(**values)
+            to_create.append(equipment)
+        else:
+            for field, value in values.items():
+                # Una celda vacía de code/serial no borra el identificador del equipo encontrado
+                if value is None and field in ('code', 'serial_number'):
+                    continue
+                setattr(equipment, field, value)
+            if equipment.pk:
+                to_update[equipment.pk] = equipment
+        # Filas posteriores del mismo bloque con el mismo code/serial actualizan este objeto
+        if equipment.code:
+            by_code[equipment.code] = equipment
+        if equipment.serial_number:
+            by_serial[equipment.serial_number] = equipment
+        for warning in warnings:
+            summary['warnings'].append({'row': line, 'warning': warning})
+
+    if dry_run:
+        summary['created'] += len(to_create)
+        summary['updated'] += len(to_update)
+        return
+
+    updated = list(to_update.values())
+    now = timezone.now()
+    for eq in updated:
+        eq.updated_at = now
+    with transaction.atomic():
+        bulk_insert(Equipment, to_create)
+        if updated:
+            Equipment.objects.bulk_update(updated, UPDATE_FIELDS + ['updated_at'])
+            # bulk_update no dispara post_save: los snapshots copian datos del equipo
+            invalidate_snapshots(equipment_id__in=[eq.pk for eq in updated])
+        bulk_audit(to_create, 'equipment', 'create', user=user, changes='bulk_import')
+        bulk_audit(updated, 'equipment', 'update', user=user, changes='bulk_import')
+    summary['created'] += len(to_create)
+    summary['updated'] += len(updated)
+
+
+def import_equipment_inventory(rows: Iterable[Dict[str, Any]], user=None, chunk_size: int = CHUNK_SIZE,
+                               dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Upsert del inventario. `rows` puede ser cualquier iterable (se consume en bloques).
+    Las filas se numeran como en la hoja de cálculo (la 1 es el encabezado).
+    """
+    user = user if getattr(user, 'is_authenticated', False) else None
+    index = LocationIndex()
+    summary = {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'dry_run': dry_run, 'errors': [], 'warnings': []}
+    numbered = ((line, row) for line, row in enumerate(rows, start=2))
+    for chunk in _chunks(numbered, chunk_size):
+        summary['total'] += len(chunk)
+        errors_before = len(summary['errors'])
+        try:
+            _upsert_chunk(chunk, index, summary, user=user, dry_run=dry_run)
+        except DatabaseError as e:
+            del summary['errors'][errors_before:]
+            summary['errors'].append({'row': f'{chunk[0][0]}-{chunk[-1][0]}', 'errors': [str(e)]})
+            summary['failed'] += len(chunk)
+            continue
+        summary['failed'] += len(summary['errors']) - errors_before
+    return summary
+
+
+def export_queryset(queryset=None):
+    """Queryset de exportación con las relaciones de ubicación en el mismo SELECT."""
+    queryset = Equipment.objects.all() if queryset is None else queryset
+    return queryset.select_related('sede_rel', 'dependencia_rel', 'subdependencia').order_by('id')
+
+
+def _export_row(eq: Equipment) -> List[Any]:
+    return [
+        eq.code or '',
+        eq.serial_number or '',
+        eq.name or '',
+        eq.brand or '',
+        eq.model or '',
+        eq.location or '',
+        eq.sede_rel.nombre if eq.sede_rel else '',
+        eq.dependencia_rel.nombre if eq.dependencia_rel else '',
+        eq.subdependencia.nombre if eq.subdependencia else '',
+        eq.purchase_date.isoformat() if eq.purchase_date else '',
+        eq.warranty_expiry.isoformat() if eq.warranty_expiry else '',
+        eq.notes or '',
+    ]
+
+
+class _Echo:
+    """Objeto tipo archivo para csv.writer que devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def iter_equipment_csv(queryset=None, chunk_size: int = 1000) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(EXPORT_COLUMNS)
+    for chunk in keyset_chunks(export_queryset(queryset), chunk_size):
+        for eq in chunk:
+            yield writer.writerow(_export_row(eq))
+
+
+def write_equipment_xlsx(queryset=None, chunk_size: int = 1000):
+    """
+    Escribe el inventario en un workbook `write_only` volcado a un archivo temporal.
+    Devuelve el archivo temporal posicionado al inicio (listo para FileResponse).
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Equipos')
+    ws.append(EXPORT_COLUMNS)
+    for chunk in keyset_chunks(export_queryset(queryset), chunk_size):
+        for eq in chunk:
+            ws.append(_export_row(eq))
+    tmp = tempfile.TemporaryFile(suffix='.xlsx')
+    wb.save(tmp)
+    tmp.seek(0)
+    return tmp
@@ -15,6 +15,9 @@ from openpyxl.drawing.image import Image as XLImage
 from django.conf import settings
 from django.core.files.storage import default_storage
 
+from .activity_matcher import ActivityMatcher
+from .media_fetch import prefetch_media, read_field_bytes
+
 
 class ExcelReportGenerator:
     """
@@ -131,16 +134,20 @@ class ExcelReportGenerator:
         if not os.path.exists(self.TEMPLATE_PATH):
             raise FileNotFoundError(f"Plantilla no encontrada: {self.TEMPLATE_PATH}")
 
-    def generate_report(self, maintenance) -> bytes:
+    def generate_report(self, maintenance, media=None) -> bytes:
         """
         Genera el reporte Excel para un mantenimiento específico.
         
         Args:
             maintenance: Objeto Maintenance con los datos a rellenar
+            media: dict opcional {nombre_archivo: bytes} de `prefetch_media`;
+                si no se entrega, las imágenes del mantenimiento se descargan en paralelo
             
         Returns:
             bytes: Contenido del archivo Excel generado
         """
+        self._media = media if media is not None else prefetch_media([maintenance])
+
         # Cargar plantilla original (preservar formato)
         wb = openpyxl.load_workbook(self.TEMPLATE_PATH)
         ws = wb.active
@@ -208,117 +215,67 @@ class ExcelReportGenerator:
         hora_final = maintenance.hora_final.strftime('%H:%M') if maintenance.hora_final else '____'
         ws['H8'] = f"Hora Inicio       {hora_inicio}       Hora Final        {hora_final}      "
 
-    def _get_activity_value(self, activities: dict, activity_name: str) -> tuple:
-        """
-        Busca el valor de una actividad en el diccionario de actividades.
-        
-        Returns:
-            tuple: (si_value, na_value) donde cada uno es '■' o ''
-        """
-        if not activities:
-            return ('', '')
-
-        # Normalizar nombre de actividad
-        activity_lower = activity_name.lower().strip()
-        
-        # Buscar por nombre exacto
-        for key, value in activities.items():
-            key_lower = key.lower().strip()
-            if key_lower == activity_lower:
-                return self._parse_activity_value(value)
-        
-        # Buscar por alias
-        aliases = self.ACTIVITY_ALIASES.get(activity_lower, [])
-        for alias in aliases:
-            alias_lower = alias.lower()
-            for key, value in activities.items():
-                key_lower = key.lower().strip()
-                if key_lower == alias_lower or alias_lower in key_lower:
-                    return self._parse_activity_value(value)
-
-        # Buscar por coincidencia parcial
-        for key, value in activities.items():
-            key_lower = key.lower().strip()
-            # Si la actividad contiene palabras clave del nombre
-            words = activity_lower.split()
-            if len(words) >= 2:
-                if all(w in key_lower for w in words[:2]):
-                    return self._parse_activity_value(value)
-        
-        # Buscar en mapeo genérico (p.ej. 'limpieza' aplica a varias actividades)
-        for generic_key, target_activities in self.GENERIC_ACTIVITIES_MAP.items():
-            # Si activity_name está en la lista de actividades afectadas por la clave genérica
-            for target in target_activities:
-                if target.lower() == activity_lower or activity_lower in target.lower():
-                    # Buscar el valor de la clave genérica en activities
-                    for key, value in activities.items():
-                        if key.lower() == generic_key.lower():
-                            return self._parse_activity_value(value)
-
-        return ('', '')
-
-    def _parse_activity_value(self, value) -> tuple:
-        """
-        Parsea el valor de una actividad y devuelve (si, na).
-        
-        El valor puede ser:
-        - True/False/'si'/'no' -> (■, '') o ('', ■)
-        - 'na'/'n.a' -> ('', ■)
-        - dict con 'si' y 'na' -> correspondiente
-        """
-        if value is None:
-            return ('', '')
-        
-        if isinstance(value, bool):
-            return ('■', '') if value else ('', '■')
-        
-        if isinstance(value, str):
-            val_lower = value.lower().strip()
-            if val_lower in ('si', 'sí', 'yes', 'true', '1', 'x', '■'):
-                return ('■', '')
-            elif val_lower in ('no', 'false', '0'):
-                return ('', '■')
-            elif val_lower in ('na', 'n.a', 'n/a', 'n.a.'):
-                return ('', '■')
-        
-        if isinstance(value, dict):
-            si = '■' if value.get('si') or value.get('SI') else ''
-            na = '■' if value.get('na') or value.get('NA') or value.get('n.a') else ''
-            return (si, na)
-        
-        return ('', '')
+    @classmethod
+    def activity_matcher(cls) -> ActivityMatcher:
+        """Matcher de actividades compilado una vez por clase."""
+        matcher = cls.__dict__.get('_activity_matcher')
+        if matcher is None:
+            names = [
+                name
+                for rows in (cls.HARDWARE_ACTIVITIES, cls.SOFTWARE_ACTIVITIES)
+                for info in rows.values()
+                for name in (info['left'], info.get('right'))
+                if name
+            ]
+            matcher = ActivityMatcher(
+                names,
+                cls.ACTIVITY_ALIASES,
+                cls.GENERIC_ACTIVITIES_MAP,
+                alias_substring=True,
+                partial='two_words',
+            )
+            cls._activity_matcher = matcher
+        return matcher
+
+    def _activity_values(self, maintenance) -> dict:
+        """(si, na) de todas las actividades, calculado una vez por reporte."""
+        cached = getattr(self, '_activity_cache', None)
+        if cached is None or cached[0] is not maintenance:
+            cached = (maintenance, self.activity_matcher().match(maintenance.activities))
+            self._activity_cache = cached
+        return cached[1]
 
     def _fill_hardware_activities(self, ws, maintenance):
         """Rellena las actividades de hardware (filas 11-14)."""
-        activities = maintenance.activities or {}
+        values = self._activity_values(maintenance)
         
         for row, act_info in self.HARDWARE_ACTIVITIES.items():
             # Actividad izquierda (columnas D=SI, E=N.A)
             if act_info['left']:
-                si_val, na_val = self._get_activity_value(activities, act_info['left'])
+                si_val, na_val = values[act_info['left']]
                 ws.cell(row=row, column=4).value = si_val  # D
                 ws.cell(row=row, column=5).value = na_val  # E
             
             # Actividad derecha (columnas I=SI, J=N.A)
             if act_info['right']:
-                si_val, na_val = self._get_activity_value(activities, act_info['right'])
+                si_val, na_val = values[act_info['right']]
                 ws.cell(row=row, column=9).value = si_val   # I
                 ws.cell(row=row, column=10).value = na_val  # J
 
     def _fill_software_activities(self, ws, maintenance):
         """Rellena las actividades de software (filas 18-30)."""
-        activities = maintenance.activities or {}
+        values = self._activity_values(maintenance)
         
         for row, act_info in self.SOFTWARE_ACTIVITIES.items():
             # Actividad izquierda (columnas D=SI, E=N.A/NO)
             if act_info['left']:
-                si_val, na_val = self._get_activity_value(activities, act_info['left'])
+                si_val, na_val = values[act_info['left']]
                 ws.cell(row=row, column=4).value = si_val  # D
                 ws.cell(row=row, column=5).value = na_val  # E
             
             # Actividad derecha (columnas I=SI, J=N.A/NO)
             if act_info.get('right'):
-                si_val, na_val = self._get_activity_value(activities, act_info['right'])
+                si_val, na_val = values[act_info['right']]
                 ws.cell(row=row, column=9).value = si_val   # I
                 ws.cell(row=row, column=10).value = na_val  # J
 
@@ -410,22 +367,12 @@ class ExcelReportGenerator:
             max_width: ancho máximo en pixels
             max_height: alto máximo en pixels
         """
-        # Leer imagen desde storage
+        # Leer imagen: bytes precargados en paralelo o, si faltan, desde el storage
         try:
-            # Si es URL de storage, intentar abrir
-            if hasattr(image_field, 'path'):
-                # Local file
-                img_path = image_field.path
-                if os.path.exists(img_path):
-                    pil_img = Image.open(img_path)
-                else:
-                    # Intentar leer desde storage
-                    img_bytes = image_field.read()
-                    pil_img = Image.open(BytesIO(img_bytes))
-            else:
-                # Desde storage
-                img_bytes = image_field.read()
-                pil_img = Image.open(BytesIO(img_bytes))
+            img_bytes = self._media.get(image_field.name) if getattr(self, '_media', None) else None
+            if img_bytes is None:
+                img_bytes = read_field_bytes(image_field)
+            pil_img = Image.open(BytesIO(img_bytes))
             
             # Redimensionar manteniendo aspect ratio
             pil_img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
@@ -475,15 +422,16 @@ class ExcelReportGenerator:
             ws['A52'] = maintenance.incident_notes
 
 
-def generate_excel_report(maintenance) -> bytes:
+def generate_excel_report(maintenance, media=None) -> bytes:
     """
     Función de conveniencia para generar un reporte Excel.
     
     Args:
         maintenance: Objeto Maintenance
+        media: dict opcional {nombre_archivo: bytes} de `prefetch_media`
         
     Returns:
         bytes: Contenido del archivo Excel
     """
     generator = ExcelReportGenerator()
-    return generator.generate_report(maintenance)
+    return generator.generate_report(maintenance, media=media)
@@ -0,0 +1,168 @@
+"""
+Resolución de `fields_schema` (variable de plantilla -> dato) para los
+generadores basados en `Template`.
+
+La coincidencia heurística entre variables de la plantilla y claves de los
+datos (normalizar, comparar, buscar subcadenas) depende solo de la versión de
+la plantilla y de las claves de primer nivel de los datos, no de sus valores.
+`compile_mapping` la resuelve una vez por par (plantilla, firma de los datos) y
+la guarda en memoria (LRU por proceso) y en el caché de Django (compartido
+entre procesos), así cada render se reduce a `apply_mapping`: búsquedas en dict.
+
+El mapeo no se escribe en `fields_schema`: sus claves son las variables de la
+plantilla y lo edita el usuario. Como la clave incluye `updated_at`, guardar la
+plantilla produce una clave nueva.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .template_cache import template_cache_key
+
+CACHE_PREFIX = 'field-mapping'
+
+# {variable: (map_to, clave de respaldo)}
+CompiledMapping = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+_lock = threading.Lock()
+_entries: 'OrderedDict[Tuple, CompiledMapping]' = OrderedDict()
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, 'FIELD_MAPPING_CACHE_SIZE', 256))
+
+
+def _cache_timeout() -> int:
+    return int(getattr(settings, 'FIELD_MAPPING_CACHE_TIMEOUT', 24 * 60 * 60))
+
+
+def normalize_field_key(value: Any) -> str:
+    """'Serial Number' -> 'serialnumber' (minúsculas, solo alfanuméricos)."""
+    try:
+        return ''.join(c for c in str(value).lower() if c.isalnum())
+    except Exception:
+        return str(value).lower()
+
+
+def data_signature(data: Any) -> str:
+    """Firma de la forma de los datos: claves de primer nivel, en orden."""
+    keys = list(data.keys()) if isinstance(data, dict) else [type(data).__name__]
+    return hashlib.sha1('\x1f'.join(map(str, keys)).encode('utf-8')).hexdigest()
+
+
+def match_key(tpl_key: str, keys: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """
+    Clave de los datos que corresponde a `tpl_key`, o None.
+
+    `keys` son pares (clave, clave normalizada) en el orden de los datos:
+    primero igualdad normalizada, luego una contenida en la otra.
+    """
+    keys = list(keys)
+    tpl_norm = normalize_field_key(tpl_key)
+    for key, norm in keys:
+        if norm == tpl_norm:
+            return key
+    for key, norm in keys:
+        if tpl_norm in norm or norm in tpl_norm:
+            return key
+    return None
+
+
+def field_map_to(tpl_key: str, meta: Any, use_source: bool = False) -> Optional[str]:
+    """Ruta explícita de una entrada de `fields_schema` (None: solo heurística)."""
+    if isinstance(meta, dict):
+        if use_source:
+            return meta.get('map_to') or meta.get('source') or tpl_key
+        return meta.get('map_to')
+    return meta or tpl_key
+
+
+def compile_mapping(fields_schema: Dict[str, Any], data: Any, use_source: bool = False) -> CompiledMapping:
+    """Resuelve todas las variables de `fields_schema` contra la forma de `data`."""
+    keys = [(k, normalize_field_key(k)) for k in data] if isinstance(data, dict) else []
+    compiled: CompiledMapping = {}
+    for tpl_key, meta in fields_schema.items():
+        fallback = match_key(tpl_key, keys) if isinstance(data, dict) else None
+        compiled[tpl_key] = (field_map_to(tpl_key, meta, use_source), fallback)
+    return compiled
+
+
+def apply_mapping(compiled: CompiledMapping, data: Any, resolve_path_fn) -> Dict[str, Any]:
+    """{variable: valor} para `data`; la ruta explícita tiene prioridad sobre la heurística."""
+    out = {}
+    for tpl_key, (map_to, fallback) in compiled.items():
+        value = None
+        if map_to:
+            if isinstance(data, (dict, list)):
+                value = resolve_path_fn(data, map_to)
+            if value is None and isinstance(data, dict) and map_to in data:
+                out[tpl_key] = data.get(map_to)
+                continue
+        if value is None and fallback is not None and isinstance(data, dict):
+            value = data.get(fallback)
+        out[tpl_key] = value
+    return out
+
+
+def _mapping_key(template, signature: str, use_source: bool) -> Optional[Tuple]:
+    version = template_cache_key(template)
+    if version is None:
+        return None
+    return (template._meta.label_lower, *version, signature, use_source)
+
+
+def get_compiled_mapping(template, data: Any, use_source: bool = False) -> Optional[CompiledMapping]:
+    """Mapeo compilado de `template.fields_schema` para datos con la forma de `data`."""
+    fs = getattr(template, 'fields_schema', None)
+    if not fs or not isinstance(fs, dict):
+        return None
+
+    key = _mapping_key(template, data_signature(data), use_source)
+    if key is None:
+        return compile_mapping(fs, data, use_source)
+
+    with _lock:
+        compiled = _entries.get(key)
+        if compiled is not None:
+            _entries.move_to_end(key)
+            return compiled
+
+    shared_key = CACHE_PREFIX + ':' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    try:
+        compiled = cache.get(shared_key)
+    except Exception:
+        compiled = None
+    if compiled is None:
+        compiled = compile_mapping(fs, data, use_source)
+        try:
+            cache.set(shared_key, compiled, _cache_timeout())
+        except Exception:
+            pass
+
+    with _lock:
+        compiled = _entries.setdefault(key, compiled)
+        _entries.move_to_end(key)
+        while len(_entries) > _max_entries():
+            _entries.popitem(last=False)
+    return compiled
+
+
+def map_template_fields(template, data: Any, resolve_path_fn, use_source: bool = False) -> Dict[str, Any]:
+    """{variable: valor} de `template.fields_schema` para `data` ({} sin schema)."""
+    compiled = get_compiled_mapping(template, data, use_source)
+    return apply_mapping(compiled, data, resolve_path_fn) if compiled else {}
+
+
+def clear_field_mapping_cache() -> None:
+    """Vacía el caché en memoria (las entradas del caché de Django expiran solas)."""
+    with _lock:
+        _entries.clear()
+
+
+def cache_info() -> List[Hashable]:
+    with _lock:
+        return list(_entries.keys())
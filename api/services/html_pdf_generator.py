@@ -1,25 +1,142 @@
-from weasyprint import HTML, CSS
-from django.template import Template as DjangoTemplate, Context
+from weasyprint import HTML
+from django.template import Context
 import io
+import re
+from typing import Iterable, List, Optional
+
+from .template_cache import get_compiled_template, get_stylesheets
+
+_HEAD_RE = re.compile(r'<head(?:\s[^>]*)?>(.*?)</head>', re.IGNORECASE | re.DOTALL)
+_BODY_RE = re.compile(r'<body(\s[^>]*)?>(.*)</body>', re.IGNORECASE | re.DOTALL)
+_HTML_RE = re.compile(r'<html(\s[^>]*)?>', re.IGNORECASE)
+_FRAGMENT_REF_RE = re.compile(r'(\s(?:href\s*=\s*(["\'])#|for\s*=\s*(["\'])))([^"\'#]+)(?=["\'])', re.IGNORECASE)
+_ID_RE = re.compile(r'(\sid\s*=\s*["\'])([^"\']+)(?=["\'])', re.IGNORECASE)
+# counter(page), counter(pages), target-counter(attr(href), page)...
+_PAGE_COUNTER_RE = re.compile(r'counters?\((?:[^()]|\([^()]*\))*\bpages?\b', re.IGNORECASE)
+BATCH_ANCHOR = 'batch-report-'
+
+
+def _scope_ids(body: str, index: int) -> str:
+    """
+    En la sección `index` (> 0) renombra los id a los que apuntan enlaces
+    internos (`href="#..."`, `for="..."`) para que cada reporte enlace a sus
+    propios elementos. Los demás id repetidos solo sirven para estilos y se dejan.
+    """
+    targets = {m.group(4) for m in _FRAGMENT_REF_RE.finditer(body)}
+    if not index or not targets:
+        return body
+    suffix = f'--{index}'
+    body = _ID_RE.sub(lambda m: m.group(0) + suffix if m.group(2) in targets else m.group(0), body)
+    return _FRAGMENT_REF_RE.sub(lambda m: m.group(0) + suffix, body)
+
+
+def uses_page_counters(*sources: Optional[str]) -> bool:
+    """True si la plantilla numera páginas (`counter(page)`, `counter(pages)`...)."""
+    return any(source and _PAGE_COUNTER_RE.search(source) for source in sources)
+
 
 class HTMLPDFGenerator:
     """Generador de PDFs desde plantillas HTML usando WeasyPrint"""
 
     @staticmethod
-    def render_template(html_content: str, css_content: str | None, data: dict) -> io.BytesIO:
-        # Renderizar con el motor de templates de Django
-        template = DjangoTemplate(html_content)
+    def render_template(html_content: str, css_content: str | None, data: dict, cache_key=None) -> io.BytesIO:
+        # Renderizar con el motor de templates de Django (plantilla compilada en caché;
+        # `cache_key` suele ser `template_cache_key(template)`)
+        template = get_compiled_template(html_content, cache_key)
         context = Context(data)
         rendered_html = template.render(context)
 
         html = HTML(string=rendered_html)
-        stylesheets = [CSS(string=css_content)] if css_content else None
+        stylesheets, font_config = get_stylesheets(css_content, cache_key)
+
+        pdf_file = io.BytesIO()
+        html.write_pdf(pdf_file, stylesheets=stylesheets, font_config=font_config)
+        pdf_file.seek(0)
+        return pdf_file
+
+    @staticmethod
+    def _batch_document(html_content: str, css_content: str | None, contexts: Iterable[dict], cache_key=None):
+        """
+        Renderiza todos los contextos como secciones de un único HTML (con salto
+        de página entre ellas) y hace un solo layout de WeasyPrint. Los atributos
+        de `<html>`/`<body>` del primer render se conservan (la clase del body se
+        copia también en cada sección).
+        """
+        template = get_compiled_template(html_content, cache_key)
+        head = html_attrs = body_attrs = ''
+        sections = []
+        for index, data in enumerate(contexts):
+            rendered = template.render(Context(data))
+            match = _BODY_RE.search(rendered)
+            if index == 0:
+                head_match = _HEAD_RE.search(rendered)
+                head = head_match.group(1) if head_match else ''
+                html_match = _HTML_RE.search(rendered)
+                html_attrs = (html_match.group(1) or '') if html_match else ''
+                body_attrs = (match.group(1) or '') if match else ''
+            body = _scope_ids(match.group(2) if match else rendered, index)
+            style = ' style="break-before: page"' if index else ''
+            sections.append(f'<section id="{BATCH_ANCHOR}{index}" class="batch-report"{style}>{body}</section>')
 
+        combined = f'<!DOCTYPE html><html{html_attrs}><head>{head}</head><body{body_attrs}>{"".join(sections)}</body></html>'
+        stylesheets, font_config = get_stylesheets(css_content, cache_key)
+        document = HTML(string=combined).render(stylesheets=stylesheets, font_config=font_config)
+        return document, len(sections)
+
+    @staticmethod
+    def _separate_documents(html_content: str, css_content: str | None, contexts: Iterable[dict], cache_key=None):
+        """Un layout por contexto (plantilla y CSS compilados una sola vez)."""
+        template = get_compiled_template(html_content, cache_key)
+        stylesheets, font_config = get_stylesheets(css_content, cache_key)
+        return [
+            HTML(string=template.render(Context(data))).render(stylesheets=stylesheets, font_config=font_config)
+            for data in contexts
+        ]
+
+    @staticmethod
+    def render_batch(html_content: str, css_content: str | None, contexts: Iterable[dict], cache_key=None) -> io.BytesIO:
+        """
+        Un único PDF consolidado con un reporte por contexto. Si la plantilla
+        numera páginas cada reporte se compone por separado y se unen las
+        páginas, para que la numeración reinicie en cada uno.
+        """
+        contexts = list(contexts)
         pdf_file = io.BytesIO()
-        html.write_pdf(pdf_file, stylesheets=stylesheets)
+        if contexts and uses_page_counters(html_content, css_content):
+            documents = HTMLPDFGenerator._separate_documents(html_content, css_content, contexts, cache_key)
+            documents[0].copy([page for doc in documents for page in doc.pages]).write_pdf(pdf_file)
+        else:
+            document, _ = HTMLPDFGenerator._batch_document(html_content, css_content, contexts, cache_key)
+            document.write_pdf(pdf_file)
         pdf_file.seek(0)
         return pdf_file
 
+    @staticmethod
+    def render_batch_split(html_content: str, css_content: str | None, contexts: Iterable[dict], cache_key=None) -> List[Optional[bytes]]:
+        """
+        Igual que `render_batch` pero separa el documento en un PDF por contexto
+        (en el mismo orden). Las páginas se asignan por el ancla de cada sección;
+        un contexto que no produjo páginas devuelve None.
+        """
+        contexts = list(contexts)
+        if uses_page_counters(html_content, css_content):
+            documents = HTMLPDFGenerator._separate_documents(html_content, css_content, contexts, cache_key)
+            return [doc.write_pdf() if doc.pages else None for doc in documents]
+
+        document, count = HTMLPDFGenerator._batch_document(html_content, css_content, contexts, cache_key)
+        groups = [[] for _ in range(count)]
+        current = None
+        for page in document.pages:
+            starts = [
+                int(name[len(BATCH_ANCHOR):]) for name in page.anchors
+                if name.startswith(BATCH_ANCHOR) and name[len(BATCH_ANCHOR):].isdigit()
+            ]
+            if starts:
+                current = max(starts)
+            if current is not None:
+                groups[current].append(page)
+        return [document.copy(pages).write_pdf() if pages else None for pages in groups]
+
     @staticmethod
     def get_default_css() -> str:
         return """
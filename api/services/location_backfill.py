@@ -0,0 +1,247 @@
+"""
+Migración de los campos de ubicación en texto legacy a las FKs jerárquicas.
+
+- `Equipment.dependencia` -> `dependencia_rel` (y `sede_rel` desde la dependencia);
+- `Maintenance.sede` / `dependencia` / `ubicacion` -> `sede_rel` /
+  `dependencia_rel` / `subdependencia`.
+
+Los textos se resuelven contra `FuzzyLocationIndex`, construido una sola vez:
+igualdad normalizada (como `LocationIndex`), luego sin prefijos genéricos
+("sede", "secretaría de"...) y por último `difflib` con un umbral de similitud.
+Solo se completan FKs vacías. Las filas se recorren por id en bloques con
+`bulk_update` (que también avanza `updated_at`, para que las claves de
+`render_cache` cambien) y se regeneran los snapshots de los mantenimientos
+tocados; como las ya resueltas dejan de coincidir con el filtro, una corrida
+interrumpida se retoma volviendo a ejecutarla (o con `after_id`).
+
+Los formularios todavía envían los textos sin FK: el `pre_save` de
+`Maintenance` y `Equipment` llama a `resolve_legacy_locations`, que usa un
+índice compartido por proceso (`shared_index`), reconstruido cada
+`LOCATION_INDEX_TTL` segundos o cuando se edita una sede/dependencia/subdependencia.
+"""
+import difflib
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Dependencia, Equipment, Maintenance, MaintenanceSnapshot, Subdependencia
+
+from .equipment_inventory import LocationIndex, normalize_name
+from .maintenance_snapshot import invalidate_snapshots, refresh_snapshots
+
+CHUNK_SIZE = 500
+FUZZY_CUTOFF = 0.88
+
+_GENERIC_PREFIX = re.compile(r'^(sede|secretaria( de)?|dependencia|oficina( de)?|subdependencia|despacho( del?)?)\s+')
+
+
+def _stripped(key: str) -> str:
+    return _GENERIC_PREFIX.sub('', key).strip()
+
+
+class FuzzyLocationIndex(LocationIndex):
+    """`LocationIndex` con búsqueda aproximada por nombre (cacheada por texto)."""
+
+    def __init__(self, cutoff: float = FUZZY_CUTOFF):
+        super().__init__()
+        self.cutoff = cutoff
+        self.dependencia_sede = dict(Dependencia.objects.values_list('id', 'sede_id'))
+        self.subdependencia_dependencia = dict(Subdependencia.objects.values_list('id', 'dependencia_id'))
+        self._memo: Dict[Tuple[str, Optional[int], str], Optional[int]] = {}
+
+    def _lookup(self, kind: str, table: Dict, scope: Optional[int], text) -> Optional[int]:
+        key = normalize_name(text)
+        if not key:
+            return None
+        memo_key = (kind, scope, key)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        if kind == 'sede':
+            candidates = {k: pk for k, pk in table.items() if pk}
+        else:
+            candidates = {k: pk for (s, k), pk in table.items() if s == scope and pk}
+
+        found = candidates.get(key)
+        if not found:
+            stripped = {_stripped(k): pk for k, pk in candidates.items()}
+            target = _stripped(key)
+            found = stripped.get(target)
+            if not found:
+                scored = sorted(
+                    ((difflib.SequenceMatcher(None, target, k).ratio(), pk) for k, pk in stripped.items()),
+                    key=lambda item: item[0], reverse=True,
+                )
+                # Se descarta si la mejor coincidencia empata con otra ubicación distinta
+                if scored and scored[0][0] >= self.cutoff and (
+                    len(scored) == 1 or scored[1][1] == scored[0][1] or scored[1][0] < scored[0][0]
+                ):
+                    found = scored[0][1]
+        self._memo[memo_key] = found or None
+        return found or None
+
+    def sede(self, text) -> Optional[int]:
+        return self._lookup('sede', self.sedes, None, text)
+
+    def dependencia(self, text, sede_id: Optional[int] = None) -> Optional[int]:
+        found = self._lookup('dependencia', self.dependencias, sede_id, text) if sede_id else None
+        return found or self._lookup('dependencia', self.dependencias, None, text)
+
+    def subdependencia(self, text, dependencia_id: Optional[int] = None) -> Optional[int]:
+        found = self._lookup('subdependencia', self.subdependencias, dependencia_id, text) if dependencia_id else None
+        return found or self._lookup('subdependencia', self.subdependencias, None, text)
+
+
+_shared_index: Optional[FuzzyLocationIndex] = None
+_shared_built = 0.0
+_shared_lock = threading.Lock()
+
+
+def shared_index() -> FuzzyLocationIndex:
+    """Índice de ubicaciones del proceso, reconstruido cada `LOCATION_INDEX_TTL` segundos."""
+    global _shared_index, _shared_built
+    ttl = int(getattr(settings, 'LOCATION_INDEX_TTL', 300))
+    with _shared_lock:
+        if _shared_index is None or time.monotonic() - _shared_built > ttl:
+            _shared_index = FuzzyLocationIndex()
+            _shared_built = time.monotonic()
+        return _shared_index
+
+
+def clear_shared_index() -> None:
+    global _shared_index
+    with _shared_lock:
+        _shared_index = None
+
+
+def resolve_legacy_locations(instance) -> bool:
+    """
+    Completa las FKs de ubicación vacías de un `Maintenance` o `Equipment` desde
+    sus textos antes de guardarlo. Devuelve True si asignó alguna.
+    """
+    if isinstance(instance, Maintenance):
+        pending = (
+            (not instance.sede_rel_id and instance.sede)
+            or (not instance.dependencia_rel_id and instance.dependencia)
+            or (not instance.subdependencia_id and instance.ubicacion)
+        )
+        resolve = _resolve_maintenance
+    elif isinstance(instance, Equipment):
+        pending = not instance.dependencia_rel_id and instance.dependencia
+        resolve = _resolve_equipment
+    else:
+        return False
+    if not pending:
+        return False
+    return resolve(instance, shared_index(), Counter())
+
+
+def _chunks(queryset, after_id: int, chunk_size: int) -> Iterator[List]:
+    last = after_id
+    while True:
+        chunk = list(queryset.filter(id__gt=last).order_by('id')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].id
+
+
+def _resolve_maintenance(m: Maintenance, index: FuzzyLocationIndex, unresolved: Counter) -> bool:
+    changed = False
+    if not m.sede_rel_id and m.sede:
+        m.sede_rel_id = index.sede(m.sede)
+        changed |= bool(m.sede_rel_id)
+        if not m.sede_rel_id:
+            unresolved[('maintenance.sede', m.sede.strip())] += 1
+    if not m.dependencia_rel_id and m.dependencia:
+        m.dependencia_rel_id = index.dependencia(m.dependencia, m.sede_rel_id)
+        changed |= bool(m.dependencia_rel_id)
+        if not m.dependencia_rel_id:
+            unresolved[('maintenance.dependencia', m.dependencia.strip())] += 1
+    if m.dependencia_rel_id and not m.sede_rel_id:
+        m.sede_rel_id = index.dependencia_sede.get(m.dependencia_rel_id)
+        changed |= bool(m.sede_rel_id)
+    if not m.subdependencia_id and m.ubicacion:
+        m.subdependencia_id = index.subdependencia(m.ubicacion, m.dependencia_rel_id)
+        changed |= bool(m.subdependencia_id)
+        if not m.subdependencia_id:
+            unresolved[('maintenance.ubicacion', m.ubicacion.strip())] += 1
+        elif not m.dependencia_rel_id:
+            m.dependencia_rel_id = index.subdependencia_dependencia.get(m.subdependencia_id)
+            m.sede_rel_id = m.sede_rel_id or index.dependencia_sede.get(m.dependencia_rel_id)
+    return changed
+
+
+def _resolve_equipment(eq: Equipment, index: FuzzyLocationIndex, unresolved: Counter) -> bool:
+    if eq.dependencia_rel_id or not eq.dependencia:
+        return False
+    eq.dependencia_rel_id = index.dependencia(eq.dependencia, eq.sede_rel_id)
+    if not eq.dependencia_rel_id:
+        unresolved[('equipment.dependencia', eq.dependencia.strip())] += 1
+        return False
+    eq.sede_rel_id = eq.sede_rel_id or index.dependencia_sede.get(eq.dependencia_rel_id)
+    return True
+
+
+def backfill_locations(models=('equipment', 'maintenance'), after_id: int = 0, chunk_size: int = CHUNK_SIZE,
+                       dry_run: bool = False, index: Optional[FuzzyLocationIndex] = None,
+                       progress=None) -> Dict:
+    """
+    Completa las FKs de ubicación desde los textos legacy. Devuelve
+    {'updated': {modelo: filas}, 'unresolved': Counter((campo, texto) -> filas), 'last_id': {...}}.
+    `progress(modelo, último_id, actualizadas)` se llama después de cada bloque.
+    """
+    index = index or FuzzyLocationIndex()
+    unresolved: Counter = Counter()
+    updated = {}
+    last_ids = {}
+
+    jobs = {
+        'equipment': (
+            Equipment.objects.filter(dependencia_rel__isnull=True).exclude(dependencia__isnull=True).exclude(dependencia=''),
+            _resolve_equipment, ['dependencia_rel', 'sede_rel'], ['dependencia'],
+        ),
+        'maintenance': (
+            Maintenance.objects.filter(
+                (Q(sede_rel__isnull=True) & Q(sede__gt=''))
+                | (Q(dependencia_rel__isnull=True) & Q(dependencia__gt=''))
+                | (Q(subdependencia__isnull=True) & Q(ubicacion__gt=''))
+            ),
+            _resolve_maintenance, ['sede_rel', 'dependencia_rel', 'subdependencia'], ['sede', 'dependencia', 'ubicacion'],
+        ),
+    }
+
+    for name in models:
+        queryset, resolve, fields, legacy = jobs[name]
+        queryset = queryset.only('id', *fields, *legacy)
+        count = 0
+        for chunk in _chunks(queryset, after_id, chunk_size):
+            changed = [obj for obj in chunk if resolve(obj, index, unresolved)]
+            if changed and not dry_run:
+                now = timezone.now()
+                for obj in changed:
+                    obj.updated_at = now
+                ids = [obj.id for obj in changed]
+                with transaction.atomic():
+                    type(changed[0]).objects.bulk_update(changed, fields + ['updated_at'], batch_size=chunk_size)
+                # bulk_update no dispara signals: los snapshots copian la ubicación
+                if name == 'maintenance':
+                    refresh_snapshots(list(
+                        MaintenanceSnapshot.objects.filter(pk__in=ids).values_list('pk', flat=True)
+                    ))
+                else:
+                    invalidate_snapshots(equipment_id__in=ids)
+            count += len(changed)
+            last_ids[name] = chunk[-1].id
+            if progress:
+                progress(name, chunk[-1].id, count)
+        updated[name] = count
+
+    return {'updated': updated, 'unresolved': unresolved, 'last_id': last_ids}
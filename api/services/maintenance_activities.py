@@ -0,0 +1,109 @@
+"""
+Normalización de `Maintenance.activities` en filas `MaintenanceActivity`.
+
+Cada clave del JSON se resuelve a la actividad de la plantilla con los alias
+de los generadores Excel (`ActivityMatcher.canonical_name`, primero cómputo y
+luego impresora/escáner); si no corresponde a ninguna se conserva la clave tal
+cual. `activity_key` es ese nombre normalizado (minúsculas, sin tildes) y
+`value` uno de SI/NO/NA/PENDIENTE (`activity_status`); los valores no
+reconocidos no generan fila.
+
+Las filas se regeneran al guardar un mantenimiento (signal) y tras las
+importaciones masivas; `backfill_maintenance_activities` cubre lo anterior.
+"""
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+
+from api.models import Maintenance, MaintenanceActivity
+
+from .activity_matcher import ActivityMatcher, activity_status, normalize_activity
+from .bulk import keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+KEY_MAX_LENGTH = MaintenanceActivity._meta.get_field('activity_key').max_length
+NAME_MAX_LENGTH = MaintenanceActivity._meta.get_field('activity_name').max_length
+
+_matchers: Optional[Tuple[ActivityMatcher, ...]] = None
+
+
+def _get_matchers() -> Tuple[ActivityMatcher, ...]:
+    global _matchers
+    if _matchers is None:
+        from .excel_report_generator import ExcelReportGenerator
+        from .printer_scanner_excel_generator import PrinterScannerExcelGenerator
+
+        _matchers = (ExcelReportGenerator.activity_matcher(), PrinterScannerExcelGenerator.activity_matcher())
+    return _matchers
+
+
+def canonical_activity(key) -> Tuple[str, str]:
+    """Clave del JSON -> (activity_key, activity_name)."""
+    for matcher in _get_matchers():
+        name = matcher.canonical_name(key)
+        if name:
+            break
+    else:
+        name = ' '.join(str(key).split())
+    return normalize_activity(name)[:KEY_MAX_LENGTH], name[:NAME_MAX_LENGTH]
+
+
+def _iter_items(activities) -> Iterator[Tuple[str, object]]:
+    if isinstance(activities, dict):
+        yield from activities.items()
+    elif isinstance(activities, list):
+        for item in activities:
+            if isinstance(item, dict):
+                name = item.get('name') or item.get('activity') or item.get('task')
+                if name:
+                    yield name, item.get('value', item.get('done'))
+
+
+def build_activity_rows(maintenance_id: int, activities) -> List[MaintenanceActivity]:
+    """Filas (sin guardar) de un JSON de actividades; ante claves repetidas gana la primera."""
+    rows: Dict[str, MaintenanceActivity] = {}
+    for key, value in _iter_items(activities):
+        status = activity_status(value)
+        if status is None or not normalize_activity(key):
+            continue
+        activity_key, activity_name = canonical_activity(key)
+        if activity_key not in rows:
+            rows[activity_key] = MaintenanceActivity(
+                maintenance_id=maintenance_id,
+                activity_key=activity_key,
+                activity_name=activity_name,
+                value=status,
+            )
+    return list(rows.values())
+
+
+def sync_activities(maintenances: Iterable) -> int:
+    """
+    Reemplaza las filas de actividades de `maintenances` (instancias o pares
+    (id, activities)) con un DELETE y un `bulk_create`. Devuelve las filas creadas.
+    """
+    ids, rows = [], []
+    for item in maintenances:
+        maintenance_id, activities = (item.pk, item.activities) if isinstance(item, Maintenance) else item
+        ids.append(maintenance_id)
+        rows.extend(build_activity_rows(maintenance_id, activities))
+    if not ids:
+        return 0
+    with transaction.atomic():
+        MaintenanceActivity.objects.filter(maintenance_id__in=ids).delete()
+        MaintenanceActivity.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+    return len(rows)
+
+
+def backfill_activities(queryset=None, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """Regenera las filas de todos los mantenimientos de `queryset`. Devuelve (mantenimientos, filas)."""
+    queryset = Maintenance.objects.all() if queryset is None else queryset
+    maintenances = rows = 0
+    # Paginación por clave: en MySQL `.iterator()` carga todo el resultado en memoria
+    for batch in keyset_chunks(queryset.values_list('id', 'activities'), chunk_size):
+        rows += sync_activities(batch)
+        maintenances += len(batch)
+    return maintenances, rows
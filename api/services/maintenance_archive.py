@@ -0,0 +1,230 @@
+"""
+Archivo frío de mantenimientos históricos.
+
+`archive_maintenances` mueve los mantenimientos completados/cancelados con
+`scheduled_date` anterior al horizonte (`ARCHIVE_HORIZON_DAYS`, 730 por defecto)
+fuera de las tablas activas:
+
+- el registro completo (mantenimiento, fotos, firmas, reports, snapshot e ids de
+  incidentes) se guarda como JSON gzip en el storage
+  (`archive/maintenances/<año>/<id>.json.gz`);
+- `ArchivedMaintenance` conserva el id original, las FKs de búsqueda y los
+  campos de reporte ya formateados; `ArchivedReport` conserva los reports;
+- las filas activas se eliminan (los archivos de fotos, firmas y PDFs no se
+  tocan: el bundle guarda sus nombres).
+
+Se procesa por bloques, cada uno en su transacción, con una sola entrada de
+auditoría por mantenimiento (acción 'archive').
+
+Lectura: `archived_payload` arma la respuesta de un mantenimiento archivado
+leyendo el bundle (con caché), y `MaintenanceViewSet.retrieve` la usa cuando el
+id ya no está en la tabla activa.
+"""
+import gzip
+import json
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core import serializers
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.utils import timezone
+
+from api.models import ArchivedMaintenance, ArchivedReport, Maintenance, MaintenanceSnapshot
+
+from .bulk import bulk_audit
+from .maintenance_serializer import _serialize, with_report_relations
+
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+CHUNK_SIZE = 200
+BUNDLE_VERSION = 1
+BUNDLE_CACHE_TTL = 600
+
+
+def archive_horizon_days() -> int:
+    return int(getattr(settings, 'ARCHIVE_HORIZON_DAYS', 730))
+
+
+def archivable_queryset(days: Optional[int] = None):
+    cutoff = timezone.localdate() - timedelta(days=archive_horizon_days() if days is None else days)
+    return Maintenance.objects.filter(status__in=ARCHIVE_STATUSES, scheduled_date__lt=cutoff)
+
+
+def _rows(objs) -> List[Dict[str, Any]]:
+    return serializers.serialize('python', objs)
+
+
+def build_bundle(maintenance: Maintenance) -> Dict[str, Any]:
+    """Registro completo de un mantenimiento y sus dependientes (con relaciones precargadas)."""
+    snapshot = MaintenanceSnapshot.objects.filter(pk=maintenance.pk).first()
+    return {
+        'version': BUNDLE_VERSION,
+        'maintenance': _rows([maintenance])[0],
+        'fields': _serialize(maintenance),
+        'photos': _rows(maintenance.photos.all()),
+        'signatures': _rows(maintenance.signatures.all()),
+        'second_signatures': _rows(maintenance.second_signatures.all()),
+        'reports': _rows(maintenance.custom_reports.all()),
+        'snapshot': snapshot.data if snapshot else None,
+        'incident_ids': list(maintenance.incidents.values_list('id', flat=True)),
+    }
+
+
+def bundle_name(maintenance: Maintenance) -> str:
+    return f'archive/maintenances/{maintenance.scheduled_date.year}/{maintenance.pk}.json.gz'
+
+
+def _archive_one(maintenance: Maintenance, storage, written: List[str]):
+    """Escribe el bundle y devuelve (ArchivedMaintenance, [ArchivedReport]) sin guardar."""
+    bundle = build_bundle(maintenance)
+    payload = gzip.compress(json.dumps(bundle, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+    name = bundle_name(maintenance)
+    if storage.exists(name):
+        storage.delete(name)
+    name = storage.save(name, ContentFile(payload))
+    written.append(name)
+
+    archived = ArchivedMaintenance(
+        id=maintenance.pk,
+        equipment_id=maintenance.equipment_id,
+        technician_id=maintenance.technician_id,
+        sede_rel_id=maintenance.sede_rel_id,
+        dependencia_rel_id=maintenance.dependencia_rel_id,
+        subdependencia_id=maintenance.subdependencia_id,
+        codigo=maintenance.codigo,
+        maintenance_type=maintenance.maintenance_type,
+        status=maintenance.status,
+        scheduled_date=maintenance.scheduled_date,
+        completion_date=maintenance.completion_date,
+        fields=bundle['fields'],
+        bundle=name,
+        bundle_size=len(payload),
+    )
+    reports = [
+        ArchivedReport(
+            id=report.pk,
+            maintenance_id=maintenance.pk,
+            title=report.title,
+            pdf_file=report.pdf_file.name or None,
+            generated_by_id=report.generated_by_id,
+            generated_at=report.generated_at,
+        )
+        for report in maintenance.custom_reports.all()
+    ]
+    return archived, reports
+
+
+def archive_maintenances(days: Optional[int] = None, chunk_size: int = CHUNK_SIZE, limit: int = 0,
+                         dry_run: bool = False, user=None, storage=None) -> Dict[str, int]:
+    """Archiva los mantenimientos anteriores al horizonte. Devuelve {'archived', 'bytes'}."""
+    storage = storage or default_storage
+    queryset = archivable_queryset(days).order_by('id')
+    if dry_run:
+        total = queryset.count()
+        return {'archived': min(total, limit) if limit else total, 'bytes': 0}
+
+    archived_count = total_bytes = 0
+    while not limit or archived_count < limit:
+        size = min(chunk_size, limit - archived_count) if limit else chunk_size
+        chunk = list(with_report_relations(queryset).prefetch_related('custom_reports')[:size])
+        if not chunk:
+            break
+        written: List[str] = []
+        try:
+            with transaction.atomic():
+                pairs = [_archive_one(m, storage, written) for m in chunk]
+                archived = [a for a, _ in pairs]
+                ArchivedMaintenance.objects.bulk_create(archived)
+                ArchivedReport.objects.bulk_create([r for _, reports in pairs for r in reports])
+
+                # Sin snapshot, los signals de fotos/firmas no intentan regenerarlo al borrarlas
+                MaintenanceSnapshot.objects.filter(pk__in=[m.pk for m in chunk]).delete()
+                # Auditoría en bloque antes de borrar (delete() deja las instancias sin pk)
+                bulk_audit(chunk, 'maintenance', 'archive', user=user,
+                           changes=f'Archivado (horizonte {archive_horizon_days() if days is None else days} días)')
+                for m in chunk:
+                    m._skip_audit = True
+                collector = Collector(using=router.db_for_write(Maintenance))
+                collector.collect(chunk)
+                collector.delete()
+        except Exception:
+            # Sin filas archivadas, los bundles escritos sobran
+            for name in written:
+                try:
+                    storage.delete(name)
+                except Exception:
+                    pass
+            raise
+        archived_count += len(archived)
+        total_bytes += sum(a.bundle_size for a in archived)
+    return {'archived': archived_count, 'bytes': total_bytes}
+
+
+def load_bundle(archived: ArchivedMaintenance) -> Dict[str, Any]:
+    """Contenido del bundle de un mantenimiento archivado (cacheado `BUNDLE_CACHE_TTL` s)."""
+    key = f'maintenance_archive:{archived.pk}:{archived.bundle.name}'
+    bundle = cache.get(key)
+    if bundle is None:
+        with archived.bundle.open('rb') as f:
+            bundle = json.loads(gzip.decompress(f.read()).decode('utf-8'))
+        cache.set(key, bundle, BUNDLE_CACHE_TTL)
+    return bundle
+
+
+def _file_url(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return default_storage.url(name)
+    except Exception:
+        return None
+
+
+def archived_payload(archived: ArchivedMaintenance, include_bundle: bool = True) -> Dict[str, Any]:
+    """Respuesta de API de un mantenimiento archivado: campos originales, archivos y reports."""
+    data: Dict[str, Any] = {
+        'id': archived.pk,
+        'archived': True,
+        'archived_at': archived.archived_at,
+        'report_fields': archived.fields,
+        'reports': [
+            {'id': r.pk, 'title': r.title, 'generated_at': r.generated_at, 'pdf_url': _file_url(r.pdf_file.name)}
+            for r in archived.reports.all()
+        ],
+    }
+    if not include_bundle:
+        return data
+
+    bundle = load_bundle(archived)
+    data.update(bundle['maintenance']['fields'])
+    data['id'] = archived.pk
+    data['photos'] = [
+        {'id': p['pk'], 'photo': _file_url(p['fields']['photo']), 'caption': p['fields']['caption']}
+        for p in bundle['photos']
+    ]
+    for key in ('signatures', 'second_signatures'):
+        data[key] = [
+            {
+                'id': s['pk'],
+                'signer_name': s['fields']['signer_name'],
+                'signer_role': s['fields']['signer_role'],
+                'signature_image': _file_url(s['fields']['signature_image']),
+                'signed_at': s['fields']['signed_at'],
+            }
+            for s in bundle[key]
+        ]
+    data['incident_ids'] = bundle.get('incident_ids', [])
+    return data
+
+
+def get_archived(maintenance_id) -> Optional[ArchivedMaintenance]:
+    try:
+        maintenance_id = int(maintenance_id)
+    except (TypeError, ValueError):
+        return None
+    return ArchivedMaintenance.objects.filter(pk=maintenance_id).prefetch_related('reports').first()
@@ -0,0 +1,304 @@
+"""
+Importación masiva de mantenimientos (formularios diligenciados sin conexión).
+
+Todas las filas se validan antes de escribir. Las filas válidas se insertan con
+`bulk_create` en lotes de tamaño configurable, cada lote en su propia
+transacción; fotos y firmas de cada lote también se insertan en bloque y las
+entradas de auditoría se registran con un único `bulk_create` por lote.
+
+Formatos aceptados (ver `parse_import_rows`):
+  - JSON: lista de filas o `{"rows": [...]}`
+  - NDJSON (`application/x-ndjson`): una fila JSON por línea
+  - multipart: campo `rows` (JSON) y archivos `photos_<n>`, `signature_<n>`,
+    `second_signature_<n>`, donde `<n>` es la posición de la fila
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from api.models import (
+    Dependencia,
+    Equipment,
+    Maintenance,
+    Photo,
+    SecondSignature,
+    Sede,
+    Signature,
+    Subdependencia,
+)
+from api.serializers import MaintenanceSerializer
+from api.validators import validate_file_size, validate_file_type
+
+from .bulk import bulk_audit, bulk_insert
+from .location_backfill import resolve_legacy_locations
+from .maintenance_activities import sync_activities
+from .maintenance_snapshot import SNAPSHOT_STATUSES, refresh_snapshots
+from .media_ingest import ingest_instance
+from .report_warmer import schedule_report_warmup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+MAX_BATCH_SIZE = 1000
+MAX_PHOTOS_PER_MAINTENANCE = 10
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+class ImportFormatError(ValueError):
+    """El cuerpo de la petición no contiene filas en un formato reconocido."""
+
+
+class _PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resuelve la PK contra objetos precargados en `context['related_cache']`
+    para no ejecutar una consulta por fila durante la validación.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('related_cache', {}).get(self.get_queryset().model)
+        if preloaded is not None and not isinstance(data, bool):
+            try:
+                obj = preloaded.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class MaintenanceImportSerializer(MaintenanceSerializer):
+    serializer_related_field = _PreloadedPrimaryKeyRelatedField
+    equipment = _PreloadedPrimaryKeyRelatedField(
+        queryset=Equipment.objects.all(),
+        required=True
+    )
+
+
+def get_batch_size(value=None) -> int:
+    """Tamaño de lote solicitado, acotado a [1, MAX_BATCH_SIZE]."""
+    default = getattr(settings, 'MAINTENANCE_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    try:
+        size = int(value) if value not in (None, '') else int(default)
+    except (TypeError, ValueError):
+        size = int(default)
+    return max(1, min(size, MAX_BATCH_SIZE))
+
+
+def _parse_ndjson(raw) -> List[Any]:
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8-sig')
+    rows = []
+    for lineno, line in enumerate(raw.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f'Línea {lineno}: JSON inválido ({e.msg})')
+    return rows
+
+
+def parse_import_rows(request) -> List[Any]:
+    """Extrae la lista de filas de una petición JSON, NDJSON o multipart."""
+    content_type = (request.content_type or '').split(';')[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        return _parse_ndjson(request.body)
+
+    data = request.data
+    if content_type.startswith('multipart/') or content_type == 'application/x-www-form-urlencoded':
+        upload = request.FILES.get('file')
+        if upload is not None:
+            raw = upload.read()
+            text = raw.decode('utf-8-sig').lstrip()
+            if text.startswith('['):
+                data = json.loads(text)
+            else:
+                return _parse_ndjson(text)
+        else:
+            raw_rows = data.get('rows')
+            if not raw_rows:
+                raise ImportFormatError("Se requiere el campo 'rows' (JSON) o un archivo 'file'")
+            try:
+                data = json.loads(raw_rows)
+            except (TypeError, json.JSONDecodeError):
+                raise ImportFormatError("El campo 'rows' no contiene JSON válido")
+
+    if isinstance(data, dict):
+        data = data.get('rows', data.get('maintenances'))
+    if not isinstance(data, list):
+        raise ImportFormatError('Se esperaba una lista de mantenimientos')
+    return data
+
+
+def _preload_related(rows: List[Any]) -> Dict[Any, Dict[int, Any]]:
+    """Carga en una consulta por modelo todos los objetos relacionados referenciados."""
+    from django.contrib.auth.models import User
+
+    related = {
+        Equipment: 'equipment',
+        User: 'technician',
+        Sede: 'sede_rel',
+        Dependencia: 'dependencia_rel',
+        Subdependencia: 'subdependencia',
+    }
+    cache = {}
+    for model, field in related.items():
+        ids = set()
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            try:
+                ids.add(int(row.get(field)))
+            except (TypeError, ValueError):
+                continue
+        cache[model] = model.objects.in_bulk(ids) if ids else {}
+    return cache
+
+
+def _row_files(files, index: int) -> Dict[str, Any]:
+    if not files:
+        return {'photos': [], 'signature': None, 'second_signature': None}
+    return {
+        'photos': files.getlist(f'photos_{index}'),
+        'signature': files.get(f'signature_{index}'),
+        'second_signature': files.get(f'second_signature_{index}'),
+    }
+
+
+def _validate_files(row_files) -> Optional[Dict[str, List[str]]]:
+    errors = {}
+    if len(row_files['photos']) > MAX_PHOTOS_PER_MAINTENANCE:
+        errors['photos'] = [f'Máximo {MAX_PHOTOS_PER_MAINTENANCE} fotos por mantenimiento.']
+    for key in ('photos', 'signature', 'second_signature'):
+        uploads = row_files[key] if key == 'photos' else [row_files[key]]
+        for upload in uploads:
+            if upload is None:
+                continue
+            try:
+                validate_file_size(upload)
+                validate_file_type(upload)
+            except DjangoValidationError as e:
+                errors.setdefault(key, []).extend(e.messages)
+    return errors or None
+
+
+def _write_batch(batch, user) -> None:
+    """
+    Inserta un lote (mantenimientos, archivos y auditoría) en una transacción.
+
+    `bulk_insert` no dispara los signals de Maintenance (en MySQL los omite),
+    así que aquí se hace lo mismo en bloque: ubicación por FK antes de insertar;
+    actividades, snapshot y pre-render de los completados después, cuando ya
+    existen sus fotos y firmas.
+    """
+    maintenances = [item['instance'] for item in batch]
+    for maintenance in maintenances:
+        resolve_legacy_locations(maintenance)
+    with transaction.atomic():
+        bulk_insert(Maintenance, maintenances)
+        sync_activities(maintenances)
+
+        photos, signatures, second_signatures = [], [], []
+        for item in batch:
+            maintenance = item['instance']
+            files = item['files']
+            for upload in files['photos']:
+                photos.append(Photo(maintenance=maintenance, photo=upload, uploaded_by=user))
+            if files['signature']:
+                signer_name = 'Técnico'
+                if maintenance.technician:
+                    signer_name = maintenance.technician.get_full_name() or maintenance.technician.username
+                signatures.append(Signature(
+                    maintenance=maintenance,
+                    signature_image=files['signature'],
+                    signer_name=signer_name,
+                    signer_role='Técnico'
+                ))
+            if files['second_signature']:
+                second_signatures.append(SecondSignature(
+                    maintenance=maintenance,
+                    signature_image=files['second_signature'],
+                    signer_name='Usuario',
+                    signer_role='Usuario del equipo'
+                ))
+        # bulk_create tampoco dispara pre_save: dedupe y normalización de imágenes aquí
+        for obj in (*photos, *signatures, *second_signatures):
+            ingest_instance(obj)
+        if photos:
+            Photo.objects.bulk_create(photos)
+        if signatures:
+            Signature.objects.bulk_create(signatures)
+        if second_signatures:
+            SecondSignature.objects.bulk_create(second_signatures)
+
+        bulk_audit(maintenances, 'maintenance', 'create', user=user, changes='bulk_import')
+
+        completed = [m.pk for m in maintenances if m.status in SNAPSHOT_STATUSES]
+        refresh_snapshots(completed)
+        for maintenance_id in completed:
+            schedule_report_warmup(maintenance_id)
+
+
+def import_maintenances(rows: List[Any], user=None, files=None, batch_size: Optional[int] = None,
+                        dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Valida e inserta `rows`. Devuelve un resumen con el resultado de cada fila:
+    `{'row': n, 'status': 'created'|'valid'|'error', 'id'?: pk, 'errors'?: {...}}`.
+    """
+    batch_size = get_batch_size(batch_size)
+    user = user if getattr(user, 'is_authenticated', False) else None
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    context = {'related_cache': _preload_related(rows)}
+
+    # 1) Validar todas las filas antes de escribir
+    pending = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {'row': index, 'status': 'error', 'errors': {'non_field_errors': ['La fila debe ser un objeto JSON']}}
+            continue
+        serializer = MaintenanceImportSerializer(data=row, context=context)
+        row_files = _row_files(files, index)
+        errors = {} if serializer.is_valid() else dict(serializer.errors)
+        file_errors = _validate_files(row_files)
+        if file_errors:
+            errors.update(file_errors)
+        if errors:
+            results[index] = {'row': index, 'status': 'error', 'errors': errors}
+            continue
+        validated = MaintenanceSerializer.normalize_validated_data(dict(serializer.validated_data))
+        instance = Maintenance(**validated)
+        instance.sync_elaborado_por()
+        pending.append({'index': index, 'instance': instance, 'files': row_files})
+
+    if dry_run:
+        for item in pending:
+            results[item['index']] = {'row': item['index'], 'status': 'valid'}
+    else:
+        # 2) Insertar por lotes; un lote fallido no afecta a los demás
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                _write_batch(batch, user)
+            except (DatabaseError, OSError) as e:
+                logger.exception('Error importing maintenance batch starting at row %s', batch[0]['index'])
+                for item in batch:
+                    results[item['index']] = {'row': item['index'], 'status': 'error', 'errors': {'non_field_errors': [str(e)]}}
+                continue
+            for item in batch:
+                results[item['index']] = {'row': item['index'], 'status': 'created', 'id': item['instance'].id}
+
+    failed = sum(1 for r in results if r['status'] == 'error')
+    return {
+        'total': len(rows),
+        'created': sum(1 for r in results if r['status'] == 'created'),
+        'failed': failed,
+        'batch_size': batch_size,
+        'dry_run': dry_run,
+        'results': results,
+    }
@@ -1,5 +1,18 @@
-from api.models import Maintenance
+from api.models import Maintenance, MaintenanceSnapshot
 from decimal import Decimal
+from typing import Iterable, Iterator, Tuple, Union
+
+from django.db.models import QuerySet
+
+from .bulk import keyset_chunks
+
+# Relaciones que usa el dict serializado (una sola consulta con JOINs)
+SELECT_RELATED = ('equipment', 'technician', 'sede_rel', 'dependencia_rel', 'subdependencia')
+# Relaciones que usan los generadores de reportes sobre la instancia
+PREFETCH_RELATED = ('photos', 'signatures', 'second_signatures')
+CHUNK_SIZE = 200
+# Formato del dict serializado guardado en MaintenanceSnapshot: subir cuando cambie `_serialize`
+SNAPSHOT_SCHEMA = 1
 
 
 def _format_field_for_template(value, empty='N/A', bool_labels=('Sí', 'No')):
@@ -28,11 +41,31 @@ def _format_field_for_template(value, empty='N/A', bool_labels=('Sí', 'No')):
         return value
 
 
+def with_report_relations(queryset: QuerySet) -> QuerySet:
+    """`queryset` de Maintenance con las relaciones que usan serializador y reportes."""
+    return queryset.select_related(*SELECT_RELATED).prefetch_related(*PREFETCH_RELATED)
+
+
+def snapshot_fields(ids) -> dict:
+    """{id: dict serializado} de los snapshots vigentes de `ids` (una consulta por PK, sin JOINs)."""
+    rows = MaintenanceSnapshot.objects.filter(
+        maintenance_id__in=ids, schema_version=SNAPSHOT_SCHEMA
+    ).values_list('maintenance_id', 'data')
+    return {mid: data.get('fields') for mid, data in rows if data.get('fields') is not None}
+
+
 def serialize_maintenance(maintenance_id: int) -> dict:
-    m = Maintenance.objects.select_related('equipment', 'technician', 'sede_rel', 'dependencia_rel').filter(id=maintenance_id).first()
+    maintenance_id = int(maintenance_id)
+    fields = snapshot_fields([maintenance_id]).get(maintenance_id)
+    if fields is not None:
+        return fields
+    m = Maintenance.objects.select_related(*SELECT_RELATED).filter(id=maintenance_id).first()
     if not m:
         raise Maintenance.DoesNotExist()
+    return _serialize(m)
+
 
+def _serialize(m: Maintenance) -> dict:
     data = {
         'codigo': _format_field_for_template(m.codigo or str(m.id)),
         'description': _format_field_for_template(m.description),
@@ -67,3 +100,94 @@ def serialize_maintenance(maintenance_id: int) -> dict:
     }
 
     return data
+
+
+def _iter_instances(maintenances, chunk_size: int) -> Iterator[Maintenance]:
+    if isinstance(maintenances, QuerySet):
+        # Paginación por clave: en MySQL `.iterator()` no transmite
+        for chunk in keyset_chunks(with_report_relations(maintenances), chunk_size):
+            yield from chunk
+        return
+
+    pending = []
+    for item in maintenances:
+        if isinstance(item, Maintenance):
+            # Instancia ya cargada (idealmente con `with_report_relations`)
+            yield from _fetch_ids(pending)
+            pending = []
+            yield item
+            continue
+        pending.append(int(item))
+        if len(pending) >= chunk_size:
+            yield from _fetch_ids(pending)
+            pending = []
+    yield from _fetch_ids(pending)
+
+
+def _fetch_ids(ids, prefetch: bool = True) -> Iterator[Maintenance]:
+    """Mantenimientos de `ids` en ese orden (los inexistentes se omiten)."""
+    if not ids:
+        return
+    queryset = Maintenance.objects.filter(id__in=ids)
+    queryset = with_report_relations(queryset) if prefetch else queryset.select_related(*SELECT_RELATED)
+    by_id = queryset.in_bulk()
+    for mid in ids:
+        if mid in by_id:
+            yield by_id[mid]
+
+
+def _serialize_ids(ids) -> Iterator[dict]:
+    """Snapshots vigentes primero; el resto se serializa desde la base de datos."""
+    if not ids:
+        return
+    found = snapshot_fields(ids)
+    missing = [mid for mid in ids if mid not in found]
+    found.update((m.id, _serialize(m)) for m in _fetch_ids(missing, prefetch=False))
+    for mid in ids:
+        if mid in found:
+            yield found[mid]
+
+
+def serialize_maintenances(
+    maintenances: Union[QuerySet, Iterable[Union[int, Maintenance]]],
+    with_instances: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Union[dict, Tuple[Maintenance, dict]]]:
+    """
+    Versión por lotes de `serialize_maintenance`, perezosa.
+
+    `maintenances` puede ser un queryset (se recorre en orden de id, con
+    paginación por clave), una lista de IDs (se respeta ese orden; los
+    inexistentes se omiten) o instancias ya cargadas. Un queryset con slice se
+    lee como lista de IDs, en su orden.
+    Por cada bloque de `chunk_size` los mantenimientos con snapshot vigente se
+    leen con una consulta por PK y el resto con un solo `select_related`, así
+    el número de consultas no depende de la cantidad de mantenimientos.
+
+    Con `with_instances=True` produce `(maintenance, data)` con las instancias
+    cargadas junto con sus fotos y firmas, para reutilizarlas en el render.
+    """
+    if isinstance(maintenances, QuerySet) and maintenances.query.is_sliced:
+        # Un slice ya acota las filas y no admite reordenar: se respeta su orden
+        maintenances = list(maintenances.values_list('id', flat=True))
+    if with_instances:
+        for m in _iter_instances(maintenances, chunk_size):
+            yield m, _serialize(m)
+        return
+
+    if isinstance(maintenances, QuerySet):
+        maintenances = (
+            mid for chunk in keyset_chunks(maintenances.values_list('id'), chunk_size) for (mid,) in chunk
+        )
+    pending = []
+    for item in maintenances:
+        if isinstance(item, Maintenance):
+            yield from _serialize_ids(pending)
+            pending = []
+            yield _serialize(item)
+            continue
+        pending.append(int(item))
+        if len(pending) >= chunk_size:
+            yield from _serialize_ids(pending)
+            pending = []
+    yield from _serialize_ids(pending)
@@ -0,0 +1,112 @@
+"""
+Snapshot de reporte de un mantenimiento completado.
+
+Cuando un `Maintenance` pasa a `completed` se guarda en `MaintenanceSnapshot`
+el dict de `serialize_maintenance` (`fields`) junto con las referencias de
+fotos y firmas (nombres en storage). Lo leen por PK, sin JOINs ni formateo
+campo a campo, `serialize_maintenance(s)` y con ellos todos los renders con
+plantilla HTML: reporte individual, lote/ZIP de `generate_from_template`,
+paquete con `template_id` y datos de ejemplo.
+
+Quedan fuera a propósito:
+- MaintenanceReportPDF y las rutinas Excel usan la instancia (fotos, firmas,
+  campos sin formatear) y ya la cargan para la clave de `render_cache`, que
+  guarda el documento terminado; leer además el snapshot sería otra consulta.
+- `maintenance_export` y `analytics_export` exportan valores tipados (fechas,
+  decimales) de todos los estados con una proyección `values()`, no el texto
+  formateado de los completados.
+
+Los signals lo regeneran cuando el mantenimiento o sus fotos/firmas cambian y
+lo eliminan si deja de estar completado. Como el snapshot también copia datos
+del equipo, del técnico y de la ubicación, `invalidate_snapshots` descarta los
+snapshots afectados cuando se editan esos registros: hasta el próximo guardado
+del mantenimiento (o `build_maintenance_snapshots`) se serializa en vivo. Las
+escrituras que no disparan signals (`bulk_update`, `QuerySet.update`) deben
+llamar a `invalidate_snapshots`/`refresh_snapshots` por su cuenta.
+`revision` cuenta las regeneraciones.
+"""
+import logging
+from typing import Any, Dict, Iterable
+
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import Maintenance, MaintenanceSnapshot
+
+from .maintenance_serializer import SNAPSHOT_SCHEMA, _serialize, with_report_relations
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_STATUSES = ('completed',)
+
+
+def _file_name(field_file):
+    return field_file.name if field_file else None
+
+
+def build_snapshot_data(maintenance: Maintenance) -> Dict[str, Any]:
+    return {
+        'fields': _serialize(maintenance),
+        'photos': [
+            {'id': p.pk, 'name': _file_name(p.photo), 'caption': p.caption}
+            for p in maintenance.photos.all()
+        ],
+        'signatures': [
+            {'id': s.pk, 'name': _file_name(s.signature_image), 'signer_name': s.signer_name, 'signer_role': s.signer_role}
+            for s in maintenance.signatures.all()
+        ],
+        'second_signatures': [
+            {'id': s.pk, 'name': _file_name(s.signature_image), 'signer_name': s.signer_name, 'signer_role': s.signer_role}
+            for s in maintenance.second_signatures.all()
+        ],
+    }
+
+
+def refresh_snapshot(maintenance_id: int):
+    """Regenera (o elimina, si ya no está completado) el snapshot de un mantenimiento."""
+    maintenance = with_report_relations(Maintenance.objects.filter(pk=maintenance_id)).first()
+    if maintenance is None or maintenance.status not in SNAPSHOT_STATUSES:
+        MaintenanceSnapshot.objects.filter(pk=maintenance_id).delete()
+        return None
+
+    data = build_snapshot_data(maintenance)
+    snapshot, created = MaintenanceSnapshot.objects.get_or_create(
+        maintenance_id=maintenance.pk,
+        defaults={
+            'data': data,
+            'schema_version': SNAPSHOT_SCHEMA,
+            'source_updated_at': maintenance.updated_at,
+        },
+    )
+    if not created:
+        MaintenanceSnapshot.objects.filter(pk=maintenance.pk).update(
+            data=data,
+            schema_version=SNAPSHOT_SCHEMA,
+            source_updated_at=maintenance.updated_at,
+            revision=F('revision') + 1,
+            updated_at=timezone.now(),
+        )
+    return snapshot
+
+
+def refresh_snapshots(maintenance_ids: Iterable[int]) -> int:
+    """Regenera varios snapshots (p. ej. tras una importación masiva, que no dispara signals)."""
+    count = 0
+    for maintenance_id in maintenance_ids:
+        try:
+            if refresh_snapshot(maintenance_id) is not None:
+                count += 1
+        except Exception as e:
+            logger.warning('No se pudo generar el snapshot del mantenimiento %s: %s', maintenance_id, e)
+    return count
+
+
+def invalidate_snapshots(**filters) -> int:
+    """
+    Elimina los snapshots de los mantenimientos que cumplen `filters` (p. ej.
+    `equipment_id=...`, `technician_id=...`, `sede_rel_id=...`). Devuelve cuántos.
+    """
+    deleted, _ = MaintenanceSnapshot.objects.filter(
+        maintenance_id__in=Maintenance.objects.filter(**filters).values('id')
+    ).delete()
+    return deleted
@@ -0,0 +1,172 @@
+"""
+Lectura de imágenes (fotos y firmas) para los generadores de reportes.
+
+- Un cliente S3 por proceso y endpoint, con pool de conexiones (los clientes
+  boto3 son thread-safe), en lugar de abrir cada archivo con `FieldFile.read()`.
+- Una `requests.Session` compartida para recursos referenciados por URL.
+- `prefetch_media` descarga en paralelo (thread pool) todas las imágenes de uno
+  o varios mantenimientos antes de renderizar; los generadores toman los bytes
+  del dict resultante y solo leen del storage lo que falte. Para lotes grandes
+  `media_batches` carga y precarga por bloques de `MEDIA_PREFETCH_CHUNK`
+  mantenimientos, así en memoria solo están las imágenes del bloque actual.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_s3_clients = {}
+_http_session: Optional[requests.Session] = None
+
+
+def _pool_size() -> int:
+    return int(getattr(settings, 'MEDIA_FETCH_POOL_SIZE', 16))
+
+
+def _max_workers() -> int:
+    return int(getattr(settings, 'MEDIA_FETCH_WORKERS', 8))
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, 'MEDIA_PREFETCH_CHUNK', 25))
+
+
+def get_http_session() -> requests.Session:
+    """Sesión HTTP compartida (keep-alive + pool) para descargar recursos por URL."""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=_pool_size(), pool_maxsize=_pool_size())
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def is_s3_storage(storage) -> bool:
+    return bool(getattr(storage, 'bucket_name', None)) and hasattr(storage, 'connection')
+
+
+def storage_object_key(storage, name: str) -> str:
+    """Clave S3 de un archivo del storage (nombre del FileField + `location`)."""
+    location = (getattr(storage, 'location', '') or '').strip('/')
+    return f'{location}/{name}' if location else name
+
+
+def get_s3_client(storage):
+    """Cliente S3 compartido para el endpoint/credenciales del storage dado."""
+    key = (
+        getattr(storage, 'endpoint_url', None),
+        getattr(storage, 'access_key', None),
+        getattr(storage, 'region_name', None),
+    )
+    client = _s3_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _s3_clients.get(key)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+
+                client = boto3.session.Session().client(
+                    's3',
+                    endpoint_url=getattr(storage, 'endpoint_url', None),
+                    aws_access_key_id=getattr(storage, 'access_key', None),
+                    aws_secret_access_key=getattr(storage, 'secret_key', None),
+                    aws_session_token=getattr(storage, 'security_token', None),
+                    region_name=getattr(storage, 'region_name', None),
+                    use_ssl=getattr(storage, 'use_ssl', True),
+                    verify=getattr(storage, 'verify', None),
+                    config=Config(
+                        max_pool_connections=_pool_size(),
+                        signature_version=getattr(storage, 'signature_version', None),
+                        s3={'addressing_style': getattr(storage, 'addressing_style', None)},
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                    ),
+                )
+                _s3_clients[key] = client
+    return client
+
+
+def read_field_bytes(field_file) -> bytes:
+    """Lee el contenido completo de un FieldFile (ruta local, S3/MinIO o storage genérico)."""
+    storage = field_file.storage
+    name = field_file.name
+    if is_s3_storage(storage):
+        resp = get_s3_client(storage).get_object(Bucket=storage.bucket_name, Key=storage_object_key(storage, name))
+        return resp['Body'].read()
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path and os.path.exists(path):
+        with open(path, 'rb') as fh:
+            return fh.read()
+    with storage.open(name, 'rb') as fh:
+        return fh.read()
+
+
+def media_fields(maintenance) -> List:
+    """FieldFiles de imagen usados por los reportes: fotos, firma y segunda firma."""
+    fields = [p.photo for p in maintenance.photos.all() if p.photo]
+    for related in (maintenance.signatures.all(), maintenance.second_signatures.all()):
+        first = next(iter(related), None)
+        if first is not None and first.signature_image:
+            fields.append(first.signature_image)
+    return fields
+
+
+def prefetch_media(maintenances: Iterable, max_workers: Optional[int] = None) -> Dict[str, bytes]:
+    """
+    Descarga en paralelo las imágenes de los mantenimientos dados.
+
+    Devuelve `{nombre_del_archivo: bytes}`; los archivos que fallan se omiten
+    (el generador reintenta la lectura individual al embeber).
+    """
+    unique = {}
+    for maintenance in maintenances:
+        for field_file in media_fields(maintenance):
+            unique.setdefault(field_file.name, field_file)
+    if not unique:
+        return {}
+
+    def _fetch(item):
+        name, field_file = item
+        try:
+            return name, read_field_bytes(field_file)
+        except Exception as e:
+            logger.warning('No se pudo precargar %s: %s', name, e)
+            return name, None
+
+    workers = max(1, min(max_workers or _max_workers(), len(unique)))
+    if workers == 1:
+        results = map(_fetch, unique.items())
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-prefetch') as pool:
+            results = list(pool.map(_fetch, unique.items()))
+    return {name: data for name, data in results if data is not None}
+
+
+def media_batches(queryset, ids: List[int], chunk_size: Optional[int] = None,
+                  max_workers: Optional[int] = None) -> Iterator[Tuple[List, Dict[str, bytes]]]:
+    """
+    Recorre `ids` (en ese orden) por bloques: carga cada bloque desde `queryset`
+    (con sus `select_related`/`prefetch_related`) y precarga sus imágenes.
+    Devuelve `(mantenimientos, media)` por bloque.
+    """
+    size = max(1, chunk_size or _chunk_size())
+    for start in range(0, len(ids), size):
+        block = ids[start:start + size]
+        by_id = queryset.in_bulk(block)
+        maintenances = [by_id[pk] for pk in block if pk in by_id]
+        yield maintenances, prefetch_media(maintenances, max_workers)
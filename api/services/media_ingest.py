@@ -0,0 +1,164 @@
+"""
+Ingesta de fotos y firmas al crearlas (`Photo`, `Signature`, `SecondSignature`).
+
+Antes de que el FileField suba el archivo:
+
+- se calcula el SHA-256 de lo subido; si otra fila del mismo modelo ya tiene
+  ese hash se reutiliza su objeto en el storage (no se sube ni re-codifica);
+- si no, la imagen se orienta según EXIF (`exif_transpose`), se descartan los
+  metadatos (EXIF/GPS, ICC, comentarios), se reduce al lado máximo del tipo
+  (`MEDIA_INGEST_PHOTO_MAX_PX` / `MEDIA_INGEST_SIGNATURE_MAX_PX`) y se
+  re-codifica en `MEDIA_INGEST_FORMAT` ('JPEG' o 'WEBP') bajando calidad y
+  tamaño hasta quedar por debajo de `MEDIA_INGEST_MAX_BYTES`. Con JPEG, las
+  imágenes con transparencia (firmas) se guardan como PNG.
+
+Lo invoca el signal `pre_save` de los tres modelos y, como `bulk_create` no
+dispara signals, la importación masiva llama a `ingest_instance` directamente.
+En las cargas directas a MinIO los bytes no pasan por la API al subir:
+`direct_uploads.complete_upload` descarga el objeto ya completado y aplica el
+mismo dedupe y normalización (`find_duplicate`, `normalize_image`).
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PILImage, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = {
+    'Photo': 'photo',
+    'Signature': 'signature_image',
+    'SecondSignature': 'signature_image',
+}
+QUALITY_STEPS = (85, 78, 70, 62, 55)
+MIN_SIDE = 320
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp', 'PNG': '.png'}
+CONTENT_TYPES = {'.jpg': 'image/jpeg', '.webp': 'image/webp', '.png': 'image/png'}
+
+
+def ingest_enabled() -> bool:
+    return bool(getattr(settings, 'MEDIA_INGEST_ENABLED', True))
+
+
+def _output_format() -> str:
+    fmt = str(getattr(settings, 'MEDIA_INGEST_FORMAT', 'JPEG')).upper()
+    return fmt if fmt in ('JPEG', 'WEBP') else 'JPEG'
+
+
+def _max_bytes() -> int:
+    return int(getattr(settings, 'MEDIA_INGEST_MAX_BYTES', 600 * 1024))
+
+
+def _max_px(model_name: str) -> int:
+    if model_name == 'Photo':
+        return int(getattr(settings, 'MEDIA_INGEST_PHOTO_MAX_PX', 1920))
+    return int(getattr(settings, 'MEDIA_INGEST_SIGNATURE_MAX_PX', 800))
+
+
+def _encode(img, fmt: str, quality: int) -> bytes:
+    out = BytesIO()
+    if fmt == 'PNG':
+        img.save(out, 'PNG', optimize=True)
+    elif fmt == 'WEBP':
+        img.save(out, 'WEBP', quality=quality, method=4)
+    else:
+        img.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def normalize_image(data: bytes, max_px: int, fmt: Optional[str] = None,
+                    max_bytes: Optional[int] = None) -> Optional[Tuple[bytes, str]]:
+    """
+    Orienta, limpia metadatos, reduce y re-codifica. Devuelve (bytes, extensión)
+    o None si `data` no es una imagen legible.
+    """
+    fmt = fmt or _output_format()
+    max_bytes = max_bytes or _max_bytes()
+    try:
+        with PILImage.open(BytesIO(data)) as src:
+            src.seek(0)
+            img = ImageOps.exif_transpose(src)
+            has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+    except (OSError, ValueError, PILImage.DecompressionBombError) as e:
+        logger.warning('Imagen no procesable, se guarda tal cual: %s', e)
+        return None
+
+    # Sin EXIF/ICC/comentarios: solo píxeles
+    img.info = {}
+    if has_alpha and fmt == 'JPEG':
+        fmt = 'PNG'
+    img.thumbnail((max_px, max_px), PILImage.LANCZOS)
+
+    while True:
+        for quality in (QUALITY_STEPS if fmt != 'PNG' else (None,)):
+            encoded = _encode(img, fmt, quality)
+            if len(encoded) <= max_bytes:
+                return encoded, EXTENSIONS[fmt]
+        if max(img.size) <= MIN_SIDE:
+            return encoded, EXTENSIONS[fmt]
+        img = img.resize((max(1, int(img.width * 0.75)), max(1, int(img.height * 0.75))), PILImage.LANCZOS)
+
+
+def _read_upload(field_file) -> bytes:
+    upload = field_file.file
+    if hasattr(upload, 'seek'):
+        upload.seek(0)
+    data = upload.read()
+    if hasattr(upload, 'seek'):
+        upload.seek(0)
+    return data
+
+
+def find_duplicate(model, field_name: str, digest: str, storage) -> Optional[str]:
+    """Nombre en storage de otra fila de `model` con el mismo hash, si el objeto sigue ahí."""
+    existing = (
+        model.objects.filter(content_hash=digest).exclude(**{field_name: ''})
+        .exclude(**{f'{field_name}__isnull': True})
+        .values_list(field_name, flat=True).first()
+    )
+    if not existing:
+        return None
+    try:
+        if storage.exists(existing):
+            return existing
+    except Exception:
+        logger.warning('No se pudo verificar %s en el storage', existing, exc_info=True)
+    return None
+
+
+def ingest_instance(instance) -> bool:
+    """
+    Procesa el archivo aún no guardado de `instance`. Devuelve True si reutilizó
+    un objeto existente o reemplazó el archivo por la versión normalizada.
+    """
+    model_name = type(instance).__name__
+    field_name = IMAGE_FIELDS.get(model_name)
+    if not field_name or not ingest_enabled():
+        return False
+    field_file = getattr(instance, field_name)
+    # Solo archivos nuevos (sin subir); los nombres ya en el storage se respetan
+    if not field_file or getattr(field_file, '_committed', True):
+        return False
+
+    data = _read_upload(field_file)
+    digest = hashlib.sha256(data).hexdigest()
+    instance.content_hash = digest
+
+    existing = find_duplicate(type(instance), field_name, digest, field_file.storage)
+    if existing:
+        setattr(instance, field_name, existing)
+        return True
+
+    normalized = normalize_image(data, _max_px(model_name))
+    if normalized is None:
+        return False
+    content, ext = normalized
+    base = os.path.splitext(os.path.basename(field_file.name or field_name))[0] or field_name
+    setattr(instance, field_name, ContentFile(content, name=f'{base}{ext}'))
+    return True
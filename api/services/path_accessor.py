@@ -0,0 +1,72 @@
+"""
+Rutas de acceso compiladas para los `map_to` de `fields_schema`.
+
+Una ruta como `photos[0].url` o `equipment.serial_number` se tokeniza una sola
+vez por proceso (`compile_path`, con caché) en una tupla de pasos
+`(clave, índice_entero | None)`; `resolve_path` solo recorre esos pasos.
+
+Semántica (la de los resolvers anteriores): en listas el paso debe ser un
+índice entero; en dicts se busca la clave y, si no existe, el índice entero
+como clave. Cualquier fallo devuelve None.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+Step = Tuple[str, Optional[int]]
+
+_SEPARATORS = re.compile(r'[.\[\]]')
+
+
+@lru_cache(maxsize=4096)
+def _compile(path: str) -> Tuple[Step, ...]:
+    steps = []
+    for token in _SEPARATORS.split(path):
+        if token == '':
+            continue
+        try:
+            index = int(token)
+        except ValueError:
+            index = None
+        steps.append((token, index))
+    return tuple(steps)
+
+
+def compile_path(path: Any) -> Optional[Tuple[Step, ...]]:
+    """'photos[0].url' -> (('photos', None), ('0', 0), ('url', None)); None si no hay ruta."""
+    if path is None or path == '':
+        return None
+    return _compile(str(path))
+
+
+def resolve_steps(obj: Any, steps: Tuple[Step, ...]) -> Any:
+    cur = obj
+    for token, index in steps:
+        if isinstance(cur, list):
+            if index is None:
+                return None
+            try:
+                cur = cur[index]
+            except IndexError:
+                return None
+        elif isinstance(cur, dict):
+            if token in cur:
+                cur = cur[token]
+            elif index is not None and index in cur:
+                cur = cur[index]
+            else:
+                return None
+        else:
+            return None
+    return cur
+
+
+def resolve_path(obj: Any, path: Any) -> Any:
+    """Valor en `obj` de una ruta con puntos/corchetes, o None si no se puede resolver."""
+    steps = compile_path(path)
+    if steps is None:
+        return None
+    try:
+        return resolve_steps(obj, steps)
+    except Exception:
+        return None
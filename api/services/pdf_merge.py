@@ -0,0 +1,52 @@
+"""
+Concatenación de PDFs ya renderizados (nivel de objetos de página, sin volver a
+renderizar) con un marcador/outline por documento.
+
+Requiere `pypdf`; si no está instalado `PdfWriter` queda en None y
+`merge_pdfs` lanza `PdfMergeUnavailable`.
+"""
+import io
+import tempfile
+from typing import BinaryIO, Iterable, Optional, Tuple, Union
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pragma: no cover - dependencia opcional
+    PdfReader = PdfWriter = None
+
+# Por encima de este tamaño el PDF consolidado pasa de memoria a disco
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+PdfPart = Tuple[Optional[str], Union[bytes, BinaryIO]]
+
+
+class PdfMergeUnavailable(RuntimeError):
+    pass
+
+
+def merge_available() -> bool:
+    return PdfWriter is not None
+
+
+def merge_pdfs(parts: Iterable[PdfPart], output: Optional[BinaryIO] = None) -> BinaryIO:
+    """
+    Une `parts` (`(titulo_del_marcador, pdf)`) en un solo PDF.
+
+    `parts` puede ser un generador: cada PDF se lee y se agrega en orden, en una
+    sola pasada. Si `output` no se indica se usa un archivo temporal (en memoria
+    hasta `SPOOL_MAX_SIZE`). Devuelve `output` posicionado al inicio.
+    """
+    if PdfWriter is None:
+        raise PdfMergeUnavailable('La unión de PDFs requiere el paquete pypdf')
+
+    writer = PdfWriter()
+    for title, pdf in parts:
+        stream = io.BytesIO(pdf) if isinstance(pdf, (bytes, bytearray)) else pdf
+        writer.append(PdfReader(stream), outline_item=title or None, import_outline=False)
+
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    writer.write(output)
+    writer.close()
+    output.seek(0)
+    return output
@@ -12,6 +12,9 @@ import openpyxl
 from openpyxl.drawing.image import Image as XLImage
 from django.conf import settings
 
+from .activity_matcher import ActivityMatcher
+from .media_fetch import prefetch_media, read_field_bytes
+
 
 class PrinterScannerExcelGenerator:
     """
@@ -73,16 +76,19 @@ class PrinterScannerExcelGenerator:
         if not os.path.exists(self.TEMPLATE_PATH):
             raise FileNotFoundError(f"Plantilla no encontrada: {self.TEMPLATE_PATH}")
 
-    def generate_report(self, maintenance) -> bytes:
+    def generate_report(self, maintenance, media=None) -> bytes:
         """
         Genera el reporte Excel para un mantenimiento de impresora/escáner.
         
         Args:
             maintenance: Objeto Maintenance
+            media: dict opcional {nombre_archivo: bytes} de `prefetch_media`
             
         Returns:
             bytes: Contenido del archivo Excel generado
         """
+        self._media = media if media is not None else prefetch_media([maintenance])
+
         wb = openpyxl.load_workbook(self.TEMPLATE_PATH)
         ws = wb.active
 
@@ -162,83 +168,57 @@ class PrinterScannerExcelGenerator:
 
     def _fill_scanner_activities(self, ws, maintenance):
         """Rellena actividades de escáner (filas 15-16)."""
-        activities = maintenance.activities or {}
+        values = self._activity_values(maintenance)
         
         for row, act_info in self.SCANNER_ACTIVITIES.items():
             if act_info['left']:
-                si_val, na_val = self._get_activity_value(activities, act_info['left'])
+                si_val, na_val = values[act_info['left']]
                 ws.cell(row=row, column=4).value = si_val  # D
                 ws.cell(row=row, column=5).value = na_val  # E
             
             if act_info.get('right'):
-                si_val, na_val = self._get_activity_value(activities, act_info['right'])
+                si_val, na_val = values[act_info['right']]
                 ws.cell(row=row, column=9).value = si_val   # I
                 ws.cell(row=row, column=10).value = na_val  # J
 
     def _fill_printer_activities(self, ws, maintenance):
         """Rellena actividades de impresoras (filas 21-28)."""
-        activities = maintenance.activities or {}
+        values = self._activity_values(maintenance)
         
         for row, act_info in self.PRINTER_ACTIVITIES.items():
             if act_info['left']:
-                si_val, na_val = self._get_activity_value(activities, act_info['left'])
+                si_val, na_val = values[act_info['left']]
                 ws.cell(row=row, column=4).value = si_val  # D
                 ws.cell(row=row, column=5).value = na_val  # E
             
             if act_info.get('right'):
-                si_val, na_val = self._get_activity_value(activities, act_info['right'])
+                si_val, na_val = values[act_info['right']]
                 ws.cell(row=row, column=9).value = si_val   # I
                 ws.cell(row=row, column=10).value = na_val  # J
 
-    def _get_activity_value(self, activities: dict, activity_name: str) -> tuple:
-        """Busca el valor de una actividad y retorna (si_value, na_value)."""
-        if not activities:
-            return ('', '')
-
-        activity_lower = activity_name.lower().strip()
-        
-        # Buscar por nombre exacto
-        for key, value in activities.items():
-            if key.lower().strip() == activity_lower:
-                return self._parse_activity_value(value)
-        
-        # Buscar por alias
-        aliases = self.ACTIVITY_ALIASES.get(activity_lower, [])
-        for alias in aliases:
-            for key, value in activities.items():
-                if key.lower().strip() == alias.lower():
-                    return self._parse_activity_value(value)
-
-        # Buscar coincidencia parcial
-        for key, value in activities.items():
-            if activity_lower in key.lower() or key.lower() in activity_lower:
-                return self._parse_activity_value(value)
-        
-        return ('', '')
-
-    def _parse_activity_value(self, value) -> tuple:
-        """Parsea valor de actividad y retorna (si, na)."""
-        if value is None:
-            return ('', '')
-        
-        if isinstance(value, bool):
-            return ('■', '') if value else ('', '■')
-        
-        if isinstance(value, str):
-            val_lower = value.lower().strip()
-            if val_lower in ('si', 'sí', 'yes', 'true', '1', 'x', '■'):
-                return ('■', '')
-            elif val_lower in ('no', 'false', '0'):
-                return ('', '■')
-            elif val_lower in ('na', 'n.a', 'n/a', 'n.a.'):
-                return ('', '■')
-        
-        if isinstance(value, dict):
-            si = '■' if value.get('si') or value.get('SI') else ''
-            na = '■' if value.get('na') or value.get('NA') or value.get('n.a') else ''
-            return (si, na)
-        
-        return ('', '')
+    @classmethod
+    def activity_matcher(cls) -> ActivityMatcher:
+        """Matcher de actividades compilado una vez por clase."""
+        matcher = cls.__dict__.get('_activity_matcher')
+        if matcher is None:
+            names = [
+                name
+                for rows in (cls.SCANNER_ACTIVITIES, cls.PRINTER_ACTIVITIES)
+                for info in rows.values()
+                for name in (info['left'], info.get('right'))
+                if name
+            ]
+            matcher = ActivityMatcher(names, cls.ACTIVITY_ALIASES, partial='contains')
+            cls._activity_matcher = matcher
+        return matcher
+
+    def _activity_values(self, maintenance) -> dict:
+        """(si, na) de todas las actividades, calculado una vez por reporte."""
+        cached = getattr(self, '_activity_cache', None)
+        if cached is None or cached[0] is not maintenance:
+            cached = (maintenance, self.activity_matcher().match(maintenance.activities))
+            self._activity_cache = cached
+        return cached[1]
 
     def _fill_observations(self, ws, maintenance):
         """Rellena observaciones."""
@@ -327,16 +307,10 @@ class PrinterScannerExcelGenerator:
     def _embed_image(self, ws, image_field, anchor_cell: str, max_width: int = 150, max_height: int = 100):
         """Embebe una imagen en la hoja."""
         try:
-            if hasattr(image_field, 'path'):
-                img_path = image_field.path
-                if os.path.exists(img_path):
-                    pil_img = Image.open(img_path)
-                else:
-                    img_bytes = image_field.read()
-                    pil_img = Image.open(BytesIO(img_bytes))
-            else:
-                img_bytes = image_field.read()
-                pil_img = Image.open(BytesIO(img_bytes))
+            img_bytes = self._media.get(image_field.name) if getattr(self, '_media', None) else None
+            if img_bytes is None:
+                img_bytes = read_field_bytes(image_field)
+            pil_img = Image.open(BytesIO(img_bytes))
             
             pil_img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
             
@@ -353,9 +327,9 @@ class PrinterScannerExcelGenerator:
             raise
 
 
-def generate_printer_scanner_report(maintenance) -> bytes:
+def generate_printer_scanner_report(maintenance, media=None) -> bytes:
     """
     Función de conveniencia para generar reporte de impresora/escáner.
     """
     generator = PrinterScannerExcelGenerator()
-    return generator.generate_report(maintenance)
+    return generator.generate_report(maintenance, media=media)
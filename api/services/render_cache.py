@@ -0,0 +1,281 @@
+"""
+Caché en storage de los reportes de mantenimiento ya renderizados (PDF
+ReportLab y rutina Excel).
+
+La clave incluye `updated_at` del mantenimiento y del equipo y la ubicación
+relacionados, el nombre y correo del técnico, los IDs y nombres en storage de
+fotos y firmas, la versión del encabezado activo y la variante (encabezado del
+formato, tipo de rutina). Un cambio en esos datos produce una clave nueva; lo
+que la clave no cubre (p. ej. una escritura sin `updated_at` sobre otra tabla)
+se corrige con `REPORT_RENDER_CACHE = False` o vaciando el prefijo.
+
+Las entradas viejas no se reutilizan: `stale_render_entries` las identifica
+(más antiguas que el último cambio de su mantenimiento o que
+`REPORT_RENDER_CACHE_DAYS`) y `gc_reports` las elimina.
+"""
+import hashlib
+import json
+import logging
+import re
+from datetime import timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .media_fetch import _chunk_size, get_s3_client, is_s3_storage, prefetch_media, storage_object_key
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'reports/cache'
+_ENTRY_NAME = re.compile(r'maintenance_(\d+)_[0-9a-f]+\.\w+$')
+# Relaciones cuyo `updated_at` forma parte de la clave
+RELATED_STAMPS = ('equipment', 'sede_rel', 'dependencia_rel', 'subdependencia')
+# Subir cuando cambie el layout de MaintenanceReportPDF / las rutinas Excel
+RENDERER_VERSION = 'reportlab-1'
+EXCEL_RENDERER_VERSION = 'xlsx-1'
+
+# Encabezados de los formatos GTI-F-015 (cómputo) y GTI-F-016 (impresoras/escáneres),
+# por `Maintenance.maintenance_type`
+FORMAT_HEADERS = {
+    'computer': {
+        'codigo': 'GTI-F-015',
+        'version': '03',
+        'vigencia': '18-Jul-19',
+        'organization': 'ALCALDÍA DE PASTO',
+        'department': 'GESTIÓN DE TECNOLOGÍAS DE LA INFORMACIÓN'
+    },
+    'printer_scanner': {
+        'codigo': 'GTI-F-016',
+        'version': '02',
+        'vigencia': '18-Jul-19',
+        'organization': 'ALCALDÍA DE PASTO',
+        'department': 'GESTIÓN DE TECNOLOGÍAS DE LA INFORMACIÓN'
+    },
+}
+
+PRINTER_SCANNER_HINTS = ('impresora', 'escaner', 'scanner', 'printer')
+
+
+def cache_enabled() -> bool:
+    return bool(getattr(settings, 'REPORT_RENDER_CACHE', True))
+
+
+def is_printer_scanner(maintenance) -> bool:
+    """La rutina Excel que corresponde al equipo es la de impresoras/escáneres."""
+    equipment = getattr(maintenance, 'equipment', None)
+    equipment_type = (getattr(equipment, 'equipment_type', None) or maintenance.equipment_type or '').lower()
+    return any(hint in equipment_type for hint in PRINTER_SCANNER_HINTS)
+
+
+def _updated_at(obj) -> str:
+    value = getattr(obj, 'updated_at', None)
+    return value.isoformat() if value else ''
+
+
+def maintenance_render_key(maintenance, kind: str = 'pdf', variant: Optional[Dict[str, Any]] = None) -> str:
+    """Ruta en storage del render de `maintenance` para su estado actual."""
+    from .report_styles import get_header_assets
+
+    technician = getattr(maintenance, 'technician', None)
+    parts = [
+        RENDERER_VERSION if kind == 'pdf' else EXCEL_RENDERER_VERSION,
+        json.dumps(variant, sort_keys=True, default=str) if variant else '',
+        str(get_header_assets().get('stamp', '')),
+        maintenance.updated_at.isoformat() if maintenance.updated_at else '',
+        *(_updated_at(getattr(maintenance, name, None)) for name in RELATED_STAMPS),
+        f'{technician.pk}:{technician.get_full_name()}:{technician.email}' if technician else '',
+        ','.join(f'{p.pk}:{p.photo.name}' for p in maintenance.photos.all()),
+        ','.join(f'{s.pk}:{s.signature_image.name}' for s in maintenance.signatures.all()),
+        ','.join(f'{s.pk}:{s.signature_image.name}' for s in maintenance.second_signatures.all()),
+    ]
+    digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+    return f'{CACHE_PREFIX}/maintenance_{maintenance.pk}_{digest}.{kind}'
+
+
+def get_cached_render(key: str) -> Optional[bytes]:
+    try:
+        if not default_storage.exists(key):
+            return None
+        with default_storage.open(key, 'rb') as fh:
+            return fh.read()
+    except Exception as e:
+        logger.warning('No se pudo leer el render en caché %s: %s', key, e)
+        return None
+
+
+def store_render(key: str, data: bytes) -> None:
+    try:
+        if not default_storage.exists(key):
+            default_storage.save(key, ContentFile(data))
+    except Exception as e:
+        logger.warning('No se pudo guardar el render en caché %s: %s', key, e)
+
+
+def _cached_render(key: Optional[str], render) -> bytes:
+    if key:
+        cached = get_cached_render(key)
+        if cached:
+            return cached
+    data = render()
+    if key:
+        store_render(key, data)
+    return data
+
+
+def render_maintenance_pdf(maintenance, use_cache: Optional[bool] = None, header_config: Optional[Dict[str, Any]] = None,
+                           media: Optional[Dict[str, bytes]] = None) -> bytes:
+    """
+    PDF (ReportLab) de un mantenimiento, reutilizando el render en caché si está
+    vigente. `media` son las imágenes precargadas (ver `pdf_render_blocks`).
+    """
+    from api.reports import MaintenanceReportPDF
+
+    use_cache = cache_enabled() if use_cache is None else use_cache
+    key = maintenance_render_key(maintenance, variant=header_config) if use_cache else None
+    return _cached_render(
+        key, lambda: MaintenanceReportPDF(maintenance, header_config=header_config, media=media).generate().getvalue()
+    )
+
+
+def pdf_render_blocks(maintenances: Iterable, chunk_size: Optional[int] = None,
+                      header_config: Optional[Dict[str, Any]] = None,
+                      use_cache: Optional[bool] = None) -> Iterator[Tuple[List, Dict[str, bytes]]]:
+    """
+    Recorre `maintenances` (ya cargados con `with_report_relations`) por bloques
+    de `MEDIA_PREFETCH_CHUNK` y devuelve `(bloque, media)`, con las imágenes
+    precargadas en paralelo de los que no tienen un render vigente en caché,
+    para pasarlas a `render_maintenance_pdf(..., media=media)`.
+    """
+    use_cache = cache_enabled() if use_cache is None else use_cache
+    size = max(1, chunk_size or _chunk_size())
+    iterator = iter(maintenances)
+    while True:
+        block = list(islice(iterator, size))
+        if not block:
+            return
+        pending = block
+        if use_cache:
+            pending = []
+            for maintenance in block:
+                key = maintenance_render_key(maintenance, variant=header_config)
+                try:
+                    cached = default_storage.exists(key)
+                except Exception:
+                    cached = False
+                if not cached:
+                    pending.append(maintenance)
+        yield block, prefetch_media(pending) if pending else {}
+
+
+def ensure_maintenance_pdf(maintenance, header_config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Ruta en storage del PDF vigente de un mantenimiento, renderizándolo si falta,
+    para entregarlo sin pasar los bytes por la aplicación. None si el caché
+    está desactivado o no se pudo guardar.
+    """
+    from api.reports import MaintenanceReportPDF
+
+    if not cache_enabled():
+        return None
+    key = maintenance_render_key(maintenance, variant=header_config)
+    try:
+        if default_storage.exists(key):
+            return key
+    except Exception as e:
+        logger.warning('No se pudo consultar el render en caché %s: %s', key, e)
+        return None
+    store_render(key, MaintenanceReportPDF(maintenance, header_config=header_config).generate().getvalue())
+    try:
+        return key if default_storage.exists(key) else None
+    except Exception:
+        return None
+
+
+def render_maintenance_excel(maintenance, printer_scanner: Optional[bool] = None, use_cache: Optional[bool] = None,
+                             media: Optional[Dict[str, bytes]] = None) -> bytes:
+    """Rutina Excel (cómputo o impresoras/escáneres) de un mantenimiento, desde caché si está vigente."""
+    if printer_scanner is None:
+        printer_scanner = is_printer_scanner(maintenance)
+    if printer_scanner:
+        from .printer_scanner_excel_generator import PrinterScannerExcelGenerator as generator_class
+    else:
+        from .excel_report_generator import ExcelReportGenerator as generator_class
+
+    use_cache = cache_enabled() if use_cache is None else use_cache
+    variant = {'rutina': 'printer_scanner' if printer_scanner else 'computer'}
+    key = maintenance_render_key(maintenance, kind='xlsx', variant=variant) if use_cache else None
+    return _cached_render(key, lambda: generator_class().generate_report(maintenance, media=media))
+
+
+def _iter_cache_entries(storage) -> Iterator[Tuple[str, int, Any]]:
+    """(nombre, tamaño, fecha de modificación) de los renders en caché."""
+    if is_s3_storage(storage):
+        prefix = storage_object_key(storage, CACHE_PREFIX) + '/'
+        strip = len(storage_object_key(storage, ''))
+        paginator = get_s3_client(storage).get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][strip:], obj['Size'], obj['LastModified']
+        return
+    try:
+        _, files = storage.listdir(CACHE_PREFIX)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for filename in files:
+        name = f'{CACHE_PREFIX}/{filename}'
+        yield name, storage.size(name), storage.get_modified_time(name)
+
+
+def _source_changed_at(maintenance_ids) -> Dict[int, Any]:
+    """Último `updated_at` del mantenimiento, su equipo y su ubicación, por id."""
+    from api.models import Maintenance
+
+    fields = ['updated_at'] + [f'{name}__updated_at' for name in RELATED_STAMPS]
+    changed = {}
+    for row in Maintenance.objects.filter(id__in=maintenance_ids).values_list('id', *fields):
+        stamps = [value for value in row[1:] if value]
+        changed[row[0]] = max(stamps) if stamps else None
+    return changed
+
+
+def stale_render_entries(max_age_days: Optional[int] = None, storage=None, now=None,
+                         batch_size: int = 1000) -> List[Tuple[str, int]]:
+    """
+    Renders que ya no se servirán: de mantenimientos inexistentes (o archivados),
+    anteriores al último cambio de su mantenimiento/equipo/ubicación, o más
+    antiguos que `REPORT_RENDER_CACHE_DAYS` (30 por defecto). Devuelve (nombre, tamaño).
+    """
+    storage = storage or default_storage
+    now = now or timezone.now()
+    max_age = int(getattr(settings, 'REPORT_RENDER_CACHE_DAYS', 30)) if max_age_days is None else max_age_days
+    cutoff = now - timedelta(days=max_age) if max_age else None
+
+    stale: List[Tuple[str, int]] = []
+    pending: List[Tuple[int, str, int, Any]] = []
+
+    def _flush():
+        changed = _source_changed_at({mid for mid, _, _, _ in pending})
+        for mid, name, size, modified in pending:
+            if mid not in changed or (changed[mid] and modified < changed[mid]):
+                stale.append((name, size))
+        pending.clear()
+
+    for name, size, modified in _iter_cache_entries(storage):
+        match = _ENTRY_NAME.search(name)
+        if not match:
+            continue
+        if timezone.is_naive(modified):
+            modified = timezone.make_aware(modified)
+        if cutoff and modified < cutoff:
+            stale.append((name, size))
+            continue
+        pending.append((int(match.group(1)), name, size, modified))
+        if len(pending) >= batch_size:
+            _flush()
+    if pending:
+        _flush()
+    return stale
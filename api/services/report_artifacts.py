@@ -0,0 +1,247 @@
+"""
+Ciclo de vida de los archivos de `Report` (PDF/Excel/PNG en MinIO).
+
+- Al guardar (`attach_report_file` / `store_artifact`) se calcula el SHA-256 del
+  contenido; si otro report ya tiene un archivo con el mismo hash se reutiliza
+  su nombre en vez de subir otra copia. `content_hash`, `file_size` y
+  `expires_at` (`REPORT_TTL_DAYS`, 30 por defecto; 0 = sin vencimiento) quedan
+  en la fila.
+- `collect_report_garbage` elimina los reports vencidos y los reemplazados
+  (más allá de los `keep` más recientes por mantenimiento y tipo de reporte,
+  `report_kind`, con un margen de `grace_hours`). Los `keep` más recientes de
+  cada tipo nunca se eliminan aunque hayan vencido: el vencimiento solo aplica
+  a versiones anteriores y a reports sin mantenimiento. Un archivo solo se borra si ningún otro
+  report (activo o archivado) lo referencia; en S3 se borra con
+  `delete_objects` en lotes de hasta 1000 claves.
+- `evict_render_cache` borra del prefijo `reports/cache/` los renders que ya no
+  se servirán (`render_cache.stale_render_entries`).
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import ArchivedReport, Report
+
+from .media_fetch import get_s3_client, is_s3_storage, storage_object_key
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+S3_DELETE_MAX_KEYS = 1000
+
+
+def report_ttl_days() -> int:
+    return int(getattr(settings, 'REPORT_TTL_DAYS', 30))
+
+
+def _report_storage():
+    return Report._meta.get_field('pdf_file').storage
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def expiry_for_new_report(ttl_days: Optional[int] = None):
+    ttl = report_ttl_days() if ttl_days is None else ttl_days
+    return timezone.now() + timedelta(days=ttl) if ttl else None
+
+
+def store_artifact(name: str, content: bytes, storage=None) -> Tuple[str, str, int]:
+    """
+    Guarda `content` bajo `name` salvo que ya exista un archivo de report con el
+    mismo hash. Devuelve (nombre_en_storage, hash, tamaño).
+    """
+    storage = storage or _report_storage()
+    digest = content_hash(content)
+    existing = (
+        Report.objects.filter(content_hash=digest, pdf_file__gt='')
+        .order_by('-generated_at').values_list('pdf_file', flat=True).first()
+    )
+    if existing:
+        try:
+            if storage.exists(existing):
+                return existing, digest, len(content)
+        except Exception:
+            logger.warning('No se pudo verificar %s en el storage', existing, exc_info=True)
+    return storage.save(name, ContentFile(content)), digest, len(content)
+
+
+def attach_report_file(report: Report, filename: str, content: bytes, ttl_days: Optional[int] = None,
+                       save: bool = True) -> Report:
+    """Asocia `content` al `pdf_file` del report (con dedupe) y completa la metadata."""
+    field = Report._meta.get_field('pdf_file')
+    name, digest, size = store_artifact(field.generate_filename(report, filename), content, field.storage)
+    report.pdf_file.name = name
+    report.content_hash = digest
+    report.file_size = size
+    if report.expires_at is None:
+        report.expires_at = expiry_for_new_report(ttl_days)
+    if save:
+        report.save()
+    return report
+
+
+def report_kind(title: str, report_data, name: str) -> str:
+    """
+    Tipo de reporte para decidir qué versiones reemplazan a cuáles: el formato
+    (GTI-F-015/016...), si no la variante de encabezado, si no título y extensión.
+    """
+    data = report_data if isinstance(report_data, dict) else {}
+    if data.get('format'):
+        return f"format:{data['format']}"
+    header = data.get('header_config')
+    if header:
+        digest = hashlib.sha1(json.dumps(header, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+        return f'header:{digest}'
+    return f"title:{title or ''}|{os.path.splitext(name or '')[1].lower()}"
+
+
+def _maintenance_id_chunks(chunk_size: int) -> Iterator[List[int]]:
+    """Ids de mantenimientos con reports, por bloques (paginación por clave)."""
+    last = 0
+    while True:
+        ids = list(
+            Report.objects.filter(maintenance_id__gt=last).order_by('maintenance_id')
+            .values_list('maintenance_id', flat=True).distinct()[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def garbage_report_ids(keep: int = 1, grace_hours: int = 24, now=None,
+                       chunk_size: int = BATCH_SIZE) -> Dict[str, List[int]]:
+    """Ids de reports vencidos y reemplazados: {'expired': [...], 'superseded': [...]}."""
+    now = now or timezone.now()
+    grace_cutoff = now - timedelta(hours=grace_hours)
+    # Sin mantenimiento no hay versiones que proteger: solo cuenta el vencimiento
+    expired = list(
+        Report.objects.filter(maintenance__isnull=True, expires_at__lt=now).values_list('id', flat=True)
+    )
+    superseded = []
+
+    for maintenance_ids in _maintenance_id_chunks(chunk_size):
+        seen: Dict[Tuple[int, str], int] = {}
+        rows = (
+            Report.objects.filter(maintenance_id__in=maintenance_ids)
+            .order_by('maintenance_id', '-generated_at', '-id')
+            .values_list('id', 'maintenance_id', 'title', 'report_data', 'pdf_file', 'generated_at', 'expires_at')
+        )
+        for report_id, maintenance_id, title, report_data, name, generated_at, expires_at in rows:
+            key = (maintenance_id, report_kind(title, report_data, name))
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] <= keep:
+                continue
+            if expires_at and expires_at < now:
+                expired.append(report_id)
+            elif generated_at < grace_cutoff:
+                superseded.append(report_id)
+    return {'expired': expired, 'superseded': superseded}
+
+
+def delete_files(names: Iterable[str], storage=None) -> Tuple[int, List[str]]:
+    """Borra archivos del storage; en S3 por lotes de `delete_objects`. Devuelve (borrados, fallidos)."""
+    storage = storage or _report_storage()
+    names = list(names)
+    failed: List[str] = []
+    if is_s3_storage(storage):
+        client = get_s3_client(storage)
+        keys = {storage_object_key(storage, name): name for name in names}
+        key_list = list(keys)
+        for start in range(0, len(key_list), S3_DELETE_MAX_KEYS):
+            batch = key_list[start:start + S3_DELETE_MAX_KEYS]
+            response = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+            for error in response.get('Errors', []):
+                logger.warning('No se pudo borrar %s: %s', error.get('Key'), error.get('Message'))
+                failed.append(keys.get(error.get('Key'), error.get('Key')))
+    else:
+        for name in names:
+            try:
+                storage.delete(name)
+            except Exception:
+                logger.warning('No se pudo borrar %s', name, exc_info=True)
+                failed.append(name)
+    return len(names) - len(failed), failed
+
+
+def _file_size(storage, name: str, known: Optional[int]) -> int:
+    if known is not None:
+        return known
+    try:
+        return storage.size(name)
+    except Exception:
+        return 0
+
+
+def collect_report_garbage(keep: int = 1, grace_hours: int = 24, batch_size: int = BATCH_SIZE,
+                           dry_run: bool = False, storage=None, now=None) -> Dict[str, int]:
+    """
+    Elimina reports vencidos/reemplazados y los archivos que quedan sin referencias.
+    Devuelve {'expired', 'superseded', 'files', 'bytes', 'failed'}; con `dry_run`
+    solo calcula lo que se recuperaría.
+    """
+    storage = storage or _report_storage()
+    candidates = garbage_report_ids(keep=keep, grace_hours=grace_hours, now=now)
+    ids = candidates['expired'] + candidates['superseded']
+    result = {
+        'expired': len(candidates['expired']),
+        'superseded': len(candidates['superseded']),
+        'files': 0, 'bytes': 0, 'failed': 0,
+    }
+
+    doomed = set(ids)
+    handled = set()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        sizes: Dict[str, Optional[int]] = {}
+        for name, size in Report.objects.filter(id__in=batch, pdf_file__gt='').values_list('pdf_file', 'file_size'):
+            if name not in handled and sizes.get(name) is None:
+                sizes[name] = size
+
+        with transaction.atomic():
+            # Archivos compartidos (dedupe) con reports que se conservan o con el archivo histórico
+            live = {
+                name for name, report_id in Report.objects.filter(pdf_file__in=list(sizes))
+                .values_list('pdf_file', 'id') if report_id not in doomed
+            }
+            live |= set(ArchivedReport.objects.filter(pdf_file__in=list(sizes)).values_list('pdf_file', flat=True))
+            orphaned = [name for name in sizes if name not in live]
+            if not dry_run:
+                Report.objects.filter(id__in=batch).delete()
+
+        handled.update(sizes)
+        result['files'] += len(orphaned)
+        result['bytes'] += sum(_file_size(storage, name, sizes[name]) for name in orphaned)
+        if not dry_run and orphaned:
+            # Las filas ya no existen: si el borrado falla quedan archivos huérfanos, no enlaces rotos
+            _, failed = delete_files(orphaned, storage)
+            result['failed'] += len(failed)
+    return result
+
+
+def evict_render_cache(dry_run: bool = False, max_age_days: Optional[int] = None, storage=None) -> Dict[str, int]:
+    """Elimina los renders obsoletos de `render_cache`. Devuelve {'renders', 'bytes', 'failed'}."""
+    from django.core.files.storage import default_storage
+
+    from .render_cache import stale_render_entries
+
+    storage = storage or default_storage
+    entries = stale_render_entries(max_age_days=max_age_days, storage=storage)
+    result = {'renders': len(entries), 'bytes': sum(size for _, size in entries), 'failed': 0}
+    if not dry_run and entries:
+        _, failed = delete_files([name for name, _ in entries], storage)
+        result['failed'] = len(failed)
+    return result
@@ -1,21 +1,23 @@
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
 from io import BytesIO
 from django.conf import settings
 import os
 
+from ..report_styles import get_image_reader, get_report_styles
+from ..site_config import get_report_setting
+
 
 class PDFGenerator:
     def generate(self, data: dict, logo_path: str | None = None, primary_color: str | None = None) -> BytesIO:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
-        styles = getSampleStyleSheet()
+        shared = get_report_styles()
+        styles = shared.sample
         # Header: optional logo and title
         if not primary_color:
-            primary_color = getattr(settings, 'REPORT_PRIMARY_COLOR', None)
+            primary_color = get_report_setting('REPORT_PRIMARY_COLOR')
 
         # If logo_path provided or configured, draw it at header using reportlab canvas later
         elements.append(Paragraph('<b>REPORTE DE MANTENIMIENTO</b>', styles['Title']))
@@ -35,15 +37,7 @@ class PDFGenerator:
         ]
 
         table = Table(basic_data, colWidths=[150, 350])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table.setStyle(shared.basic_table)
 
         elements.append(table)
         elements.append(Spacer(1, 20))
@@ -62,15 +56,7 @@ class PDFGenerator:
                 ])
 
             act_table = Table(activity_data, colWidths=[30, 400, 70])
-            act_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            act_table.setStyle(shared.activity_table)
             elements.append(act_table)
             elements.append(Spacer(1, 20))
 
@@ -89,7 +75,7 @@ class PDFGenerator:
         # If logo_path is provided, attempt to draw it by creating a custom onFirstPage
         def _on_first_page(canvas_obj, doc_obj):
             # Draw logo if exists
-            lp = logo_path or getattr(settings, 'REPORT_LOGO_PATH', None)
+            lp = logo_path or get_report_setting('REPORT_LOGO_PATH')
             if lp:
                 try:
                     if not os.path.isabs(lp):
@@ -102,11 +88,12 @@ class PDFGenerator:
                     else:
                         candidate = lp
 
-                    if os.path.exists(candidate):
+                    logo = get_image_reader(candidate)
+                    if logo is not None:
                         # place logo at top-left with max width
                         max_w = 120
                         max_h = 50
-                        canvas_obj.drawImage(candidate, 40, doc_obj.pagesize[1] - max_h - 20, width=max_w, height=max_h, preserveAspectRatio=True, mask='auto')
+                        canvas_obj.drawImage(logo, 40, doc_obj.pagesize[1] - max_h - 20, width=max_w, height=max_h, preserveAspectRatio=True, mask='auto')
                 except Exception:
                     pass
 
@@ -0,0 +1,200 @@
+"""
+Fuente de imágenes (fotos y firmas) para los reportes ReportLab.
+
+Lee los archivos desde cualquier storage (local, S3/MinIO) con
+`media_fetch.read_field_bytes`, los reduce al tamaño en que se dibujan
+(`REPORT_IMAGE_DPI`) y guarda el resultado:
+
+- en memoria, como `ImageReader` ya decodificado (LRU acotado por bytes,
+  `REPORT_IMAGE_CACHE_BYTES`), y
+- en disco, como JPEG/PNG reducido (`REPORT_IMAGE_CACHE_DIR`, hasta
+  `REPORT_IMAGE_CACHE_FILES` archivos),
+
+así un lote de PDFs no descarga ni decodifica la imagen original en cada render.
+Los nombres de archivo de los FileField no se reutilizan, por eso sirven de clave.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Optional
+
+from django.conf import settings
+from PIL import Image as PILImage, ImageOps
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+
+from .media_fetch import read_field_bytes
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_memory: 'OrderedDict[str, tuple]' = OrderedDict()
+_memory_bytes = 0
+_disk_writes = 0
+
+
+def _dpi() -> int:
+    return int(getattr(settings, 'REPORT_IMAGE_DPI', 150))
+
+
+def _max_memory_bytes() -> int:
+    return int(getattr(settings, 'REPORT_IMAGE_CACHE_BYTES', 64 * 1024 * 1024))
+
+
+def _disk_dir() -> Optional[str]:
+    path = getattr(settings, 'REPORT_IMAGE_CACHE_DIR', None)
+    if path is False:
+        return None
+    return path or os.path.join(tempfile.gettempdir(), 'report-images')
+
+
+def _max_disk_files() -> int:
+    return int(getattr(settings, 'REPORT_IMAGE_CACHE_FILES', 2000))
+
+
+class CachedImage(Flowable):
+    """Flowable que dibuja un `ImageReader` compartido dentro de una caja fija."""
+
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, preserveAspectRatio=True, anchor='c', mask='auto')
+
+
+def _cache_key(name: str, width: float, height: float) -> str:
+    return hashlib.sha1(f'{name}|{int(width)}x{int(height)}@{_dpi()}'.encode('utf-8')).hexdigest()
+
+
+def _scale(data: bytes, width: float, height: float) -> bytes:
+    """Reduce la imagen para caber en width x height puntos a REPORT_IMAGE_DPI."""
+    max_px = (max(1, int(width / inch * _dpi())), max(1, int(height / inch * _dpi())))
+    with PILImage.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        img.thumbnail(max_px, PILImage.LANCZOS)
+        out = BytesIO()
+        if has_alpha:
+            img.save(out, 'PNG', optimize=True)
+        else:
+            img.save(out, 'JPEG', quality=85, optimize=True)
+        return out.getvalue()
+
+
+def _remember(key: str, reader: ImageReader) -> None:
+    global _memory_bytes
+    w, h = reader.getSize()
+    size = w * h * 4
+    with _lock:
+        if key in _memory:
+            return
+        _memory[key] = (reader, size)
+        _memory_bytes += size
+        while _memory_bytes > _max_memory_bytes() and len(_memory) > 1:
+            _, (_, old_size) = _memory.popitem(last=False)
+            _memory_bytes -= old_size
+
+
+def _read_disk(key: str) -> Optional[bytes]:
+    directory = _disk_dir()
+    if not directory:
+        return None
+    path = os.path.join(directory, key)
+    try:
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        os.utime(path, None)
+        return data
+    except OSError:
+        return None
+
+
+def _write_disk(key: str, data: bytes) -> None:
+    global _disk_writes
+    directory = _disk_dir()
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f'.{key}.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, os.path.join(directory, key))
+    except OSError as e:
+        logger.warning('No se pudo escribir la imagen en caché %s: %s', key, e)
+        return
+    _disk_writes += 1
+    if _disk_writes % 50 == 0:
+        _trim_disk(directory)
+
+
+def _trim_disk(directory: str) -> None:
+    """Borra los archivos menos usados cuando se supera REPORT_IMAGE_CACHE_FILES."""
+    try:
+        entries = [e for e in os.scandir(directory) if e.is_file() and not e.name.startswith('.')]
+    except OSError:
+        return
+    excess = len(entries) - _max_disk_files()
+    if excess <= 0:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:excess]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def get_report_image(field_file, width: float, height: float, media: Optional[Dict[str, bytes]] = None) -> Optional[ImageReader]:
+    """
+    `ImageReader` reducido para dibujar `field_file` en una caja de width x height
+    puntos. `media` es el dict de `media_fetch.prefetch_media` (bytes originales
+    ya descargados). Devuelve None si el archivo no existe o no es una imagen.
+    """
+    if not field_file or not getattr(field_file, 'name', None):
+        return None
+    key = _cache_key(field_file.name, width, height)
+    with _lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            return hit[0]
+
+    scaled = _read_disk(key)
+    if scaled is None:
+        try:
+            data = (media or {}).get(field_file.name) or read_field_bytes(field_file)
+            scaled = _scale(data, width, height)
+        except Exception as e:
+            logger.warning('No se pudo cargar la imagen %s: %s', field_file.name, e)
+            return None
+        _write_disk(key, scaled)
+
+    reader = ImageReader(BytesIO(scaled))
+    _remember(key, reader)
+    return reader
+
+
+def report_image(field_file, width: float, height: float, media: Optional[Dict[str, bytes]] = None) -> Optional[CachedImage]:
+    """Flowable listo para una tabla/story, o None si la imagen no está disponible."""
+    reader = get_report_image(field_file, width, height, media=media)
+    return CachedImage(reader, width, height) if reader is not None else None
+
+
+def clear_report_image_cache() -> None:
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
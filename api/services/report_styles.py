@@ -0,0 +1,250 @@
+"""
+Registro compartido de estilos y recursos para los reportes ReportLab.
+
+`getSampleStyleSheet()`, los `ParagraphStyle`/`TableStyle` y la decodificación
+del logo se construyen una sola vez por proceso en lugar de en cada PDF. Los
+objetos devueltos se comparten entre renders: no deben modificarse.
+
+Los recursos de encabezado (textos de `ReportTemplate.header_config` activo y
+su logo) se recargan cuando se guarda/elimina un `ReportTemplate` (signal) y,
+para otros procesos, como máximo cada `REPORT_HEADER_TTL` segundos.
+"""
+import logging
+import os
+import threading
+import time
+from io import BytesIO
+from types import MappingProxyType
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import TableStyle
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = colors.HexColor('#003366')
+
+DEFAULT_HEADER = MappingProxyType({
+    'organization': 'ALCALDÍA MUNICIPAL',
+    'department': 'Sistema de Gestión de Mantenimiento',
+    'codigo': 'GTI-F-015',
+    'version': '01',
+})
+
+_lock = threading.Lock()
+_styles = None
+_header: Optional[Dict[str, Any]] = None
+_header_loaded_at = 0.0
+_images: Dict[tuple, ImageReader] = {}
+_fonts_registered = False
+
+
+class ReportStyles:
+    """Estilos inmutables compartidos por los generadores ReportLab."""
+
+    def __init__(self):
+        sample = getSampleStyleSheet()
+        self.sample = sample
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=16,
+            textColor=PRIMARY,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+        self.heading = ParagraphStyle(
+            'CustomHeading',
+            parent=sample['Heading2'],
+            fontSize=12,
+            textColor=PRIMARY,
+            spaceAfter=10,
+            spaceBefore=15,
+            fontName='Helvetica-Bold'
+        )
+        self.normal = ParagraphStyle(
+            'CustomNormal',
+            parent=sample['Normal'],
+            fontSize=9,
+            alignment=TA_JUSTIFY
+        )
+        # Tablas de etiqueta/valor (columnas 0 y 2 son etiquetas)
+        self.info_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+            ('TEXTCOLOR', (0, 0), (0, -1), PRIMARY),
+            ('TEXTCOLOR', (2, 0), (2, -1), PRIMARY),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.photo_table = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ])
+        self.signature_table = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, 1), 5),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ])
+        self.incident_table = TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ])
+        # PDFGenerator (services/report_generators)
+        self.basic_table = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+        self.activity_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+
+def _register_fonts():
+    """Registra las fuentes TTF de `REPORT_FONTS` ({nombre: ruta}) una vez por proceso."""
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for name, path in (getattr(settings, 'REPORT_FONTS', None) or {}).items():
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+        except Exception as e:
+            logger.warning('No se pudo registrar la fuente %s (%s): %s', name, path, e)
+    _fonts_registered = True
+
+
+def get_report_styles() -> ReportStyles:
+    global _styles
+    if _styles is None:
+        with _lock:
+            if _styles is None:
+                _register_fonts()
+                _styles = ReportStyles()
+    return _styles
+
+
+def get_image_reader(path: Optional[str]) -> Optional[ImageReader]:
+    """`ImageReader` decodificado una vez por ruta local (se recarga si cambia el archivo)."""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    reader = _images.get(key)
+    if reader is None:
+        with open(path, 'rb') as fh:
+            reader = ImageReader(BytesIO(fh.read()))
+        with _lock:
+            for stale in [k for k in _images if k[0] == path]:
+                del _images[stale]
+            _images[key] = reader
+    return reader
+
+
+def _header_ttl() -> float:
+    return float(getattr(settings, 'REPORT_HEADER_TTL', 60))
+
+
+def _load_header() -> Dict[str, Any]:
+    from api.models import ReportTemplate
+
+    header = dict(DEFAULT_HEADER)
+    header['stamp'] = 'default'
+    logo = get_image_reader(os.path.join(settings.BASE_DIR, 'static', 'images', 'logo.png'))
+    try:
+        active = ReportTemplate.objects.filter(is_active=True).order_by('-updated_at').first()
+    except Exception:
+        active = None
+    if active is not None:
+        header['stamp'] = f'{active.pk}:{active.updated_at.isoformat() if active.updated_at else ""}'
+        header.update({k: v for k, v in (active.header_config or {}).items() if v not in (None, '')})
+        if active.logo:
+            try:
+                with active.logo.open('rb') as fh:
+                    logo = ImageReader(BytesIO(fh.read()))
+            except Exception as e:
+                logger.warning('No se pudo leer el logo de %s: %s', active, e)
+    header['logo'] = logo
+    return header
+
+
+def get_header_assets(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Textos y logo del encabezado: valores por defecto, `header_config` del
+    `ReportTemplate` activo y, encima, `overrides` (p. ej. config por request).
+    `logo` es un `ImageReader` o None; `logo_path` en overrides lo reemplaza.
+    `stamp` identifica la versión del encabezado (para claves de caché).
+    """
+    global _header, _header_loaded_at
+    now = time.monotonic()
+    if _header is None or now - _header_loaded_at > _header_ttl():
+        header = _load_header()
+        with _lock:
+            _header, _header_loaded_at = header, now
+    if not overrides:
+        return _header
+    merged = {**_header, **{k: v for k, v in overrides.items() if v not in (None, '')}}
+    if overrides.get('logo_path'):
+        merged['logo'] = get_image_reader(safe_logo_path(overrides['logo_path'])) or _header.get('logo')
+    return merged
+
+
+def _logo_roots():
+    roots = [settings.MEDIA_ROOT, os.path.join(settings.BASE_DIR, 'static'), getattr(settings, 'STATIC_ROOT', None)]
+    return [os.path.realpath(str(root)) for root in roots if root]
+
+
+def safe_logo_path(path) -> Optional[str]:
+    """
+    Ruta local de un logo pedido por config de request, solo si queda dentro de
+    MEDIA_ROOT o de los estáticos (las relativas se toman desde MEDIA_ROOT).
+    """
+    if not path or not isinstance(path, str):
+        return None
+    resolved = os.path.realpath(os.path.join(str(settings.MEDIA_ROOT), path))
+    for root in _logo_roots():
+        if resolved == root or resolved.startswith(root + os.sep):
+            return resolved
+    logger.warning('logo_path fuera de MEDIA_ROOT/static ignorado: %s', path)
+    return None
+
+
+def clear_header_assets() -> None:
+    global _header
+    with _lock:
+        _header = None
@@ -0,0 +1,95 @@
+"""
+Pre-render en segundo plano de los reportes de un mantenimiento completado.
+
+Al completar un mantenimiento (o cambiar sus fotos/firmas) se encola, después
+del commit, el render del PDF por defecto, el PDF con el encabezado de su
+formato (GTI-F-015/016) y la rutina Excel que le corresponde. Los resultados
+quedan en el caché de `render_cache`, de donde los sirven los endpoints de
+descarga mientras sigan vigentes.
+
+Se ejecuta en un `ThreadPoolExecutor` por proceso (`REPORT_PREWARM_WORKERS`,
+2 por defecto) y se desactiva con `REPORT_PREWARM = False`.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .render_cache import FORMAT_HEADERS, cache_enabled, render_maintenance_excel, render_maintenance_pdf
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+# Mantenimientos encolados que aún no empezaron a renderizarse
+_queued: Set[int] = set()
+
+
+def prewarm_enabled() -> bool:
+    return bool(getattr(settings, 'REPORT_PREWARM', True)) and cache_enabled()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = int(getattr(settings, 'REPORT_PREWARM_WORKERS', 2))
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='report-warmer')
+        return _executor
+
+
+def warm_maintenance_reports(maintenance_id: int) -> int:
+    """Renderiza (si no están en caché) los reportes de un mantenimiento completado."""
+    from api.models import Maintenance
+    from .maintenance_serializer import with_report_relations
+    from .maintenance_snapshot import SNAPSHOT_STATUSES
+
+    maintenance = with_report_relations(Maintenance.objects.filter(pk=maintenance_id)).first()
+    if maintenance is None or maintenance.status not in SNAPSHOT_STATUSES:
+        return 0
+
+    renders = [lambda: render_maintenance_pdf(maintenance, use_cache=True)]
+    header_config = FORMAT_HEADERS.get(maintenance.maintenance_type)
+    if header_config:
+        renders.append(lambda: render_maintenance_pdf(maintenance, use_cache=True, header_config=header_config))
+    renders.append(lambda: render_maintenance_excel(maintenance, use_cache=True))
+
+    done = 0
+    for render in renders:
+        try:
+            render()
+            done += 1
+        except Exception as e:
+            logger.warning('No se pudo pre-renderizar un reporte del mantenimiento %s: %s', maintenance_id, e)
+    return done
+
+
+def _run(maintenance_id: int) -> None:
+    with _lock:
+        _queued.discard(maintenance_id)
+    close_old_connections()
+    try:
+        warm_maintenance_reports(maintenance_id)
+    except Exception:
+        logger.exception('Error pre-renderizando los reportes del mantenimiento %s', maintenance_id)
+    finally:
+        # Los hilos del pool no pasan por el ciclo de request: cerrar su conexión
+        connection.close()
+
+
+def _submit(maintenance_id: int) -> None:
+    with _lock:
+        if maintenance_id in _queued:
+            return
+        _queued.add(maintenance_id)
+    _get_executor().submit(_run, maintenance_id)
+
+
+def schedule_report_warmup(maintenance_id: int) -> None:
+    """Encola el pre-render de los reportes de `maintenance_id` cuando la transacción confirme."""
+    if not prewarm_enabled():
+        return
+    transaction.on_commit(lambda: _submit(maintenance_id))
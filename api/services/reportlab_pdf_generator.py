@@ -1,4 +1,4 @@
-from django.template import Template as DjangoTemplate, Context
+from django.template import Context
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
@@ -7,6 +7,8 @@ import textwrap
 import re
 from typing import Optional, List, Dict, Any
 
+from .template_cache import get_compiled_template
+
 
 class ReportLabPDFGenerator:
     """Generador de PDF sencillo usando ReportLab como fallback cuando
@@ -31,9 +33,10 @@ class ReportLabPDFGenerator:
         data: Dict[str, Any],
         background_bytes: Optional[bytes] = None,
         overlays: Optional[List[Dict[str, Any]]] = None,
+        cache_key=None,
     ) -> io.BytesIO:
-        # Renderizar con motor de templates de Django
-        template = DjangoTemplate(html_content)
+        # Renderizar con motor de templates de Django (plantilla compilada en caché)
+        template = get_compiled_template(html_content, cache_key)
         context = Context(data)
         rendered = template.render(context)
 
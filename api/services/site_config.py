@@ -0,0 +1,127 @@
+"""
+Acceso en caché a la configuración del sitio (`SiteConfiguration`).
+
+La configuración JSON se carga una sola vez por proceso y se conserva en
+memoria. Para detectar cambios hechos desde otros workers se compara un sello
+de versión (`SiteConfiguration.version`) publicado en la caché de Django; solo
+cuando el sello cambia se vuelve a leer la fila completa.
+
+Con una caché compartida (Redis/Memcached) la invalidación entre workers es
+inmediata; con la caché local por defecto el sello expira tras
+`SITE_CONFIG_VERSION_TTL` segundos y se relee desde la base de datos.
+"""
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_CACHE_KEY = 'site_configuration:version'
+SINGLETON_ID = 1
+
+_lock = threading.Lock()
+_state = {'version': None, 'config': None, 'checked_at': 0.0}
+
+
+def _check_interval() -> float:
+    # Segundos durante los cuales la copia local se usa sin consultar el sello
+    return float(getattr(settings, 'SITE_CONFIG_CHECK_INTERVAL', 2))
+
+
+def _version_ttl() -> int:
+    return int(getattr(settings, 'SITE_CONFIG_VERSION_TTL', 30))
+
+
+def _current_version() -> int:
+    """Devuelve el sello de versión publicado, consultando la BD si no está en caché."""
+    from api.models import SiteConfiguration
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = (
+            SiteConfiguration.objects.filter(id=SINGLETON_ID)
+            .values_list('version', flat=True)
+            .first()
+        ) or 0
+        cache.set(VERSION_CACHE_KEY, version, _version_ttl())
+    return version
+
+
+def get_site_config() -> dict:
+    """
+    Devuelve la configuración del sitio (dict) usando la copia en memoria.
+
+    El dict devuelto se comparte entre llamadas: tratarlo como solo lectura.
+    """
+    from api.models import SiteConfiguration
+
+    now = time.monotonic()
+    config = _state['config']
+    if config is not None and now - _state['checked_at'] < _check_interval():
+        return config
+
+    version = _current_version()
+    with _lock:
+        if _state['config'] is None or _state['version'] != version:
+            obj = SiteConfiguration.objects.filter(id=SINGLETON_ID).only('config', 'version').first()
+            _state['config'] = (obj.config if obj else None) or {}
+            _state['version'] = obj.version if obj else 0
+        _state['checked_at'] = now
+        return _state['config']
+
+
+def get_site_setting(key: str, default: Any = None) -> Any:
+    """
+    Busca `key` en la configuración del sitio.
+
+    Se consulta primero el nivel raíz y luego `system_settings` (formato que
+    envía la página de configuración del frontend). Valores vacíos se ignoran.
+    """
+    config = get_site_config()
+    value = config.get(key)
+    if value in (None, ''):
+        system_settings = config.get('system_settings')
+        if isinstance(system_settings, dict):
+            value = system_settings.get(key)
+    return default if value in (None, '') else value
+
+
+def get_report_setting(name: str) -> Optional[Any]:
+    """
+    Ajuste de reportes: configuración del sitio (clave en minúsculas) con
+    respaldo en el setting de Django del mismo nombre, p. ej. `REPORT_LOGO_PATH`.
+    """
+    return get_site_setting(name.lower(), getattr(settings, name.upper(), None))
+
+
+def notify_site_config_changed(instance) -> None:
+    """Publica el nuevo sello de versión y actualiza la copia local del proceso."""
+    from api.models import SiteConfiguration
+
+    pk = instance.pk
+
+    def _publish():
+        # `instance.version` puede ser todavía la expresión F('version') + 1 (el
+        # post_save llega antes del refresh_from_db): se lee el valor confirmado.
+        row = SiteConfiguration.objects.filter(pk=pk).values_list('version', 'config').first()
+        if row is None:
+            return
+        version, config = row
+        cache.set(VERSION_CACHE_KEY, version, _version_ttl())
+        with _lock:
+            _state['config'] = config or {}
+            _state['version'] = version
+            _state['checked_at'] = time.monotonic()
+
+    transaction.on_commit(_publish)
+
+
+def clear_site_config_cache() -> None:
+    """Descarta la copia local y el sello publicado (útil en tests)."""
+    cache.delete(VERSION_CACHE_KEY)
+    with _lock:
+        _state['config'] = None
+        _state['version'] = None
+        _state['checked_at'] = 0.0
@@ -0,0 +1,108 @@
+"""
+Caché de plantillas compiladas para los generadores de PDF.
+
+Compilar `DjangoTemplate(html_content)` y parsear el CSS con WeasyPrint en cada
+render es lo más costoso de un lote de reportes que usan la misma plantilla.
+Este módulo guarda, por proceso y con límite LRU:
+
+- la plantilla Django compilada, y
+- las hojas de estilo `CSS` ya parseadas junto con su `FontConfiguration`
+  (las reglas @font-face quedan registradas en esa configuración).
+
+Las entradas se identifican por `Template.id` + `updated_at` cuando se conoce
+la plantilla (ver `template_cache_key`) o por un hash del contenido en otro
+caso. Guardar o eliminar un `Template` invalida sus entradas (signals).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+from django.template import Template as DjangoTemplate
+
+_lock = threading.Lock()
+_entries: 'OrderedDict[Tuple, Any]' = OrderedDict()
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, 'TEMPLATE_CACHE_SIZE', 64))
+
+
+def template_cache_key(template) -> Optional[Tuple]:
+    """Clave estable para un `Template` guardado: (id, updated_at)."""
+    if template is None or not getattr(template, 'pk', None):
+        return None
+    updated_at = getattr(template, 'updated_at', None)
+    return (template.pk, updated_at.isoformat() if updated_at else None)
+
+
+def _content_key(content: str) -> Tuple:
+    return ('sha1', hashlib.sha1(content.encode('utf-8')).hexdigest())
+
+
+def _get_or_build(key: Tuple, build):
+    with _lock:
+        value = _entries.get(key)
+        if value is not None:
+            _entries.move_to_end(key)
+            return value
+    # Compilar fuera del lock; si dos hilos compilan a la vez gana el primero
+    value = build()
+    with _lock:
+        value = _entries.setdefault(key, value)
+        _entries.move_to_end(key)
+        while len(_entries) > _max_entries():
+            _entries.popitem(last=False)
+    return value
+
+
+def get_compiled_template(html_content: str, cache_key: Optional[Hashable] = None) -> DjangoTemplate:
+    """Plantilla Django compilada para `html_content` (desde caché si existe)."""
+    html_content = html_content or ''
+    key = ('html', cache_key if cache_key is not None else _content_key(html_content))
+    return _get_or_build(key, lambda: DjangoTemplate(html_content))
+
+
+def get_stylesheets(css_content: Optional[str], cache_key: Optional[Hashable] = None):
+    """
+    Devuelve `(stylesheets, font_config)` para WeasyPrint.
+
+    `stylesheets` es None si no hay CSS; `font_config` debe pasarse también a
+    `write_pdf` para que las fuentes declaradas en el CSS se resuelvan.
+    """
+    if not css_content:
+        return None, None
+
+    def _build():
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        return [CSS(string=css_content, font_config=font_config)], font_config
+
+    key = ('css', cache_key if cache_key is not None else _content_key(css_content))
+    return _get_or_build(key, _build)
+
+
+def invalidate_template(template_id) -> int:
+    """Elimina todas las entradas de un `Template` (cualquier `updated_at`)."""
+    with _lock:
+        stale = [
+            k for k in _entries
+            if isinstance(k[1], tuple) and k[1] and k[1][0] == template_id
+        ]
+        for k in stale:
+            del _entries[k]
+    return len(stale)
+
+
+def clear_template_cache() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def cache_info() -> List[Tuple]:
+    """Claves actualmente en caché (de la menos a la más reciente)."""
+    with _lock:
+        return list(_entries.keys())
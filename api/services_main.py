@@ -34,8 +34,11 @@ class ReportGenerator:
         """
         from xhtml2pdf import pisa
         from io import BytesIO
-        import requests
         from django.conf import settings
+        from api.services.media_fetch import get_http_session
+
+        # Sesión compartida: reutiliza conexiones entre recursos y entre reportes
+        http = get_http_session()
 
         def fetch_resources(uri, rel):
             """
@@ -55,14 +58,14 @@ class ReportGenerator:
                 minio_uri = f"{settings.MINIO_ENDPOINT}/{bucket}/{key}"
 
                 try:
-                    response = requests.get(minio_uri, timeout=10)
+                    response = http.get(minio_uri, timeout=10)
                     if response.status_code == 200:
                         return BytesIO(response.content)
                 except Exception as e:
                     print(f"Error fetching resource {minio_uri}: {e}")
             elif uri.startswith('http://') or uri.startswith('https://'):
                 try:
-                    response = requests.get(uri, timeout=10)
+                    response = http.get(uri, timeout=10)
                     if response.status_code == 200:
                         return BytesIO(response.content)
                 except Exception as e:
@@ -1,7 +1,21 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
-from api.models import Maintenance, Equipment, Incident, AuditLog
+import logging
+
+from api.models import (
+    Maintenance, Equipment, Incident, AuditLog, SiteConfiguration, Template, ReportTemplate,
+    MaintenanceSnapshot, Photo, Signature, SecondSignature, Sede, Dependencia, Subdependencia,
+)
+from api.services.maintenance_activities import sync_activities
+from api.services.media_ingest import ingest_instance
+from api.services.location_backfill import clear_shared_index, resolve_legacy_locations
+from api.services.maintenance_snapshot import SNAPSHOT_STATUSES, invalidate_snapshots, refresh_snapshot
+from api.services.report_warmer import schedule_report_warmup
+from api.services.site_config import notify_site_config_changed
+from api.services.template_cache import invalidate_template
+from api.services.report_styles import clear_header_assets
 
 @receiver(post_save, sender=Maintenance)
 @receiver(post_save, sender=Equipment)
@@ -10,6 +24,9 @@ def log_save(sender, instance, created, **kwargs):
     """
     Registra creaciones y actualizaciones en el log de auditoría
     """
+    if getattr(instance, '_skip_audit', False):
+        # La importación masiva registra sus propias entradas en bloque
+        return
     action = 'create' if created else 'update'
     content_type = ContentType.objects.get_for_model(sender)
 
@@ -29,6 +46,9 @@ def log_delete(sender, instance, **kwargs):
     """
     Registra eliminaciones en el log de auditoría
     """
+    if getattr(instance, '_skip_audit', False):
+        # El archivado registra sus propias entradas en bloque
+        return
     content_type = ContentType.objects.get_for_model(sender)
 
     AuditLog.objects.create(
@@ -39,3 +59,147 @@ def log_delete(sender, instance, **kwargs):
         user=getattr(instance, '_current_user', None),
         changes=f'Deleted {sender.__name__}: {str(instance)}'
     )
+
+@receiver(post_save, sender=SiteConfiguration)
+def site_configuration_saved(sender, instance, **kwargs):
+    """
+    Invalida la configuración en caché de todos los procesos
+    """
+    notify_site_config_changed(instance)
+
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+def template_changed(sender, instance, **kwargs):
+    """
+    Descarta la plantilla compilada y el CSS parseado en caché
+    """
+    invalidate_template(instance.pk)
+
+@receiver(post_save, sender=ReportTemplate)
+@receiver(post_delete, sender=ReportTemplate)
+def report_template_changed(sender, instance, **kwargs):
+    """
+    Recarga el encabezado y logo de los reportes ReportLab
+    """
+    clear_header_assets()
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=Maintenance)
+def maintenance_snapshot(sender, instance, **kwargs):
+    """
+    Guarda el snapshot de reporte al completar un mantenimiento (y lo descarta si deja de estarlo)
+    y encola el pre-render de sus reportes
+    """
+    if getattr(instance, '_bulk_insert', False):
+        # bulk_insert fila a fila: la importación lo hace en bloque tras insertar los archivos
+        return
+    try:
+        if instance.status in SNAPSHOT_STATUSES:
+            refresh_snapshot(instance.pk)
+            schedule_report_warmup(instance.pk)
+        else:
+            MaintenanceSnapshot.objects.filter(pk=instance.pk).delete()
+    except Exception as e:
+        logger.warning('No se pudo actualizar el snapshot del mantenimiento %s: %s', instance.pk, e)
+
+@receiver(post_save, sender=Maintenance)
+def maintenance_activities(sender, instance, update_fields=None, **kwargs):
+    """
+    Regenera las filas MaintenanceActivity desde el JSON de actividades
+    """
+    if getattr(instance, '_bulk_insert', False) or (update_fields is not None and 'activities' not in update_fields):
+        return
+    try:
+        sync_activities([instance])
+    except Exception as e:
+        logger.warning('No se pudieron normalizar las actividades del mantenimiento %s: %s', instance.pk, e)
+
+@receiver(pre_save, sender=Photo)
+@receiver(pre_save, sender=Signature)
+@receiver(pre_save, sender=SecondSignature)
+def media_ingest(sender, instance, **kwargs):
+    """
+    Dedupe por hash y normalización (orientación, sin metadatos, tamaño acotado)
+    de las fotos y firmas nuevas antes de subirlas al storage
+    """
+    try:
+        ingest_instance(instance)
+    except Exception as e:
+        logger.warning('No se pudo procesar la imagen de %s: %s', sender.__name__, e)
+
+@receiver(pre_save, sender=Maintenance)
+@receiver(pre_save, sender=Equipment)
+def legacy_location_fks(sender, instance, **kwargs):
+    """
+    Completa sede_rel/dependencia_rel/subdependencia desde los textos que aún
+    envían los formularios, para que los filtros y estadísticas por FK los incluyan
+    """
+    if getattr(instance, '_bulk_insert', False):
+        return
+    try:
+        resolve_legacy_locations(instance)
+    except Exception as e:
+        logger.warning('No se pudo resolver la ubicación de %s %s: %s', sender.__name__, instance.pk, e)
+
+@receiver(post_save, sender=Sede)
+@receiver(post_delete, sender=Sede)
+@receiver(post_save, sender=Dependencia)
+@receiver(post_delete, sender=Dependencia)
+@receiver(post_save, sender=Subdependencia)
+@receiver(post_delete, sender=Subdependencia)
+def location_index_changed(sender, instance, **kwargs):
+    """
+    Reconstruye el índice de ubicaciones en el próximo guardado
+    """
+    clear_shared_index()
+
+# Campos de User que aparecen en el snapshot (técnico)
+USER_SNAPSHOT_FIELDS = {'first_name', 'last_name', 'email', 'username'}
+RELATED_SNAPSHOT_FILTERS = {
+    Equipment: 'equipment_id',
+    User: 'technician_id',
+    Sede: 'sede_rel_id',
+    Dependencia: 'dependencia_rel_id',
+    Subdependencia: 'subdependencia_id',
+}
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Sede)
+@receiver(post_save, sender=Dependencia)
+@receiver(post_save, sender=Subdependencia)
+def related_snapshot_invalidation(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Descarta los snapshots que copian datos del equipo, técnico o ubicación editados
+    """
+    if created:
+        return
+    if sender is User and update_fields is not None and not (set(update_fields) & USER_SNAPSHOT_FIELDS):
+        # p. ej. el update_last_login de cada inicio de sesión
+        return
+    try:
+        invalidate_snapshots(**{RELATED_SNAPSHOT_FILTERS[sender]: instance.pk})
+    except Exception as e:
+        logger.warning('No se pudieron invalidar los snapshots de %s %s: %s', sender.__name__, instance.pk, e)
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+@receiver(post_save, sender=Signature)
+@receiver(post_delete, sender=Signature)
+@receiver(post_save, sender=SecondSignature)
+@receiver(post_delete, sender=SecondSignature)
+def maintenance_media_snapshot(sender, instance, **kwargs):
+    """
+    Regenera el snapshot y los reportes pre-renderizados cuando cambian las fotos
+    o firmas de un mantenimiento completado
+    """
+    maintenance_id = getattr(instance, 'maintenance_id', None)
+    if not maintenance_id:
+        return
+    try:
+        if MaintenanceSnapshot.objects.filter(pk=maintenance_id).exists():
+            refresh_snapshot(maintenance_id)
+            schedule_report_warmup(maintenance_id)
+    except Exception as e:
+        logger.warning('No se pudo actualizar el snapshot del mantenimiento %s: %s', maintenance_id, e)
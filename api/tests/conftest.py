@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _media_storage(settings, tmp_path):
+    """Los archivos que escriben los tests van a un directorio temporal, no a api/media."""
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    }
@@ -0,0 +1,53 @@
+import pytest
+
+from api.services.activity_matcher import MARK, parse_activity_value
+from api.services.printer_scanner_excel_generator import PrinterScannerExcelGenerator
+
+YES, NA, EMPTY = (MARK, ''), ('', MARK), ('', '')
+
+
+def _legacy_value(activities, activity_name):
+    """`_get_activity_value` del generador de impresoras antes del matcher precompilado."""
+    if not activities:
+        return EMPTY
+    activity_lower = activity_name.lower().strip()
+    for key, value in activities.items():
+        if key.lower().strip() == activity_lower:
+            return parse_activity_value(value)
+    for alias in PrinterScannerExcelGenerator.ACTIVITY_ALIASES.get(activity_lower, []):
+        for key, value in activities.items():
+            if key.lower().strip() == alias.lower():
+                return parse_activity_value(value)
+    for key, value in activities.items():
+        if activity_lower in key.lower() or key.lower() in activity_lower:
+            return parse_activity_value(value)
+    return EMPTY
+
+
+# (actividades, actividad de la plantilla, esperado, igual que el comportamiento anterior)
+CASES = [
+    ({'Limpieza general': True}, 'Limpieza general', YES, True),
+    ({'limpieza_general': 'si'}, 'Limpieza general', YES, True),
+    ({'toner': 'na'}, 'Limpieza toner', NA, True),
+    ({'Pruebas': {'si': True}}, 'Pruebas de funcionamiento', YES, True),
+    ({'Limpieza de Ventiladores y filtros': 'x'}, 'Limpieza de Ventiladores', YES, True),
+    ({'tarjeta de poder': False}, 'Limpieza tarjeta de poder', NA, True),
+    ({'Limpieza toner': True}, 'Limpieza de fusor o rodillo', EMPTY, True),
+    ({}, 'Limpieza general', EMPTY, True),
+    # Sin tildes: antes las filas "Limpiéza ..." no encontraban su clave ni sus alias
+    ({'limpieza de carcaza': True}, 'Limpiéza de carcaza', YES, False),
+    ({'limpieza de sensores': 'si'}, 'Limpiéza de sensores', YES, False),
+    # Una clave genérica de una palabra ya no marca otras filas por contención
+    ({'limpieza': True}, 'Limpieza general', YES, True),
+    ({'limpieza': True}, 'Limpieza toner', EMPTY, False),
+    ({'limpieza': True}, 'Limpiéza de carcaza', EMPTY, True),
+    ({'limpieza': True}, 'Limpiéza tarjeta logica', EMPTY, True),
+    ({'poder': True}, 'Limpieza tarjeta de poder', EMPTY, False),
+    ({'limpiezas': True}, 'Limpieza toner', EMPTY, True),
+]
+
+
+@pytest.mark.parametrize('activities, activity, expected, same_as_legacy', CASES)
+def test_printer_matcher_against_legacy_lookup(activities, activity, expected, same_as_legacy):
+    assert PrinterScannerExcelGenerator.activity_matcher().match(activities)[activity] == expected
+    assert (_legacy_value(activities, activity) == expected) is same_as_legacy
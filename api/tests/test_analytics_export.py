@@ -0,0 +1,52 @@
+import datetime
+
+import pytest
+
+from api.models import Equipment, Maintenance, Sede
+from api.services.analytics_export import export_analytics, read_watermarks
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+@pytest.mark.django_db
+def test_partitioned_incremental_export(tmp_path):
+    sede = Sede.objects.create(nombre='Principal')
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop')
+    first = Maintenance.objects.create(
+        equipment=equipment, scheduled_date=datetime.date(2024, 3, 1), sede_rel=sede,
+        activities={'Limpieza de carcaza': True, 'Desfragmentar': 'na'},
+    )
+    Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, 1))
+
+    result = export_analytics(root=str(tmp_path))
+    assert result['rows']['maintenances'] == 2
+    assert result['rows']['maintenance_activities'] == 2
+    assert set(read_watermarks(str(tmp_path))) >= {'maintenances', 'equipment', 'sedes'}
+
+    table = pq.read_table(tmp_path / 'maintenances' / 'year=2024' / f'sede_id={sede.id}')
+    assert table.column('id').to_pylist() == [first.id]
+    assert (tmp_path / 'maintenances' / 'year=2025' / 'sede_id=__null__').is_dir()
+    activities = pq.read_table(tmp_path / 'maintenance_activities' / 'year=2024').to_pylist()
+    assert {(a['activity'], a['done']) for a in activities} == {('Limpieza de carcaza', True), ('Desfragmentar', False)}
+
+    first.observations = 'Cambio'
+    first.save()
+    result = export_analytics(root=str(tmp_path))
+    assert result['rows']['maintenances'] == 1
+    assert result['rows']['equipment'] == 0
+
+
+def test_writer_flushes_largest_partition_when_buffer_is_full(tmp_path):
+    from api.services.analytics_export import SEDE_COLUMNS, _PartitionedWriter
+
+    writer = _PartitionedWriter(str(tmp_path), 'sedes', SEDE_COLUMNS, 'run', row_group_size=1000, max_bytes=4000)
+    row = {'id': 1, 'codigo': 'S', 'nombre': 'x' * 100, 'activo': True, 'created_at': None, 'updated_at': None}
+    writer.write(dict(row), (('year', 2024),))
+    for _ in range(20):
+        writer.write(dict(row), (('year', 2025),))
+    # Solo se volcó la partición grande; la pequeña sigue pendiente
+    assert (('year', 2024),) in writer.pending
+    assert (tmp_path / 'sedes' / 'year=2025').is_dir()
+    assert writer.buffered_bytes < 4000
+    assert writer.close() == 21
+    assert pq.read_table(tmp_path / 'sedes').num_rows == 21
@@ -0,0 +1,110 @@
+import io
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+from botocore.config import Config
+from botocore.stub import Stubber
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.test import RequestFactory, override_settings
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from api.services import delivery
+from api.services.delivery import accel_redirect_path, ranged_file_response, serve_local_file, serve_storage_file
+
+DATA = bytes(range(256)) * 4
+
+
+def _body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_full_response_advertises_ranges():
+    request = RequestFactory().get('/')
+    response = ranged_file_response(request, io.BytesIO(DATA), len(DATA), 'application/pdf', filename='a.pdf')
+    assert response.status_code == 200
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['Content-Disposition'] == 'inline; filename="a.pdf"'
+    assert _body(response) == DATA
+
+
+def test_range_requests():
+    factory = RequestFactory()
+    response = ranged_file_response(factory.get('/', HTTP_RANGE='bytes=10-19'), io.BytesIO(DATA), len(DATA), 'x/y')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 10-19/{len(DATA)}'
+    assert _body(response) == DATA[10:20]
+
+    response = ranged_file_response(factory.get('/', HTTP_RANGE='bytes=-5'), io.BytesIO(DATA), len(DATA), 'x/y')
+    assert _body(response) == DATA[-5:]
+
+    response = ranged_file_response(factory.get('/', HTTP_RANGE=f'bytes={len(DATA)}-'), io.BytesIO(DATA), len(DATA), 'x/y')
+    assert response.status_code == 416
+
+
+def test_accel_redirect(tmp_path):
+    path = tmp_path / 'db.sql'
+    path.write_bytes(b'select 1;')
+    with override_settings(DELIVERY_ACCEL_REDIRECT={str(tmp_path): '/protected/backups/'}):
+        assert accel_redirect_path(str(path)) == '/protected/backups/db.sql'
+        response = serve_local_file(RequestFactory().get('/'), str(path), content_type='application/sql')
+    assert response['X-Accel-Redirect'] == '/protected/backups/db.sql'
+    assert response.content == b''
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    """Storage S3 con un cliente boto3 stubbeado: firmar URLs no hace llamadas de red."""
+    storage = S3Boto3Storage(bucket_name='media', endpoint_url='http://minio:9000', access_key='key',
+                             secret_key='secret', region_name='us-east-1', location='media', signature_version='s3v4')
+    client = boto3.client('s3', endpoint_url='http://minio:9000', aws_access_key_id='key',
+                          aws_secret_access_key='secret', region_name='us-east-1',
+                          config=Config(signature_version='s3v4'))
+    monkeypatch.setattr(delivery, 'get_s3_client', lambda storage: client)
+    with Stubber(client) as stubber:
+        yield storage
+        stubber.assert_no_pending_responses()
+
+
+def test_s3_storage_redirects_to_presigned_url(s3_storage, settings):
+    settings.DELIVERY_URL_TTL = 120
+    response = serve_storage_file(RequestFactory().get('/'), s3_storage, 'reports/informe.pdf')
+    assert response.status_code == 302
+    url = urlparse(response['Location'])
+    query = parse_qs(url.query)
+    assert url.path == '/media/media/reports/informe.pdf'
+    assert query['X-Amz-Expires'] == ['120']
+    assert query['response-content-disposition'] == ['attachment; filename="informe.pdf"']
+    assert query['response-content-type'] == ['application/pdf']
+
+    inline = serve_storage_file(RequestFactory().get('/'), s3_storage, 'maintenance_photos/a.jpg',
+                                filename='añil.jpg', as_attachment=False)
+    disposition = parse_qs(urlparse(inline['Location']).query)['response-content-disposition']
+    assert disposition == ["inline; filename*=utf-8\'\'a%C3%B1il.jpg"]
+
+
+def test_presigned_redirects_can_be_disabled(s3_storage, settings):
+    settings.DELIVERY_PRESIGNED_REDIRECTS = False
+    assert delivery.presigned_url(s3_storage, 'reports/informe.pdf') is None
+
+
+def test_local_storage_dispatch(tmp_path):
+    storage = FileSystemStorage(location=str(tmp_path))
+    name = storage.save('backups/db.sql', ContentFile(DATA))
+    request = RequestFactory().get('/', HTTP_RANGE='bytes=0-9')
+
+    with override_settings(DELIVERY_ACCEL_REDIRECT={str(tmp_path): '/protected/media/'}):
+        response = serve_storage_file(request, storage, name)
+    assert response['X-Accel-Redirect'] == '/protected/media/backups/db.sql'
+    assert response['Content-Disposition'] == 'attachment; filename="db.sql"'
+
+    response = serve_storage_file(request, storage, name)
+    assert response.status_code == 206 and _body(response) == DATA[:10]
+
+    # Sin ruta local ni URL prefirmada: se lee del storage
+    remote = InMemoryStorage()
+    remote.save(name, ContentFile(DATA))
+    response = serve_storage_file(request, remote, name, content_type='application/sql')
+    assert response.status_code == 206 and response['Content-Type'] == 'application/sql'
+    assert _body(response) == DATA[:10]
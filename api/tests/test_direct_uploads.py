@@ -0,0 +1,172 @@
+import datetime
+import hashlib
+from io import BytesIO
+
+import boto3
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import ANY, Stubber
+from PIL import Image
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from api.models import Equipment, Maintenance, Photo
+from api.services import direct_uploads
+from api.services.direct_uploads import (
+    MIN_PART_SIZE, DirectUploadError, abort_upload, complete_upload, start_upload, upload_status,
+)
+
+SIZE = 2 * MIN_PART_SIZE + 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Storage S3 de las fotos con un cliente boto3 stubbeado (sin red)."""
+    storage = S3Boto3Storage(bucket_name='media', endpoint_url='http://minio:9000', access_key='key',
+                             secret_key='secret', region_name='us-east-1', location='media', default_acl='private')
+    monkeypatch.setattr(Photo._meta.get_field('photo'), 'storage', storage)
+    client = boto3.client('s3', endpoint_url='http://minio:9000', aws_access_key_id='key',
+                          aws_secret_access_key='secret', region_name='us-east-1')
+    monkeypatch.setattr(direct_uploads, '_client', lambda storage: client)
+    with Stubber(client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+@pytest.fixture
+def maintenance(db):
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop')
+    return Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today())
+
+
+def _start(s3, maintenance):
+    s3.add_response('create_multipart_upload', {'UploadId': 'up-1', 'Bucket': 'media', 'Key': 'k'},
+                    {'Bucket': 'media', 'Key': ANY, 'ContentType': 'image/jpeg', 'ACL': 'private'})
+    return start_upload(maintenance, {'filename': 'IMG 1.jpg', 'content_type': 'image/jpeg', 'size': SIZE})
+
+
+def _jpeg_with_exif():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientación: rotar 90°
+    exif[0x010F] = 'Telefono'
+    out = BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(out, 'JPEG', exif=exif.tobytes())
+    return out.getvalue()
+
+
+def _get_object(s3, key, data):
+    s3.add_response('get_object', {'Body': StreamingBody(BytesIO(data), len(data)), 'ContentLength': len(data)},
+                    {'Bucket': 'media', 'Key': key})
+
+
+def _capture_puts(s3):
+    puts = []
+    # Los bytes antes de que botocore convierta Body en un archivo
+    s3.client.meta.events.register('before-parameter-build.s3.PutObject',
+                                   lambda params, **kw: puts.append(params['Body']))
+    return puts
+
+
+def _list_parts(s3, numbers, upload_id='up-1'):
+    s3.add_response('list_parts', {
+        'Parts': [{'PartNumber': n, 'ETag': f'"etag-{n}"'} for n in numbers], 'IsTruncated': False,
+    }, {'Bucket': 'media', 'Key': ANY, 'UploadId': upload_id, 'PartNumberMarker': 0})
+
+
+def test_start_and_resume(s3, maintenance):
+    payload = _start(s3, maintenance)
+    assert payload['part_count'] == 3 and [p['part_number'] for p in payload['parts']] == [1, 2, 3]
+    session = maintenance.upload_sessions.get()
+    assert session.object_key.startswith('media/') and session.object_key.endswith('IMG_1.jpg')
+
+    # Reanudación: solo se firman de nuevo las partes faltantes
+    _list_parts(s3, [1, 3])
+    status = upload_status(session)
+    assert status['uploaded_parts'] == [1, 3]
+    assert [p['part_number'] for p in status['parts']] == [2]
+
+
+def test_photo_limit_allows_resumable_sizes(maintenance, s3):
+    with pytest.raises(DirectUploadError):
+        start_upload(maintenance, {'filename': 'a.png', 'content_type': 'image/png',
+                                   'size': 26 * 1024 * 1024})
+    with pytest.raises(DirectUploadError):
+        start_upload(maintenance, {'kind': 'signature', 'filename': 'a.png', 'content_type': 'image/png',
+                                   'size': SIZE})
+
+
+def test_complete_registers_photo(s3, maintenance):
+    _start(s3, maintenance)
+    session = maintenance.upload_sessions.get()
+
+    _list_parts(s3, [1, 2])
+    with pytest.raises(DirectUploadError) as excinfo:
+        complete_upload(session)
+    assert excinfo.value.status_code == 409
+
+    _list_parts(s3, [2, 1, 3])
+    s3.add_response('complete_multipart_upload', {}, {
+        'Bucket': 'media', 'Key': session.object_key, 'UploadId': 'up-1',
+        'MultipartUpload': {'Parts': [{'PartNumber': n, 'ETag': f'"etag-{n}"'} for n in (1, 2, 3)]},
+    })
+    s3.add_response('head_object', {'ContentLength': SIZE}, {'Bucket': 'media', 'Key': session.object_key})
+    original = _jpeg_with_exif()
+    _get_object(s3, session.object_key, original)
+    s3.add_response('put_object', {}, {'Bucket': 'media', 'Key': session.object_key, 'Body': ANY,
+                                       'ContentType': 'image/jpeg', 'ACL': 'private'})
+    puts = _capture_puts(s3)
+    photo = complete_upload(session)
+
+    assert photo.photo.name == session.object_key[len('media/'):]
+    assert photo.content_hash == hashlib.sha256(original).hexdigest()
+    session.refresh_from_db()
+    assert session.status == 'completed'
+    # El original se reemplazó por la versión orientada y sin EXIF
+    with Image.open(BytesIO(puts[0])) as normalized:
+        assert normalized.size == (20, 40) and not normalized.getexif()
+
+
+def test_complete_normalizes_format_and_dedupes(s3, maintenance, monkeypatch):
+    s3.add_response('create_multipart_upload', {'UploadId': 'up-1', 'Bucket': 'media', 'Key': 'k'},
+                    {'Bucket': 'media', 'Key': ANY, 'ContentType': 'image/png', 'ACL': 'private'})
+    start_upload(maintenance, {'filename': 'scan.png', 'content_type': 'image/png', 'size': SIZE})
+    session = maintenance.upload_sessions.get()
+    png = BytesIO()
+    Image.new('RGB', (30, 30), 'blue').save(png, 'PNG')
+
+    def complete(session, *writes):
+        _list_parts(s3, [1, 2, 3], session.upload_id)
+        s3.add_response('complete_multipart_upload', {}, {
+            'Bucket': 'media', 'Key': session.object_key, 'UploadId': session.upload_id, 'MultipartUpload': ANY,
+        })
+        s3.add_response('head_object', {'ContentLength': SIZE}, {'Bucket': 'media', 'Key': session.object_key})
+        _get_object(s3, session.object_key, png.getvalue())
+        for operation, params in writes:
+            s3.add_response(operation, {}, {'Bucket': 'media', **params})
+        return complete_upload(session)
+
+    # PNG sin transparencia: se guarda como JPEG y se borra el original
+    jpg_key = session.object_key[:-len('.png')] + '.jpg'
+    first = complete(
+        session,
+        ('put_object', {'Key': jpg_key, 'Body': ANY, 'ContentType': 'image/jpeg', 'ACL': 'private'}),
+        ('delete_object', {'Key': session.object_key}),
+    )
+    assert first.photo.name == jpg_key[len('media/'):]
+
+    # La misma imagen otra vez: se reutiliza el objeto existente
+    s3.add_response('create_multipart_upload', {'UploadId': 'up-2', 'Bucket': 'media', 'Key': 'k'},
+                    {'Bucket': 'media', 'Key': ANY, 'ContentType': 'image/png', 'ACL': 'private'})
+    start_upload(maintenance, {'filename': 'scan.png', 'content_type': 'image/png', 'size': SIZE})
+    again = maintenance.upload_sessions.get(status='pending')
+    monkeypatch.setattr(S3Boto3Storage, 'exists', lambda storage, name: name == first.photo.name)
+    second = complete(again, ('delete_object', {'Key': again.object_key}))
+    assert second.photo.name == first.photo.name and second.content_hash == first.content_hash
+
+
+def test_abort_tolerates_expired_upload(s3, maintenance):
+    _start(s3, maintenance)
+    session = maintenance.upload_sessions.get()
+    s3.add_client_error('abort_multipart_upload', service_error_code='NoSuchUpload', http_status_code=404)
+    abort_upload(session)
+    session.refresh_from_db()
+    assert session.status == 'aborted'
@@ -0,0 +1,124 @@
+import csv
+import datetime
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from openpyxl import Workbook, load_workbook
+from rest_framework.test import APIClient
+
+from api.models import Dependencia, Equipment, Maintenance, MaintenanceSnapshot, Sede, Subdependencia
+from api.services.equipment_inventory import (
+    EXPORT_COLUMNS, import_equipment_inventory, iter_equipment_csv, iter_inventory_rows, write_equipment_xlsx,
+)
+
+
+def _csv_upload(text, name='inventario.csv'):
+    return SimpleUploadedFile(name, text.encode('utf-8'))
+
+
+def _xlsx_upload(rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return SimpleUploadedFile('inventario.xlsx', out.getvalue())
+
+
+@pytest.fixture
+def locations(db):
+    sede = Sede.objects.create(nombre='Sede Principal', codigo='SP')
+    hacienda = Dependencia.objects.create(nombre='Secretaría de Hacienda', sede=sede)
+    tesoreria = Subdependencia.objects.create(nombre='Tesorería', dependencia=hacienda)
+    return sede, hacienda, tesoreria
+
+
+@pytest.mark.django_db
+def test_csv_import_upserts_by_code_and_serial(locations):
+    sede, hacienda, tesoreria = locations
+    existing = Equipment.objects.create(code='EQ001', name='Laptop vieja', serial_number='SN-1')
+    by_serial = Equipment.objects.create(code='EQ-OLD', name='Impresora', serial_number='SN-2')
+
+    upload = _csv_upload(
+        'Placa;Serie;Nombre;Marca;Sede;Dependencia;Subdependencia;Fecha compra\n'
+        'EQ001;SN-1;Laptop;Dell;SP;secretaria de hacienda;tesoreria;15/01/2024\n'
+        ';SN-2;Impresora láser;HP;;;;\n'
+        'EQ003;;Monitor;LG;Sede Principal;Archivo;;\n'
+        ';;Sin clave;;;;;\n'
+        'EQ004;;Scanner;;;;;31/02/2024\n'
+        'EQ001;SN-2;Choque;;;;;\n'
+    )
+    summary = import_equipment_inventory(iter_inventory_rows(upload), chunk_size=2)
+
+    assert (summary['total'], summary['created'], summary['updated'], summary['failed']) == (6, 1, 2, 3)
+    assert [e['row'] for e in summary['errors']] == [5, 6, 7]
+    assert summary['warnings'] == [{'row': 4, 'warning': 'Dependencia no encontrada o ambigua: Archivo'}]
+
+    existing.refresh_from_db()
+    assert (existing.name, existing.brand, existing.purchase_date) == ('Laptop', 'Dell', datetime.date(2024, 1, 15))
+    assert (existing.sede_rel_id, existing.dependencia_rel_id, existing.subdependencia_id) == (sede.id, hacienda.id, tesoreria.id)
+    by_serial.refresh_from_db()
+    assert (by_serial.code, by_serial.name) == ('EQ-OLD', 'Impresora láser')
+    monitor = Equipment.objects.get(code='EQ003')
+    assert (monitor.sede_rel_id, monitor.dependencia_rel_id) == (sede.id, None)
+
+
+@pytest.mark.django_db
+def test_xlsx_import_and_dry_run():
+    upload = _xlsx_upload([
+        ['Código', 'Serial', 'Nombre', 'Garantía'],
+        ['EQ010', 'SN-10', 'Portátil', datetime.datetime(2026, 5, 1)],
+        [None, None, None, None],
+        ['EQ011', None, 'Tablet', None],
+    ])
+    preview = import_equipment_inventory(iter_inventory_rows(upload), dry_run=True)
+    assert (preview['total'], preview['created'], preview['dry_run']) == (2, 2, True)
+    assert not Equipment.objects.exists()
+
+    upload.seek(0)
+    import_equipment_inventory(iter_inventory_rows(upload))
+    assert Equipment.objects.get(code='EQ010').warranty_expiry == datetime.date(2026, 5, 1)
+
+
+@pytest.mark.django_db
+def test_import_invalidates_snapshots_of_updated_equipment():
+    laptop = Equipment.objects.create(code='EQ001', name='Laptop')
+    monitor = Equipment.objects.create(code='EQ002', name='Monitor')
+    for eq in (laptop, monitor):
+        maintenance = Maintenance.objects.create(equipment=eq, scheduled_date=datetime.date(2025, 1, 1))
+        MaintenanceSnapshot.objects.create(maintenance=maintenance, data={'fields': {}})
+
+    import_equipment_inventory(iter_inventory_rows(_csv_upload('code;name\nEQ001;Laptop Dell\nEQ003;Nuevo\n')))
+    assert list(MaintenanceSnapshot.objects.values_list('maintenance__equipment__code', flat=True)) == ['EQ002']
+
+
+@pytest.mark.django_db
+def test_export_csv_and_xlsx(locations):
+    sede, hacienda, _ = locations
+    Equipment.objects.create(code='EQ001', name='Laptop', sede_rel=sede, dependencia_rel=hacienda,
+                             purchase_date=datetime.date(2024, 1, 15))
+    Equipment.objects.create(code='EQ002', name='Monitor', serial_number='SN-2')
+
+    lines = list(csv.reader(io.StringIO(''.join(iter_equipment_csv(chunk_size=1)).lstrip('﻿'))))
+    assert lines[0] == EXPORT_COLUMNS
+    assert lines[1][:3] == ['EQ001', '', 'Laptop'] and lines[1][6:10] == ['Sede Principal', 'Secretaría de Hacienda', '', '2024-01-15']
+    assert lines[2][:2] == ['EQ002', 'SN-2']
+
+    wb = load_workbook(write_equipment_xlsx(chunk_size=1), read_only=True)
+    rows = list(wb.active.iter_rows(values_only=True))
+    assert [row[0] for row in rows] == ['code', 'EQ001', 'EQ002']
+
+
+@pytest.mark.django_db
+def test_import_view_rejects_unreadable_files():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='admin', password='x', is_staff=True))
+
+    corrupt = SimpleUploadedFile('inventario.xlsx', b'no es un zip')
+    response = client.post('/api/equipments/import/', {'file': corrupt}, format='multipart')
+    assert response.status_code == 400 and 'No se pudo leer el archivo' in response.data['error']
+
+    latin1 = SimpleUploadedFile('inventario.csv', 'code;name\nEQ1;Cámara\n'.encode('latin-1'))
+    assert client.post('/api/equipments/import/', {'file': latin1}, format='multipart').status_code == 400
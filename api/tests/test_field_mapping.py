@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+from django.core.cache import cache
+
+from api.models import Template
+from api.services import field_mapping
+from api.services.field_mapping import (
+    apply_mapping, cache_info, clear_field_mapping_cache, compile_mapping, get_compiled_mapping,
+)
+from api.services.path_accessor import resolve_path
+from api.views_template_manager import infer_fields_schema_mapping
+
+DATA = {'Serial Number': 'SN-1', 'equipment': {'name': 'Laptop'}, 'sede': 'Principal', 'fecha_mantenimiento': '2025-01-01'}
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches():
+    clear_field_mapping_cache()
+    cache.clear()
+    yield
+    clear_field_mapping_cache()
+
+
+def test_compile_and_apply_mapping():
+    schema = {
+        'serial': {'type': 'text'},
+        'equipo': {'map_to': 'equipment.name'},
+        'sede': 'text',
+        'fecha': {'source': 'fecha_mantenimiento'},
+        'faltante': {},
+    }
+    compiled = compile_mapping(schema, DATA)
+    assert compiled == {
+        'serial': (None, 'Serial Number'),
+        'equipo': ('equipment.name', None),
+        'sede': ('text', 'sede'),
+        'fecha': (None, 'fecha_mantenimiento'),
+        'faltante': (None, None),
+    }
+    assert compile_mapping(schema, DATA, use_source=True)['fecha'] == ('fecha_mantenimiento', 'fecha_mantenimiento')
+
+    values = apply_mapping(compiled, DATA, resolve_path)
+    assert values == {'serial': 'SN-1', 'equipo': 'Laptop', 'sede': 'Principal', 'fecha': '2025-01-01', 'faltante': None}
+    # Se aplica a otros datos con la misma forma sin recompilar
+    assert apply_mapping(compiled, {**DATA, 'Serial Number': 'SN-2'}, resolve_path)['serial'] == 'SN-2'
+
+
+@pytest.mark.django_db
+def test_compiled_mapping_is_cached_per_template_version(monkeypatch):
+    template = Template.objects.create(name='GTI', type='pdf', html_content='{{ serial }}',
+                                       fields_schema={'serial': {'type': 'text'}})
+    calls = []
+    real_compile = field_mapping.compile_mapping
+    monkeypatch.setattr(field_mapping, 'compile_mapping', lambda *args, **kw: calls.append(1) or real_compile(*args, **kw))
+
+    first = get_compiled_mapping(template, DATA)
+    assert get_compiled_mapping(template, {**DATA, 'Serial Number': 'otro'}) is first
+    assert len(calls) == 1
+
+    # Otro proceso: el caché en memoria está vacío pero el de Django no
+    clear_field_mapping_cache()
+    assert get_compiled_mapping(template, DATA) == first
+    assert len(calls) == 1
+
+    # Otra forma de datos y otra versión de la plantilla son claves nuevas
+    get_compiled_mapping(template, {'serial_number': 'x'})
+    template.fields_schema = {'serial': {'map_to': 'Serial Number'}}
+    template.updated_at = template.updated_at + datetime.timedelta(seconds=1)
+    assert get_compiled_mapping(template, DATA) == {'serial': ('Serial Number', 'Serial Number')}
+    assert len(calls) == 3
+    assert len(cache_info()) == 3
+
+
+def test_infer_fields_schema_mapping_suggests_map_to():
+    schema = {'serial': 'text', 'equipo': {'map_to': 'equipment.name'}, 'sede': {'source': 'sede'}, 'otro': {}}
+    assert infer_fields_schema_mapping(schema, DATA) == {
+        'serial': {'map_to': 'Serial Number'},
+        'equipo': {'map_to': 'equipment.name'},
+        'sede': {'map_to': 'sede'},
+        'otro': {},
+    }
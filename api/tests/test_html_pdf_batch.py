@@ -0,0 +1,116 @@
+import datetime
+import io
+import zipfile
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from api import views_template_manager
+from api.models import Equipment, Maintenance, MaintenanceSnapshot, Template
+from api.views_pdf_package import PackageMaintenancePDFsView
+
+try:
+    from pypdf import PdfReader
+
+    from api.services.html_pdf_generator import HTMLPDFGenerator
+except (ImportError, OSError):  # WeasyPrint sin pango/cairo
+    HTMLPDFGenerator = None
+
+requires_weasyprint = pytest.mark.skipif(HTMLPDFGenerator is None, reason='WeasyPrint no disponible')
+
+HTML = '''<html lang="es"><head><title>{{ title }}</title></head>
+<body class="gti"><h1 id="top">{{ title }}</h1><a href="#top">inicio</a>
+{% for line in lines %}<p>{{ line }}</p>{% endfor %}</body></html>'''
+CSS = '@page { size: A6; @bottom-center { content: counter(page) " / " counter(pages) } } .gti h1 { color: red }'
+
+
+def _pages(pdf_bytes):
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def _contexts():
+    return [
+        {'title': 'Uno', 'lines': ['x'] * 3},
+        {'title': 'Dos', 'lines': ['y'] * 120},
+        {'title': 'Tres', 'lines': ['z'] * 3},
+    ]
+
+
+@requires_weasyprint
+def test_batch_keeps_body_attributes_and_scopes_link_targets(monkeypatch):
+    combined = {}
+    real_html = HTMLPDFGenerator._batch_document.__globals__['HTML']
+
+    def capture(string):
+        combined['html'] = string
+        return real_html(string=string)
+
+    monkeypatch.setitem(HTMLPDFGenerator._batch_document.__globals__, 'HTML', capture)
+    pdfs = HTMLPDFGenerator.render_batch_split(HTML, '@page { size: A6 }', _contexts())
+
+    assert '<html lang="es">' in combined['html'] and '<body class="gti">' in combined['html']
+    assert 'id="top"' in combined['html'] and 'href="#top--1"' in combined['html']
+    assert 'id="top--2"' in combined['html']
+    assert [_pages(pdf) for pdf in pdfs][0] == 1 and _pages(pdfs[1]) > 1
+
+
+@requires_weasyprint
+def test_split_restarts_page_numbers():
+    pdfs = HTMLPDFGenerator.render_batch_split(HTML, CSS, _contexts())
+    texts = [PdfReader(io.BytesIO(pdf)).pages[0].extract_text() for pdf in pdfs]
+    total = _pages(pdfs[1])
+    assert '1 / 1' in texts[0] and f'1 / {total}' in texts[1] and '1 / 1' in texts[2]
+
+    consolidated = HTMLPDFGenerator.render_batch(HTML, CSS, _contexts()).getvalue()
+    assert _pages(consolidated) == total + 2
+
+
+@pytest.mark.django_db
+def test_package_reports_missing_pdfs(monkeypatch):
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop')
+    ok, empty = [
+        Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, day), placa=f'P{day}')
+        for day in (1, 2)
+    ]
+    monkeypatch.setattr(PackageMaintenancePDFsView, '_render_with_template',
+                        staticmethod(lambda template_id, maintenances: ({ok.id: b'%PDF-1.4', empty.id: None}, None)))
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='tec', password='x'))
+
+    response = client.post('/api/pdf-package/maintenances/',
+                           {'maintenance_ids': [ok.id, empty.id], 'template_id': 1}, format='json')
+    assert response.status_code == 200
+    assert response['X-Failed-Maintenances'] == str(empty.id)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert sorted(archive.namelist()) == ['errores.txt', 'mantenimiento_P1_20250101.pdf']
+        assert f'Mantenimiento {empty.id}' in archive.read('errores.txt').decode()
+
+
+@pytest.mark.django_db
+def test_template_batch_and_package_read_snapshots(monkeypatch):
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop')
+    done = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, 1), status='completed')
+    live = Maintenance.objects.create(equipment=Equipment.objects.create(code='EQ002', name='Monitor'),
+                                      scheduled_date=datetime.date(2025, 1, 2))
+    MaintenanceSnapshot.objects.filter(pk=done.pk).update(data={'fields': {'codigo': 'SNAPSHOT'}})
+    template = Template.objects.create(name='GTI', type='pdf', html_content='{{ codigo }}')
+    rendered = []
+
+    def fake_batch(template, datasets, split=False):
+        rendered.append([data['codigo'] for data in datasets])
+        return [b'%PDF-1.4'] * len(datasets) if split else b'%PDF-1.4'
+
+    monkeypatch.setattr(views_template_manager, 'render_template_batch', fake_batch)
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='tec', password='x'))
+
+    response = client.post(f'/api/templates/{template.id}/generate/',
+                           {'maintenance_ids': [live.id, done.id, 999999], 'split': True}, format='json')
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert sorted(archive.namelist()) == [f'GTI_EQ001_{done.id}.pdf', f'GTI_EQ002_{live.id}.pdf']
+
+    pdfs, error = PackageMaintenancePDFsView._render_with_template(template.id, [done, live])
+    assert error is None and set(pdfs) == {done.id, live.id}
+    assert rendered == [[str(live.id), 'SNAPSHOT'], ['SNAPSHOT', str(live.id)]]
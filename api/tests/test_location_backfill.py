@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from api.models import Dependencia, Equipment, Maintenance, MaintenanceSnapshot, Sede, Subdependencia
+from api.services.location_backfill import backfill_locations
+
+
+@pytest.mark.django_db
+def test_backfill_resolves_legacy_text_to_fks():
+    sede = Sede.objects.create(nombre='Sede Principal')
+    hacienda = Dependencia.objects.create(nombre='Secretaría de Hacienda', sede=sede)
+    Dependencia.objects.create(nombre='Secretaría de Salud', sede=sede)
+    tesoreria = Subdependencia.objects.create(nombre='Tesorería', dependencia=hacienda)
+
+    # bulk_create no dispara pre_save: filas legacy sin FKs
+    equipment, = Equipment.objects.bulk_create([Equipment(code='EQ001', name='Laptop', dependencia='hacienda')])
+    printer = Equipment.objects.create(code='EQ002', name='Impresora')
+    exact, typo, unknown = Maintenance.objects.bulk_create([
+        Maintenance(equipment=equipment, scheduled_date=datetime.date(2025, 1, 1),
+                    sede='PRINCIPAL', dependencia='Secretaria de Hacienda', ubicacion='tesoreria'),
+        Maintenance(equipment=printer, scheduled_date=datetime.date(2025, 1, 2),
+                    dependencia='Secretaria de Haciendaa', status='completed'),
+        Maintenance(equipment=equipment, scheduled_date=datetime.date(2025, 1, 3), dependencia='Archivo central'),
+    ])
+    MaintenanceSnapshot.objects.create(maintenance=typo, data={'fields': {}})
+    stamp = Maintenance.objects.get(pk=typo.pk).updated_at
+
+    result = backfill_locations(chunk_size=2)
+    assert result['updated'] == {'equipment': 1, 'maintenance': 2}
+    assert result['unresolved'] == {('maintenance.dependencia', 'Archivo central'): 1}
+
+    equipment.refresh_from_db()
+    assert (equipment.dependencia_rel_id, equipment.sede_rel_id) == (hacienda.id, sede.id)
+    exact.refresh_from_db()
+    assert (exact.sede_rel_id, exact.dependencia_rel_id, exact.subdependencia_id) == (sede.id, hacienda.id, tesoreria.id)
+    typo.refresh_from_db()
+    assert (typo.dependencia_rel_id, typo.sede_rel_id) == (hacienda.id, sede.id)
+    # updated_at avanza (claves de render_cache) y el snapshot se regenera
+    assert typo.updated_at > stamp
+    assert MaintenanceSnapshot.objects.get(pk=typo.pk).source_updated_at == typo.updated_at
+    unknown.refresh_from_db()
+    assert unknown.dependencia_rel_id is None
+
+    # Una segunda corrida solo revisa lo pendiente
+    assert backfill_locations()['updated'] == {'equipment': 0, 'maintenance': 0}
+
+
+@pytest.mark.django_db
+def test_legacy_text_resolved_on_save():
+    sede = Sede.objects.create(nombre='Sede Principal')
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop', dependencia='hacienda')
+    assert equipment.dependencia_rel_id is None
+
+    # Una dependencia nueva invalida el índice compartido
+    hacienda = Dependencia.objects.create(nombre='Secretaría de Hacienda', sede=sede)
+    maintenance = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, 1),
+                                             sede='principal', dependencia='Hacienda')
+    assert (maintenance.sede_rel_id, maintenance.dependencia_rel_id) == (sede.id, hacienda.id)
+    assert Maintenance.objects.filter(dependencia_rel=hacienda).count() == 1
+
+    equipment.save()
+    assert (equipment.dependencia_rel_id, equipment.sede_rel_id) == (hacienda.id, sede.id)
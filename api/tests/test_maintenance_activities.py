@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from api.models import Equipment, Maintenance, MaintenanceActivity
+
+
+@pytest.mark.django_db
+def test_activities_are_normalized_on_save():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    m = Maintenance.objects.create(
+        equipment=equipment,
+        scheduled_date=datetime.date(2025, 1, 1),
+        activities={'limpieza_teclado': True, 'Instalar antivirus': 'pendiente', 'Otra': 'N/A', 'Nota': 'sin dato'},
+    )
+    rows = {r.activity_key: r for r in MaintenanceActivity.objects.filter(maintenance=m)}
+    assert set(rows) == {'limpieza del teclado', 'instalar antivirus', 'otra'}
+    assert rows['limpieza del teclado'].value == 'SI'
+    assert rows['instalar antivirus'].value == 'PENDIENTE'
+    assert rows['otra'].value == 'NA'
+
+    m.activities = {'Limpieza del teclado': 'no'}
+    m.save()
+    assert list(m.activity_rows.values_list('activity_key', 'value')) == [('limpieza del teclado', 'NO')]
+
+    m.save(update_fields=['observations'])
+    assert m.activity_rows.count() == 1
+
+
+@pytest.mark.django_db
+def test_activity_compliance_endpoint():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    for value in (True, True, False, 'na'):
+        Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, 1),
+                                   activities={'Limpieza del teclado': value})
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="x"))
+    res = client.get("/api/dashboard/activity-compliance/", {"start_date": "2025-01-01"})
+    assert res.status_code == 200
+    [row] = res.data['activities']
+    assert (row['total'], row['si'], row['no'], row['na'], row['compliance']) == (4, 2, 1, 1, 66.7)
+
+
+@pytest.mark.django_db
+def test_backfill_regenerates_rows_in_pages():
+    from api.services.maintenance_activities import backfill_activities
+
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    for day in range(1, 6):
+        Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, day),
+                                   activities={'Otra': 'N/A'})
+    MaintenanceActivity.objects.all().delete()
+    assert backfill_activities(chunk_size=2) == (5, 5)
+    assert MaintenanceActivity.objects.count() == 5
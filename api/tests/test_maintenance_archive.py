@@ -0,0 +1,42 @@
+import datetime
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from rest_framework.test import APIClient
+
+from api.models import ArchivedMaintenance, AuditLog, Equipment, Maintenance, Photo, Report
+from api.services.maintenance_archive import archive_maintenances
+
+
+@pytest.mark.django_db
+def test_archive_moves_old_maintenances_and_reads_them_back():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    old = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2020, 1, 1),
+                                     status='completed', observations='Histórico')
+    recent = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today(), status='completed')
+    photo = Photo(maintenance=old, caption='Antes')
+    photo.photo.save('antes.jpg', ContentFile(b'jpeg'), save=True)
+    report = Report.objects.create(maintenance=old, title='Informe')
+    report.pdf_file.save('informe.pdf', ContentFile(b'%PDF-1.4'), save=True)
+
+    result = archive_maintenances(days=365, chunk_size=1)
+    assert result['archived'] == 1
+    assert list(Maintenance.objects.values_list('id', flat=True)) == [recent.id]
+    assert not Photo.objects.exists() and not Report.objects.exists()
+    assert ArchivedMaintenance.objects.get().fields['equipment_code'] == 'EQ001'
+    assert AuditLog.objects.filter(object_id=old.id, action='archive').count() == 1
+    assert not AuditLog.objects.filter(object_id=old.id, action='delete').exists()
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="x", is_staff=True))
+    res = client.get(f"/api/maintenances/{old.id}/")
+    assert res.status_code == 200
+    assert res.data['archived'] is True
+    assert res.data['observations'] == 'Histórico'
+    assert [p['caption'] for p in res.data['photos']] == ['Antes']
+
+    res = client.get(f"/api/maintenances/{old.id}/archived-reports/{report.id}/")
+    assert res.status_code == 200
+    assert b''.join(res.streaming_content) == b'%PDF-1.4'
+    assert client.get("/api/maintenances/999999/").status_code == 404
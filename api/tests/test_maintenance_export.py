@@ -0,0 +1,83 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from api.models import Equipment, Incident, Maintenance
+from api.services.maintenance_export import EXPORT_COLUMNS, iter_export_records, write_maintenances_xlsx
+
+
+@pytest.fixture
+def maintenances():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop", location="Oficina")
+    return [
+        Maintenance.objects.create(
+            equipment=equipment,
+            scheduled_date=datetime.date(2025, 1, day),
+            status='completed' if day % 2 else 'pending',
+            sede='Sede legacy',
+        )
+        for day in range(1, 6)
+    ]
+
+
+@pytest.mark.django_db
+def test_export_xlsx_applies_list_filters(maintenances):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="x", is_staff=True))
+
+    res = client.get("/api/maintenances/export.xlsx", {"status": "completed"})
+    assert res.status_code == 200
+    assert 'mantenimientos_' in res['Content-Disposition']
+
+    ws = load_workbook(io.BytesIO(b''.join(res.streaming_content)), read_only=True).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert list(rows[0]) == EXPORT_COLUMNS
+    record = dict(zip(EXPORT_COLUMNS, rows[1]))
+    assert [r[0] for r in rows[1:]] == [m.id for m in maintenances if m.status == 'completed']
+    assert record['equipment_code'] == 'EQ001'
+    assert record['sede'] == 'Sede legacy'
+
+
+@pytest.mark.django_db
+def test_streaming_export_csv_ndjson_gzip(maintenances):
+    Incident.objects.create(equipment=maintenances[0].equipment, maintenance=maintenances[0], description='Falla')
+    Incident.objects.create(equipment=maintenances[1].equipment, maintenance=maintenances[1], description='Otra')
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="x", is_staff=True))
+
+    res = client.get("/api/maintenances/export/", {"status": "completed"})
+    assert res['Content-Type'].startswith('text/csv')
+    rows = list(csv.reader(b''.join(res.streaming_content).decode('utf-8-sig').splitlines()))
+    assert rows[0] == EXPORT_COLUMNS
+    assert [int(r[0]) for r in rows[1:]] == [m.id for m in maintenances if m.status == 'completed']
+
+    res = client.get("/api/maintenances/export/", {"dataset": "incidents", "file_type": "ndjson", "gzip": "true", "status": "completed"})
+    assert res['Content-Type'] == 'application/gzip'
+    lines = gzip.decompress(b''.join(res.streaming_content)).decode('utf-8').splitlines()
+    assert [json.loads(line)['description'] for line in lines] == ['Falla']
+
+    res = client.get("/api/maintenances/export/", {"dataset": "bogus"})
+    assert res.status_code == 400
+
+
+@pytest.mark.django_db
+def test_export_records_are_read_by_keyset_pages(maintenances, django_assert_num_queries):
+    # 5 filas en bloques de 2: 3 páginas; la última, incompleta, cierra el recorrido
+    with django_assert_num_queries(3):
+        records = list(iter_export_records(Maintenance.objects.filter(status__in=['completed', 'pending']), chunk_size=2))
+    assert [r['id'] for r in records] == [m.id for m in maintenances]
+
+
+@pytest.mark.django_db
+def test_xlsx_export_reads_by_keyset_pages(maintenances, django_assert_num_queries):
+    with django_assert_num_queries(3):
+        tmp = write_maintenances_xlsx(Maintenance.objects.all(), chunk_size=2)
+    rows = list(load_workbook(tmp, read_only=True).active.iter_rows(values_only=True))
+    assert [row[0] for row in rows[1:]] == [m.id for m in maintenances]
@@ -0,0 +1,94 @@
+import json
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.utils.datastructures import MultiValueDict
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.models import AuditLog, Equipment, Maintenance, MaintenanceSnapshot, Sede
+from api.services import maintenance_activities, maintenance_import
+from api.services.maintenance_import import import_maintenances
+
+
+@pytest.fixture
+def client():
+    user = User.objects.create_user(username="admin", password="12345", is_staff=True)
+    api = APIClient()
+    api.force_authenticate(user=user)
+    return api
+
+
+@pytest.mark.django_db
+def test_bulk_import_json_reports_per_row_results(client):
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop", location="Oficina")
+    rows = [
+        {"equipment": equipment.id, "scheduled_date": "2025-01-10", "activities": {"Limpieza general": "si"}},
+        {"equipment": 9999, "scheduled_date": "2025-01-11"},
+        {"equipment": equipment.id, "scheduled_date": "2025-01-12", "status": "completed"},
+    ]
+
+    res = client.post("/api/maintenances/bulk-import/?batch_size=1", rows, format="json")
+
+    assert res.status_code == 207
+    assert res.data["created"] == 2
+    assert res.data["failed"] == 1
+    assert [r["status"] for r in res.data["results"]] == ["created", "error", "created"]
+    assert "equipment" in res.data["results"][1]["errors"]
+    assert Maintenance.objects.count() == 2
+    # One audit entry per created maintenance, written in bulk
+    assert AuditLog.objects.filter(model_name="maintenance", changes="bulk_import").count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_import_ndjson_dry_run_writes_nothing(client):
+    equipment = Equipment.objects.create(code="EQ002", name="Impresora", location="Bodega")
+    body = "\n".join(json.dumps({"equipment": equipment.id, "scheduled_date": f"2025-02-0{i}"}) for i in range(1, 4))
+
+    res = client.post(
+        "/api/maintenances/bulk-import/?dry_run=true",
+        data=body,
+        content_type="application/x-ndjson",
+    )
+
+    assert res.status_code == 200
+    assert [r["status"] for r in res.data["results"]] == ["valid"] * 3
+    assert Maintenance.objects.count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("returns_pks", [True, False], ids=["bulk_create", "mysql_fallback"])
+def test_import_runs_hooks_once_on_both_backends(monkeypatch, returns_pks):
+    # Sin RETURNING (MySQL) bulk_insert guarda fila a fila y los signals se disparan
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", returns_pks)
+    synced, warmed = [], []
+    real_sync = maintenance_activities.sync_activities
+    monkeypatch.setattr(maintenance_import, "sync_activities", lambda ms: synced.extend(m.pk for m in ms) or real_sync(ms))
+    monkeypatch.setattr("api.signals.sync_activities", lambda ms: synced.extend(m.pk for m in ms) or real_sync(ms))
+    monkeypatch.setattr(maintenance_import, "schedule_report_warmup", warmed.append)
+
+    sede = Sede.objects.create(nombre="Sede Principal", codigo="SP")
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    jpeg = BytesIO()
+    Image.new("RGB", (20, 20), "red").save(jpeg, "JPEG")
+    files = MultiValueDict({"photos_0": [SimpleUploadedFile("a.jpg", jpeg.getvalue(), content_type="image/jpeg")]})
+    rows = [
+        {"equipment": equipment.id, "scheduled_date": "2025-01-10", "status": "completed", "sede": "sede principal",
+         "activities": {"Limpieza general": "si"}},
+        {"equipment": equipment.id, "scheduled_date": "2025-01-11"},
+    ]
+
+    summary = import_maintenances(rows, files=files)
+    done, pending = (Maintenance.objects.get(pk=r["id"]) for r in summary["results"])
+
+    assert done.sede_rel_id == sede.id
+    assert sorted(synced) == [done.pk, pending.pk]
+    assert done.activity_rows.count() == 1
+    assert warmed == [done.pk]
+    snapshot = MaintenanceSnapshot.objects.get(pk=done.pk)
+    assert len(snapshot.data["photos"]) == 1
+    assert not MaintenanceSnapshot.objects.filter(pk=pending.pk).exists()
+    assert AuditLog.objects.filter(model_name="maintenance").count() == 2
@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+
+from api.models import Equipment, Maintenance, MaintenanceSnapshot
+from api.services.maintenance_serializer import serialize_maintenance, serialize_maintenances
+
+
+@pytest.fixture
+def maintenances():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop", location="Oficina")
+    return [
+        Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 1, day))
+        for day in range(1, 6)
+    ]
+
+
+@pytest.mark.django_db
+def test_serialize_maintenances_matches_single_serializer(maintenances):
+    ids = [m.id for m in reversed(maintenances)] + [999999]
+    expected = [serialize_maintenance(mid) for mid in ids[:-1]]
+    assert list(serialize_maintenances(ids)) == expected
+
+
+@pytest.mark.django_db
+def test_serialize_maintenances_uses_constant_queries(maintenances, django_assert_num_queries):
+    # 1 select_related + 3 prefetch (photos, signatures, second_signatures)
+    with django_assert_num_queries(4):
+        pairs = list(serialize_maintenances(Maintenance.objects.order_by('id'), with_instances=True))
+        for m, _ in pairs:
+            list(m.photos.all())
+    assert [m.id for m, _ in pairs] == [m.id for m in maintenances]
+    assert pairs[0][1]['equipment_code'] == 'EQ001'
+
+
+@pytest.mark.django_db
+def test_completed_maintenance_serializes_from_snapshot(maintenances, django_assert_num_queries):
+    m = maintenances[0]
+    live = serialize_maintenance(m.id)
+    m.status = 'completed'
+    m.save()
+    snapshot = MaintenanceSnapshot.objects.get(pk=m.id)
+    assert snapshot.data['fields']['status'] == 'Completado'
+
+    with django_assert_num_queries(1):
+        assert serialize_maintenance(m.id) == {**live, 'status': 'Completado'}
+
+    m.observations = 'Cambio'
+    m.save()
+    snapshot.refresh_from_db()
+    assert snapshot.revision == 2 and snapshot.data['fields']['observations'] == 'Cambio'
+
+    m.status = 'in_progress'
+    m.save()
+    assert not MaintenanceSnapshot.objects.filter(pk=m.id).exists()
+
+
+@pytest.mark.django_db
+def test_equipment_edit_invalidates_snapshot(maintenances):
+    m = maintenances[0]
+    m.status = 'completed'
+    m.save()
+    assert MaintenanceSnapshot.objects.filter(pk=m.id).exists()
+
+    equipment = m.equipment
+    equipment.name = 'Portátil'
+    equipment.save()
+    assert not MaintenanceSnapshot.objects.filter(pk=m.id).exists()
+    assert serialize_maintenance(m.id)['equipment_name'] == 'Portátil'
+
+
+@pytest.mark.django_db
+def test_queryset_is_read_by_keyset(maintenances, django_assert_num_queries):
+    queryset = Maintenance.objects.order_by('-id')
+    # 2 bloques (3 + 2), cada uno: 1 select_related + 3 prefetch
+    with django_assert_num_queries(8):
+        pairs = list(serialize_maintenances(queryset, with_instances=True, chunk_size=3))
+    assert [m.id for m, _ in pairs] == [m.id for m in maintenances]
+    assert list(serialize_maintenances(queryset, chunk_size=2)) == [data for _, data in pairs]
+
+    # Un slice conserva su orden
+    newest = [data['codigo'] for data in serialize_maintenances(queryset[:2])]
+    assert newest == [serialize_maintenance(m.id)['codigo'] for m in maintenances[:-3:-1]]
@@ -0,0 +1,76 @@
+import datetime
+import io
+
+import boto3
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from api.models import Equipment, Maintenance, Photo, Signature
+from api.services import media_fetch
+from api.services.media_fetch import media_batches, prefetch_media, read_field_bytes
+
+
+def _maintenance_with_media(code, photos=2):
+    equipment = Equipment.objects.create(code=code, name='Laptop')
+    maintenance = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today())
+    for n in range(photos):
+        name = default_storage.save(f'maintenance_photos/{code}_{n}.jpg', ContentFile(f'{code}-{n}'.encode()))
+        Photo.objects.filter(pk=Photo.objects.create(maintenance=maintenance).pk).update(photo=name)
+    name = default_storage.save(f'signatures/{code}.png', ContentFile(b'firma'))
+    Signature.objects.filter(pk=Signature.objects.create(maintenance=maintenance).pk).update(signature_image=name)
+    return maintenance
+
+
+def _related():
+    return Maintenance.objects.prefetch_related('photos', 'signatures', 'second_signatures')
+
+
+@pytest.mark.django_db
+def test_prefetch_media_reads_files_and_skips_missing():
+    maintenance = _maintenance_with_media('EQ1')
+    Photo.objects.create(maintenance=maintenance)
+    Photo.objects.filter(photo='').update(photo='maintenance_photos/no_existe.jpg')
+
+    media = prefetch_media([_related().get(pk=maintenance.pk)], max_workers=4)
+    assert media == {
+        'maintenance_photos/EQ1_0.jpg': b'EQ1-0',
+        'maintenance_photos/EQ1_1.jpg': b'EQ1-1',
+        'signatures/EQ1.png': b'firma',
+    }
+
+
+@pytest.mark.django_db
+def test_media_batches_keeps_order_and_bounds_memory(django_assert_num_queries):
+    ids = [_maintenance_with_media(f'EQ{n}', photos=1).pk for n in range(5)]
+    ids.reverse()
+
+    batches = media_batches(_related(), ids, chunk_size=2)
+    seen = []
+    for maintenances, media in batches:
+        # Solo las imágenes del bloque actual
+        assert len(media) == 2 * len(maintenances)
+        seen.extend(m.pk for m in maintenances)
+    assert seen == ids
+
+    # Una consulta de mantenimientos y una por relación prefetch por bloque
+    with django_assert_num_queries(4):
+        next(media_batches(_related(), ids, chunk_size=2))
+
+
+def test_read_field_bytes_from_s3(monkeypatch):
+    storage = S3Boto3Storage(bucket_name='media', endpoint_url='http://minio:9000', access_key='key',
+                             secret_key='secret', region_name='us-east-1', location='media')
+    client = boto3.client('s3', endpoint_url='http://minio:9000', aws_access_key_id='key',
+                          aws_secret_access_key='secret', region_name='us-east-1')
+    monkeypatch.setattr(media_fetch, 'get_s3_client', lambda storage: client)
+    field_file = Photo(photo='maintenance_photos/a.jpg').photo
+    field_file.storage = storage
+
+    with Stubber(client) as stubber:
+        stubber.add_response('get_object', {'Body': StreamingBody(io.BytesIO(b'jpeg'), 4)},
+                             {'Bucket': 'media', 'Key': 'media/maintenance_photos/a.jpg'})
+        assert read_field_bytes(field_file) == b'jpeg'
@@ -0,0 +1,44 @@
+import datetime
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from api.models import Equipment, Maintenance, Photo, Signature
+
+
+def _jpeg_with_exif(size=(3000, 2000)):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotar 90°
+    exif[0x010F] = 'PhoneMaker'
+    out = BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(out, 'JPEG', quality=95, exif=exif)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_photo_ingest_orients_strips_and_dedupes(settings):
+    settings.MEDIA_INGEST_PHOTO_MAX_PX = 1000
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    maintenance = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today())
+    raw = _jpeg_with_exif()
+
+    first = Photo.objects.create(maintenance=maintenance, photo=SimpleUploadedFile('IMG_1.jpg', raw))
+    with Image.open(first.photo.open('rb')) as img:
+        assert img.size == (667, 1000)
+        assert not img.getexif()
+    assert first.content_hash and first.photo.size < len(raw)
+
+    second = Photo.objects.create(maintenance=maintenance, photo=SimpleUploadedFile('IMG_2.jpg', raw))
+    assert second.photo.name == first.photo.name
+
+
+@pytest.mark.django_db
+def test_signature_keeps_transparency():
+    out = BytesIO()
+    Image.new('RGBA', (400, 200), (0, 0, 0, 0)).save(out, 'PNG')
+    signature = Signature.objects.create(signature_image=SimpleUploadedFile('firma.png', out.getvalue()))
+    assert signature.signature_image.name.endswith('.png')
+    with Image.open(signature.signature_image.open('rb')) as img:
+        assert img.mode == 'RGBA'
@@ -0,0 +1,30 @@
+from api.services.path_accessor import compile_path, resolve_path
+
+DATA = {
+    'equipment': {'serial_number': 'SN1'},
+    'photos': [{'url': 'a.jpg'}, {'url': 'b.jpg'}],
+    'by_id': {3: 'tres'},
+}
+
+
+def test_compile_path_is_cached_and_tokenizes_brackets():
+    steps = compile_path('photos[1].url')
+    assert steps == (('photos', None), ('1', 1), ('url', None))
+    assert compile_path('photos[1].url') is steps
+    assert compile_path('') is None and compile_path(None) is None
+
+
+def test_resolve_path():
+    assert resolve_path(DATA, 'equipment.serial_number') == 'SN1'
+    assert resolve_path(DATA, 'photos[1].url') == 'b.jpg'
+    assert resolve_path(DATA, 'photos.0.url') == 'a.jpg'
+    assert resolve_path(DATA, 'photos[-1].url') == 'b.jpg'
+    assert resolve_path(DATA, 'by_id[3]') == 'tres'
+
+
+def test_resolve_path_returns_none_on_failure():
+    assert resolve_path(DATA, 'photos[5].url') is None
+    assert resolve_path(DATA, 'photos.url') is None
+    assert resolve_path(DATA, 'equipment.serial_number.x') is None
+    assert resolve_path(DATA, 'missing') is None
+    assert resolve_path(None, 'a') is None
@@ -0,0 +1,51 @@
+import datetime
+import io
+
+import pytest
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from api.models import Equipment, Maintenance
+from api.reports import BatchMaintenanceReportPDF
+from api.services.pdf_merge import merge_pdfs
+from api.services.render_cache import render_maintenance_pdf
+
+
+def _pdf(pages):
+    out = io.BytesIO()
+    pdf = canvas.Canvas(out)
+    for n in range(pages):
+        pdf.drawString(100, 700, f'pagina {n + 1}')
+        pdf.showPage()
+    pdf.save()
+    return out.getvalue()
+
+
+def _outline(reader):
+    return [(item.title, reader.get_destination_page_number(item)) for item in reader.outline]
+
+
+def test_merge_pdfs_appends_pages_with_bookmarks():
+    merged = merge_pdfs([('Uno', _pdf(2)), (None, io.BytesIO(_pdf(1))), ('Tres', _pdf(3))], output=io.BytesIO())
+    reader = PdfReader(merged)
+    assert len(reader.pages) == 6
+    assert _outline(reader) == [('Uno', 0), ('Tres', 3)]
+
+
+@pytest.mark.django_db
+def test_batch_report_has_cover_and_one_bookmark_per_maintenance():
+    equipment = Equipment.objects.create(code='EQ001', name='Laptop', serial_number='SN-1')
+    maintenances = [
+        Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date(2025, 3, day),
+                                   placa=f'PL-{day}', description='Limpieza general')
+        for day in (1, 2)
+    ]
+    sizes = [len(PdfReader(io.BytesIO(render_maintenance_pdf(m))).pages) for m in maintenances]
+
+    reader = PdfReader(BatchMaintenanceReportPDF(maintenances).generate())
+    assert len(reader.pages) == 1 + sum(sizes)
+    assert _outline(reader) == [
+        ('Portada', 0),
+        ('Reporte 1: PL-1 (01/03/2025)', 1),
+        ('Reporte 2: PL-2 (02/03/2025)', 1 + sizes[0]),
+    ]
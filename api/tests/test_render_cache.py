@@ -0,0 +1,109 @@
+import datetime
+
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from api.models import Equipment, Maintenance, Template
+from api.reports import BatchMaintenanceReportPDF, MaintenanceReportPDF
+from api.services import render_cache
+from api.services.maintenance_serializer import with_report_relations
+from api.services.render_cache import (
+    FORMAT_HEADERS,
+    maintenance_render_key,
+    stale_render_entries,
+    store_render,
+)
+from api.services.report_warmer import warm_maintenance_reports
+from api.views_template_manager import generate_report
+
+
+def _load(pk):
+    return with_report_relations(Maintenance.objects.filter(pk=pk)).get()
+
+
+@pytest.fixture
+def maintenance(settings):
+    settings.REPORT_PREWARM = False
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    return Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today(),
+                                      maintenance_type='computer', status='completed')
+
+
+@pytest.mark.django_db
+def test_render_key_tracks_related_objects(maintenance):
+    key = maintenance_render_key(_load(maintenance.pk))
+    assert maintenance_render_key(_load(maintenance.pk)) == key
+
+    equipment = maintenance.equipment
+    equipment.name = 'Portátil'
+    equipment.save()
+    assert maintenance_render_key(_load(maintenance.pk)) != key
+
+
+@pytest.mark.django_db
+def test_warmer_renders_and_stale_entries_are_evictable(maintenance):
+    assert warm_maintenance_reports(maintenance.pk) >= 2
+    m = _load(maintenance.pk)
+    pdf_key = maintenance_render_key(m)
+    header_key = maintenance_render_key(m, variant=FORMAT_HEADERS['computer'])
+    assert default_storage.exists(pdf_key) and default_storage.exists(header_key)
+    assert stale_render_entries() == []
+
+    store_render('reports/cache/maintenance_999999_abc.pdf', b'%PDF')
+    Maintenance.objects.filter(pk=m.pk).update(updated_at=m.updated_at + datetime.timedelta(days=1))
+    stale = {name for name, _ in stale_render_entries()}
+    assert pdf_key in stale and header_key in stale
+    assert 'reports/cache/maintenance_999999_abc.pdf' in stale
+
+
+@pytest.mark.django_db
+def test_batch_prefetches_media_per_block_for_uncached_reports(maintenance, monkeypatch, settings):
+    settings.MEDIA_PREFETCH_CHUNK = 2
+    for day in (2, 3):
+        Maintenance.objects.create(equipment=maintenance.equipment, scheduled_date=datetime.date(2025, 1, day),
+                                   status='completed')
+    loaded = list(with_report_relations(Maintenance.objects.order_by('id')))
+    store_render(maintenance_render_key(loaded[0]), b'%PDF-cached')
+    prefetched, rendered = [], []
+    monkeypatch.setattr(render_cache, 'prefetch_media',
+                        lambda block: prefetched.append([m.pk for m in block]) or {'block': len(prefetched)})
+    monkeypatch.setattr(render_cache, 'render_maintenance_pdf',
+                        lambda m, media=None: rendered.append((m.pk, media)) or b'%PDF')
+
+    parts = list(BatchMaintenanceReportPDF(loaded)._parts())
+    assert [title for title, _ in parts[1:]] == [BatchMaintenanceReportPDF.bookmark_title(i, m) for i, m in enumerate(loaded)]
+    # El render en caché no descarga imágenes; el resto, una descarga por bloque
+    assert prefetched == [[loaded[1].pk], [loaded[2].pk]]
+    assert rendered == [(loaded[0].pk, {'block': 1}), (loaded[1].pk, {'block': 1}), (loaded[2].pk, {'block': 2})]
+
+
+@pytest.mark.django_db
+def test_package_passes_prefetched_media(maintenance, monkeypatch):
+    seen = []
+    monkeypatch.setattr(render_cache, 'prefetch_media', lambda block: {'a.jpg': b'x'})
+    monkeypatch.setattr(MaintenanceReportPDF, 'generate', lambda self: seen.append(self.media) or BytesIO(b'%PDF'))
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='tec', password='x'))
+
+    response = client.post('/api/pdf-package/maintenances/', {'maintenance_ids': [maintenance.id]}, format='json')
+    assert response.status_code == 200
+    assert seen == [{'a.jpg': b'x'}]
+
+
+@pytest.mark.django_db
+def test_excel_report_without_generator_is_501(maintenance, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise ImportError('No module named openpyxl')
+
+    monkeypatch.setattr(render_cache, 'render_maintenance_excel', unavailable)
+    template = Template.objects.create(name='Rutina', type='excel', html_content='')
+    # /api/reports/generate/ lo resuelve antes ReportGenerateView: se llama a la vista directamente
+    request = APIRequestFactory().post('/', {'maintenance_id': maintenance.id, 'template_id': template.id}, format='json')
+    force_authenticate(request, User.objects.create_user(username='tec', password='x'))
+
+    response = generate_report(request)
+    assert response.status_code == 501 and 'openpyxl' in response.data['error']
@@ -0,0 +1,40 @@
+import datetime
+
+import pytest
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from api.models import Equipment, Maintenance, Report
+from api.services.report_artifacts import attach_report_file, collect_report_garbage
+
+
+@pytest.mark.django_db
+def test_dedupe_and_garbage_collection():
+    equipment = Equipment.objects.create(code="EQ001", name="Laptop")
+    maintenance = Maintenance.objects.create(equipment=equipment, scheduled_date=datetime.date.today())
+
+    first = attach_report_file(Report(maintenance=maintenance, title='Informe'), 'informe.pdf', b'%PDF-same')
+    second = attach_report_file(Report(maintenance=maintenance, title='Informe'), 'informe.pdf', b'%PDF-same')
+    assert second.pdf_file.name == first.pdf_file.name
+    assert second.file_size == 9 and second.expires_at is not None
+
+    Report.objects.filter(pk=first.pk).update(generated_at=timezone.now() - datetime.timedelta(days=3))
+    newest = attach_report_file(Report(maintenance=maintenance, title='Informe'), 'informe.pdf', b'%PDF-new')
+    # Otro tipo de reporte (formato oficial): único de su tipo, se conserva aunque venza
+    official = attach_report_file(Report(maintenance=maintenance, report_data={'format': 'GTI-F-015'}),
+                                  'gti.pdf', b'%PDF-gti')
+    Report.objects.filter(pk=official.pk).update(generated_at=timezone.now() - datetime.timedelta(days=40),
+                                                 expires_at=timezone.now() - datetime.timedelta(days=10))
+    Report.objects.filter(pk=second.pk).update(generated_at=timezone.now() - datetime.timedelta(days=2))
+    expired = attach_report_file(Report(title='suelto'), 'suelto.pdf', b'%PDF-old', ttl_days=1)
+    Report.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - datetime.timedelta(hours=1))
+
+    preview = collect_report_garbage(dry_run=True)
+    assert (preview['expired'], preview['superseded'], preview['files'], preview['bytes']) == (1, 2, 2, 17)
+    assert Report.objects.count() == 5
+
+    result = collect_report_garbage()
+    assert result['files'] == 2 and result['failed'] == 0
+    assert set(Report.objects.values_list('id', flat=True)) == {newest.pk, official.pk}
+    assert not default_storage.exists(first.pdf_file.name)
+    assert default_storage.exists(newest.pdf_file.name)
@@ -0,0 +1,78 @@
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from reportlab.lib.units import inch
+
+from api.models import Photo
+from api.services import report_images
+from api.services.report_images import clear_report_image_cache, get_report_image
+
+
+def _jpeg(color, size=(1200, 800)):
+    out = BytesIO()
+    Image.new('RGB', size, color).save(out, 'JPEG')
+    return out.getvalue()
+
+
+def _field(name, data):
+    return Photo(photo=default_storage.save(name, ContentFile(data))).photo
+
+
+@pytest.fixture(autouse=True)
+def _image_cache(settings, tmp_path):
+    settings.REPORT_IMAGE_CACHE_DIR = str(tmp_path / 'report-images')
+    settings.REPORT_IMAGE_DPI = 72
+    clear_report_image_cache()
+    yield
+    clear_report_image_cache()
+
+
+def test_scaled_and_cached_by_storage_name(monkeypatch, settings):
+    field = _field('maintenance_photos/a.jpg', _jpeg('red'))
+    reads = []
+    real_read = report_images.read_field_bytes
+    monkeypatch.setattr(report_images, 'read_field_bytes', lambda f: reads.append(f.name) or real_read(f))
+
+    reader = get_report_image(field, 2 * inch, 2 * inch)
+    assert max(reader.getSize()) == 144 and reads == [field.name]
+    assert get_report_image(field, 2 * inch, 2 * inch) is reader
+
+    # Memoria vacía (otro proceso): se sirve desde disco sin leer el storage
+    clear_report_image_cache()
+    assert get_report_image(field, 2 * inch, 2 * inch).getSize() == reader.getSize()
+    assert reads == [field.name] and len(os.listdir(settings.REPORT_IMAGE_CACHE_DIR)) == 1
+
+    # Otro nombre en el storage (foto reemplazada), otro tamaño u otro DPI: clave nueva
+    replaced = _field('maintenance_photos/a.jpg', _jpeg('blue'))
+    assert replaced.name != field.name
+    get_report_image(replaced, 2 * inch, 2 * inch)
+    get_report_image(field, 1 * inch, 1 * inch)
+    settings.REPORT_IMAGE_DPI = 150
+    get_report_image(field, 2 * inch, 2 * inch)
+    assert reads == [field.name, replaced.name, field.name, field.name]
+
+
+def test_prefetched_media_and_memory_budget(monkeypatch, settings):
+    reads = []
+
+    def missing(field_file):
+        reads.append(field_file.name)
+        raise FileNotFoundError(field_file.name)
+
+    monkeypatch.setattr(report_images, 'read_field_bytes', missing)
+    settings.REPORT_IMAGE_CACHE_DIR = False
+    settings.REPORT_IMAGE_CACHE_BYTES = 144 * 96 * 4
+    media = {'a.jpg': _jpeg('red'), 'b.jpg': _jpeg('green')}
+
+    first = get_report_image(Photo(photo='a.jpg').photo, 2 * inch, 2 * inch, media=media)
+    get_report_image(Photo(photo='b.jpg').photo, 2 * inch, 2 * inch, media=media)
+    # El presupuesto solo alcanza para una imagen: 'a.jpg' salió de memoria
+    assert len(report_images._memory) == 1
+    assert get_report_image(Photo(photo='a.jpg').photo, 2 * inch, 2 * inch, media=media) is not first
+    assert reads == []
+    assert get_report_image(Photo(photo='missing.jpg').photo, 2 * inch, 2 * inch, media={}) is None
+    assert reads == ['missing.jpg']
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+from PIL import Image
+
+from api.models import ReportTemplate
+from api.services.report_styles import clear_header_assets, get_header_assets, safe_logo_path
+
+
+@pytest.fixture(autouse=True)
+def _fresh_header():
+    clear_header_assets()
+    yield
+    clear_header_assets()
+
+
+@pytest.mark.django_db
+def test_header_reloads_when_report_template_changes():
+    assert get_header_assets()['stamp'] == 'default'
+    template = ReportTemplate.objects.create(name='Oficial', header_config={'codigo': 'GTI-F-099'})
+    header = get_header_assets()
+    assert header['codigo'] == 'GTI-F-099' and header['stamp'].startswith(f'{template.pk}:')
+
+    template.header_config = {'codigo': 'GTI-F-100'}
+    template.save()
+    assert get_header_assets()['codigo'] == 'GTI-F-100'
+
+
+@pytest.mark.django_db
+def test_request_logo_path_is_limited_to_media_root(settings):
+    os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+    logo = os.path.join(settings.MEDIA_ROOT, 'logo.png')
+    Image.new('RGB', (4, 4)).save(logo)
+
+    assert safe_logo_path('logo.png') == os.path.realpath(logo)
+    assert safe_logo_path('/etc/passwd') is None
+    assert safe_logo_path('../../etc/passwd') is None
+    default_logo = get_header_assets()['logo']
+    assert get_header_assets({'logo_path': '/etc/hosts'})['logo'] is default_logo
+    assert get_header_assets({'logo_path': 'logo.png'})['logo'] is not default_logo
@@ -0,0 +1,64 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from api.models import SiteConfiguration
+from api.services.site_config import (
+    VERSION_CACHE_KEY,
+    clear_site_config_cache,
+    get_report_setting,
+    get_site_config,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    clear_site_config_cache()
+    yield
+    clear_site_config_cache()
+
+
+@pytest.mark.django_db
+def test_version_increments_on_save():
+    obj = SiteConfiguration.objects.create(id=1, config={'site_name': 'A'})
+    assert obj.version == 1
+    obj.config = {'site_name': 'B'}
+    obj.save()
+    assert obj.version == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_save_publishes_integer_version_stamp():
+    obj = SiteConfiguration.objects.create(id=1, config={'site_name': 'A'})
+    assert cache.get(VERSION_CACHE_KEY) == 1
+    obj.config = {'site_name': 'B'}
+    obj.save()
+    stamp = cache.get(VERSION_CACHE_KEY)
+    assert isinstance(stamp, int) and stamp == 2
+    assert get_site_config() == {'site_name': 'B'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cached_config_reloads_only_when_version_changes(django_assert_num_queries):
+    SiteConfiguration.objects.create(id=1, config={'system_settings': {'site_name': 'Alcaldia'}})
+    clear_site_config_cache()
+
+    with override_settings(SITE_CONFIG_CHECK_INTERVAL=0):
+        assert get_site_config()['system_settings']['site_name'] == 'Alcaldia'
+        # Version stamp is in the cache and unchanged: no queries
+        with django_assert_num_queries(0):
+            get_site_config()
+
+        # Another worker saved a new version: the stamp changes and we reload
+        SiteConfiguration.objects.filter(id=1).update(config={'site_name': 'Nueva'}, version=5)
+        cache.set(VERSION_CACHE_KEY, 5)
+        assert get_site_config() == {'site_name': 'Nueva'}
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(REPORT_PRIMARY_COLOR='#000000')
+def test_report_setting_prefers_site_config():
+    assert get_report_setting('REPORT_PRIMARY_COLOR') == '#000000'
+    obj = SiteConfiguration.objects.create(id=1, config={'system_settings': {'report_primary_color': '#123456'}})
+    assert obj.version == 1
+    assert get_report_setting('REPORT_PRIMARY_COLOR') == '#123456'
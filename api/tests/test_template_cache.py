@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+from django.template import Context
+
+from api.models import Template
+from api.services.template_cache import (
+    cache_info, clear_template_cache, get_compiled_template, invalidate_template, template_cache_key,
+)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    clear_template_cache()
+    yield
+    clear_template_cache()
+
+
+def test_content_key_follows_html_sha1():
+    first = get_compiled_template('<p>{{ a }}</p>')
+    assert get_compiled_template('<p>{{ a }}</p>') is first
+    changed = get_compiled_template('<p>{{ a }}!</p>')
+    assert changed is not first
+    assert changed.render(Context({'a': 1})) == '<p>1!</p>'
+    assert [key[1][0] for key in cache_info()] == ['sha1', 'sha1']
+
+
+def test_lru_limit(settings):
+    settings.TEMPLATE_CACHE_SIZE = 2
+    for n in range(3):
+        get_compiled_template(f'<p>{n}</p>')
+    assert len(cache_info()) == 2
+    assert get_compiled_template('<p>0</p>') is not None and len(cache_info()) == 2
+
+
+@pytest.mark.django_db
+def test_template_key_changes_with_updated_at_and_signals_invalidate():
+    template = Template.objects.create(name='GTI', type='pdf', html_content='<p>{{ a }}</p>')
+    key = template_cache_key(template)
+    assert key == (template.pk, template.updated_at.isoformat())
+
+    compiled = get_compiled_template(template.html_content, key)
+    # Con la misma versión se reutiliza aunque el HTML en memoria difiera
+    assert get_compiled_template('<p>otro</p>', key) is compiled
+
+    template.html_content = '<p>{{ a }}?</p>'
+    template.save()
+    assert template_cache_key(template) != key
+    assert cache_info() == []  # post_save descartó las entradas del template
+    assert get_compiled_template(template.html_content, template_cache_key(template)).render(Context({'a': 2})) == '<p>2?</p>'
+
+    stale = (template.pk, (template.updated_at - datetime.timedelta(days=1)).isoformat())
+    get_compiled_template('<p>viejo</p>', stale)
+    assert invalidate_template(template.pk) == 2
+    get_compiled_template(template.html_content, template_cache_key(template))
+    template.delete()
+    assert cache_info() == []
@@ -8,6 +8,7 @@ from .views_dashboard import (
     DashboardChartsView,
     DashboardRecentActivityView,
     DashboardDepartmentStatsView,
+    DashboardActivityComplianceView,
 )
 
 app_name = 'api_dashboard'
@@ -17,4 +18,5 @@ urlpatterns = [
     path('charts/', DashboardChartsView.as_view(), name='dashboard-charts'),
     path('recent-activity/', DashboardRecentActivityView.as_view(), name='dashboard-recent-activity'),
     path('department-stats/', DashboardDepartmentStatsView.as_view(), name='dashboard-department-stats'),
+    path('activity-compliance/', DashboardActivityComplianceView.as_view(), name='dashboard-activity-compliance'),
 ]
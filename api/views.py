@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser, FormParser
 from .pagination import StandardResultsSetPagination
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.authentication import SessionAuthentication
@@ -30,14 +31,59 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'export_inventory']:
             # Técnicos y admins pueden ver equipos
             self.permission_classes = [IsAdminOrTechnician]
-        elif self.action in ['create', 'update', 'partial_update', 'destroy']:
+        elif self.action in ['create', 'update', 'partial_update', 'destroy', 'import_inventory']:
             # Solo admins pueden crear, editar y eliminar equipos
             self.permission_classes = [IsAdmin]
         return super().get_permissions()
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_inventory(self, request):
+        """
+        Upsert del inventario desde CSV/XLSX (campo 'file'), por code/serial_number.
+        Parámetros: ?dry_run=true
+        """
+        from .services.equipment_inventory import PARSE_ERRORS, import_equipment_inventory, iter_inventory_rows
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': "Se requiere un archivo CSV o XLSX en el campo 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.query_params.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            summary = import_equipment_inventory(iter_inventory_rows(upload), user=request.user, dry_run=dry_run)
+        except PARSE_ERRORS as e:
+            return Response({'error': f'No se pudo leer el archivo: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_inventory(self, request):
+        """
+        Exportar inventario en streaming. Parámetros: ?file_type=csv|xlsx&sede_id=&dependencia_id=
+        """
+        from django.http import FileResponse, StreamingHttpResponse
+        from .services.equipment_inventory import iter_equipment_csv, write_equipment_xlsx
+
+        queryset = Equipment.objects.all()
+        if request.query_params.get('sede_id'):
+            queryset = queryset.filter(sede_rel_id=request.query_params['sede_id'])
+        if request.query_params.get('dependencia_id'):
+            queryset = queryset.filter(dependencia_rel_id=request.query_params['dependencia_id'])
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if request.query_params.get('file_type', 'csv').lower() == 'xlsx':
+            return FileResponse(
+                write_equipment_xlsx(queryset),
+                as_attachment=True,
+                filename=f'inventario_equipos_{stamp}.xlsx',
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+        response = StreamingHttpResponse(iter_equipment_csv(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="inventario_equipos_{stamp}.csv"'
+        return response
+
     @action(detail=True, methods=['get'])
     def maintenances(self, request, pk=None):
         equipment = self.get_object()
@@ -62,6 +108,70 @@ class MaintenanceViewSet(viewsets.ModelViewSet):
             self.permission_classes = [IsOwnerOrAdmin]
         return super().get_permissions()
 
+    @action(detail=False, methods=['get'], url_path='export-xlsx')
+    def export_xlsx(self, request):
+        """
+        Exportar mantenimientos a XLSX (workbook write_only, memoria constante).
+        Acepta los mismos parámetros de filtro que el listado.
+        """
+        from django.http import FileResponse
+        from .services.maintenance_export import XLSX_CONTENT_TYPE, write_maintenances_xlsx
+
+        queryset = self.filter_queryset(self.get_queryset())
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return FileResponse(
+            write_maintenances_xlsx(queryset),
+            as_attachment=True,
+            filename=f'mantenimientos_{stamp}.xlsx',
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Exportación en streaming para BI.
+        Parámetros: ?dataset=maintenances|equipment|incidents&file_type=csv|ndjson&gzip=true
+        más los filtros del listado; equipos e incidentes se limitan a los de los
+        mantenimientos filtrados cuando se envía algún filtro.
+        """
+        from django.http import StreamingHttpResponse
+        from .models import Incident
+        from .services.maintenance_export import CONTENT_TYPES, DATASETS, iter_export
+
+        dataset = request.query_params.get('dataset', 'maintenances').lower()
+        file_type = request.query_params.get('file_type', 'csv').lower()
+        if dataset not in DATASETS:
+            return Response({'error': f"dataset inválido: {dataset}"}, status=status.HTTP_400_BAD_REQUEST)
+        if file_type not in CONTENT_TYPES:
+            return Response({'error': f"file_type inválido: {file_type}"}, status=status.HTTP_400_BAD_REQUEST)
+        compress = str(request.query_params.get('gzip', '')).lower() in ('1', 'true', 'yes')
+
+        maintenances = self.filter_queryset(self.get_queryset())
+        filtered = any(name in request.query_params for name in self.filterset_class.base_filters)
+        if dataset == 'maintenances':
+            queryset = maintenances
+        elif dataset == 'equipment':
+            queryset = Equipment.objects.all()
+            if filtered:
+                queryset = queryset.filter(pk__in=maintenances.order_by().values('equipment_id'))
+        else:
+            queryset = Incident.objects.all()
+            if filtered:
+                queryset = queryset.filter(maintenance__in=maintenances.order_by().values('pk'))
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f'{dataset}_{stamp}.{file_type}'
+        content_type = CONTENT_TYPES[file_type]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            iter_export(queryset, dataset=dataset, file_type=file_type, compress=compress),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     def create(self, request, *args, **kwargs):
         # Log incoming data for debugging
         print("Request data:", request.data)
@@ -85,6 +195,31 @@ class MaintenanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    def retrieve(self, request, *args, **kwargs):
+        """Si el mantenimiento ya fue archivado, se devuelve desde el archivo (con 'archived': true)."""
+        from django.http import Http404
+        from .services.maintenance_archive import archived_payload, get_archived
+
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_archived(kwargs.get('pk'))
+            if archived is None:
+                raise
+            return Response(archived_payload(archived))
+
+    @action(detail=True, methods=['get'], url_path=r'archived-reports/(?P<report_id>\d+)')
+    def archived_report(self, request, pk=None, report_id=None):
+        """Descarga el PDF de un report de un mantenimiento archivado."""
+        from django.core.files.storage import default_storage
+        from .models import ArchivedReport
+        from .services.delivery import serve_storage_file
+
+        report = ArchivedReport.objects.filter(pk=report_id, maintenance_id=pk).first()
+        if report is None or not report.pdf_file:
+            return Response({'error': 'Reporte archivado no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_storage_file(request, default_storage, report.pdf_file.name, content_type='application/pdf')
+
     @action(detail=True, methods=['get'])
     def photos(self, request, pk=None):
         maintenance = self.get_object()
@@ -103,6 +238,92 @@ class MaintenanceViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_direct_upload(self, request, pk=None):
+        """
+        Iniciar carga directa a MinIO: { kind: photo|signature|second_signature, filename, content_type, size }.
+        Devuelve URLs prefirmadas (PUT) para cada parte.
+        """
+        from .services.direct_uploads import DirectUploadError, start_upload
+
+        maintenance = self.get_object()
+        try:
+            payload = start_upload(maintenance, request.data, user=request.user)
+        except DirectUploadError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        return Response(payload, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'delete'], url_path=r'uploads/(?P<upload_pk>\d+)')
+    def direct_upload(self, request, pk=None, upload_pk=None):
+        """
+        GET: partes recibidas y URLs para las faltantes (reanudar). DELETE: cancelar la carga.
+        """
+        from .services.direct_uploads import DirectUploadError, abort_upload, get_session, upload_status
+
+        session = get_session(self.get_object(), upload_pk)
+        if session is None:
+            return Response({'error': 'Carga no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            if request.method == 'DELETE':
+                abort_upload(session)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(upload_status(session))
+        except DirectUploadError as e:
+            return Response({'error': e.message}, status=e.status_code)
+
+    @action(detail=True, methods=['post'], url_path=r'uploads/(?P<upload_pk>\d+)/complete')
+    def complete_direct_upload(self, request, pk=None, upload_pk=None):
+        """
+        Cerrar la carga multipart y registrar la foto/firma ya almacenada en MinIO.
+        """
+        from .services.direct_uploads import DirectUploadError, complete_upload, get_session
+
+        session = get_session(self.get_object(), upload_pk)
+        if session is None:
+            return Response({'error': 'Carga no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            obj = complete_upload(session, user=request.user)
+        except DirectUploadError as e:
+            return Response({'error': e.message}, status=e.status_code)
+
+        serializer_class = PhotoSerializer if session.kind == 'photo' else (
+            SignatureSerializer if session.kind == 'signature' else SecondSignatureSerializer
+        )
+        return Response(serializer_class(obj, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """
+        Importación masiva de mantenimientos (JSON, NDJSON o multipart).
+        Parámetros: ?batch_size=200&dry_run=true
+        """
+        from .services.maintenance_import import ImportFormatError, import_maintenances, parse_import_rows
+
+        try:
+            rows = parse_import_rows(request)
+        except (ImportFormatError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not rows:
+            return Response({'error': 'No se recibieron filas para importar'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.query_params.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        files = request.FILES if (request.content_type or '').startswith('multipart/') else None
+        result = import_maintenances(
+            rows,
+            user=request.user,
+            files=files,
+            batch_size=request.query_params.get('batch_size'),
+            dry_run=dry_run,
+        )
+
+        if result['failed'] == 0:
+            code = status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        elif result['failed'] == result['total']:
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_207_MULTI_STATUS
+        return Response(result, status=code)
+
 class ReportListView(APIView):
     authentication_classes = [JWTAuthentication, SessionAuthentication]
     permission_classes = [IsAdminOrTechnician]
@@ -139,8 +360,10 @@ class ReportGenerateView(APIView):
             from .services.maintenance_serializer import serialize_maintenance
             from .services.report_generators.pdf_generator import PDFGenerator
             from .services.report_generators.excel_generator import ExcelGenerator
+            from .services.path_accessor import resolve_path
             from .services.report_generators.image_generator import ImageGenerator
-            from django.core.files.base import ContentFile
+            from .services.site_config import get_report_setting
+            from .services.report_artifacts import attach_report_file
             
             # Obtener el mantenimiento
             maintenance = Maintenance.objects.get(id=maintenance_id)
@@ -162,41 +385,6 @@ class ReportGenerateView(APIView):
                 except Exception:
                     template_obj = None
 
-            def _resolve_path(obj, path):
-                try:
-                    cur = obj
-                    if path is None or path == '':
-                        return None
-                    import re
-                    tokens = []
-                    parts = str(path).split('.')
-                    for part in parts:
-                        bracket_parts = re.split(r'\[|\]', part)
-                        for bp in bracket_parts:
-                            if bp == '':
-                                continue
-                            tokens.append(bp)
-                    for tok in tokens:
-                        if isinstance(cur, list):
-                            try:
-                                idx = int(tok)
-                                cur = cur[idx]
-                                continue
-                            except Exception:
-                                return None
-                        if isinstance(cur, dict):
-                            if tok in cur:
-                                cur = cur[tok]
-                                continue
-                            try:
-                                cur = cur[int(tok)]
-                                continue
-                            except Exception:
-                                return None
-                        return None
-                    return cur
-                except Exception:
-                    return None
             format_type = request.data.get('format', 'pdf')
 
             if format_type == 'pdf':
@@ -210,7 +398,7 @@ class ReportGenerateView(APIView):
                     if fs and isinstance(fs, dict):
                         for tpl_key, meta in fs.items():
                             map_to = meta.get('map_to') if isinstance(meta, dict) else (meta or tpl_key)
-                            val = _resolve_path(data, map_to) if map_to else None
+                            val = resolve_path(data, map_to) if map_to else None
                             if val is None and isinstance(data, dict):
                                 val = data.get(map_to)
                             mapped_context[tpl_key] = val
@@ -236,21 +424,24 @@ class ReportGenerateView(APIView):
                     except Exception:
                         background_bytes = None
 
+                    from .services.template_cache import template_cache_key
+                    cache_key = template_cache_key(template_obj)
+
                     if HTMLPDFGenerator:
-                        buffer = HTMLPDFGenerator.render_template(template_obj.html_content or '', template_obj.css_content or '', render_context)
+                        buffer = HTMLPDFGenerator.render_template(template_obj.html_content or '', template_obj.css_content or '', render_context, cache_key=cache_key)
                     elif ReportLabPDFGenerator:
-                        buffer = ReportLabPDFGenerator.render_template(template_obj.html_content or '', template_obj.css_content or '', render_context, background_bytes=background_bytes)
+                        buffer = ReportLabPDFGenerator.render_template(template_obj.html_content or '', template_obj.css_content or '', render_context, background_bytes=background_bytes, cache_key=cache_key)
                     else:
                         # fallback to generic
-                        logo_path = getattr(settings, 'REPORT_LOGO_PATH', None)
-                        primary_color = getattr(settings, 'REPORT_PRIMARY_COLOR', None)
+                        logo_path = get_report_setting('REPORT_LOGO_PATH')
+                        primary_color = get_report_setting('REPORT_PRIMARY_COLOR')
                         buffer = PDFGenerator().generate(data, logo_path=logo_path, primary_color=primary_color)
                     content_type = 'application/pdf'
                     ext = 'pdf'
                 else:
                     # Try to include configured logo if available
-                    logo_path = getattr(settings, 'REPORT_LOGO_PATH', None)
-                    primary_color = getattr(settings, 'REPORT_PRIMARY_COLOR', None)
+                    logo_path = get_report_setting('REPORT_LOGO_PATH')
+                    primary_color = get_report_setting('REPORT_PRIMARY_COLOR')
                     buffer = PDFGenerator().generate(data, logo_path=logo_path, primary_color=primary_color)
                     content_type = 'application/pdf'
                     ext = 'pdf'
@@ -293,16 +484,16 @@ class ReportGenerateView(APIView):
                 return Response({'error': 'Formato no soportado'}, status=status.HTTP_400_BAD_REQUEST)
 
             # Crear el reporte en la base de datos y guardar archivo
-            report = Report.objects.create(
+            report = Report(
                 maintenance=maintenance,
                 title=f"Reporte de Mantenimiento - {data.get('equipment_code','')}",
                 content=maintenance.description or '',
-                generated_by=request.user
+                generated_by=request.user,
+                report_data={'format': format_type},
             )
 
             filename = f"reporte_mantenimiento_{maintenance.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
-            report_field = 'pdf_file' if ext == 'pdf' else f'pdf_file'
-            report.pdf_file.save(filename, ContentFile(buffer.read()))
+            attach_report_file(report, filename, buffer.read())
 
             return Response({
                 'id': report.id,
@@ -366,21 +557,21 @@ class DashboardView(APIView):
                 sid = int(sede_id)
                 qs = qs.filter(sede_rel_id=sid)
             except Exception:
-                qs = qs.filter(Q(sede__icontains=sede_id) | Q(sede_rel__nombre__icontains=sede_id))
+                qs = qs.filter(sede_rel__nombre__icontains=sede_id)
 
         if dependencia_id:
             try:
                 did = int(dependencia_id)
                 qs = qs.filter(dependencia_rel_id=did)
             except Exception:
-                qs = qs.filter(Q(dependencia__icontains=dependencia_id) | Q(dependencia_rel__nombre__icontains=dependencia_id))
+                qs = qs.filter(dependencia_rel__nombre__icontains=dependencia_id)
 
         if subdependencia_id:
             try:
                 sid = int(subdependencia_id)
                 qs = qs.filter(subdependencia_id=sid)
             except Exception:
-                qs = qs.filter(Q(subdependencia__nombre__icontains=subdependencia_id) | Q(subdependencia__nombre__icontains=subdependencia_id))
+                qs = qs.filter(subdependencia__nombre__icontains=subdependencia_id)
 
         if equipment_placa:
             qs = qs.filter(Q(equipment__code__icontains=equipment_placa) | Q(placa__icontains=equipment_placa))
@@ -389,9 +580,9 @@ class DashboardView(APIView):
             qs = qs.filter(
                 Q(equipment__code__icontains=search) |
                 Q(equipment__name__icontains=search) |
-                Q(dependencia__icontains=search) |
-                Q(sede__icontains=search) |
-                Q(subdependencia__icontains=search) |
+                Q(dependencia_rel__nombre__icontains=search) |
+                Q(sede_rel__nombre__icontains=search) |
+                Q(subdependencia__nombre__icontains=search) |
                 Q(description__icontains=search)
             )
 
@@ -399,7 +590,7 @@ class DashboardView(APIView):
         total_maintenances = qs.count()
         total_equipment = qs.values('equipment_id').distinct().count()
         total_incidents = qs.filter(is_incident=True).count()
-        pending_maintenances = qs.filter(Q(activities__icontains='pendiente') | Q(status='pending')).distinct().count()
+        pending_maintenances = qs.filter(Q(activity_rows__value='PENDIENTE') | Q(status='pending')).distinct().count()
 
         # Mantenimientos del mes para el queryset
         current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,40 @@
+"""
+Endpoint de administración para la exportación analítica a Parquet.
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .permissions import IsAdmin
+from .services.analytics_export import (
+    ALL_TABLES,
+    AnalyticsExportUnavailable,
+    export_status,
+    start_background_export,
+)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def analytics_export(request):
+    """
+    POST: lanza en segundo plano la exportación a Parquet en ANALYTICS_EXPORT_DIR
+    (202; 409 si ya hay una en curso). Body: {"tables": [...], "full": false}
+    GET: estado de la última exportación.
+    """
+    if request.method == 'GET':
+        return Response(export_status())
+
+    tables = request.data.get('tables') or None
+    if tables is not None and (not isinstance(tables, list) or any(t not in ALL_TABLES for t in tables)):
+        return Response({'error': f"tables debe ser una lista de: {', '.join(ALL_TABLES)}"}, status=status.HTTP_400_BAD_REQUEST)
+    full = str(request.data.get('full', '')).lower() in ('1', 'true', 'yes')
+
+    try:
+        started = start_background_export(tables=tables, incremental=not full)
+    except AnalyticsExportUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if not started:
+        return Response({'error': 'Ya hay una exportación en curso', **export_status()}, status=status.HTTP_409_CONFLICT)
+    return Response(export_status(), status=status.HTTP_202_ACCEPTED)
@@ -6,13 +6,13 @@ import subprocess
 import shutil
 from datetime import datetime
 from django.conf import settings
-from django.http import FileResponse, JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .permissions import IsAdmin
+from .services.delivery import serve_local_file
 
 
 @api_view(['POST'])
@@ -153,13 +153,9 @@ def download_backup(request, filename):
                 'error': 'Backup file not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        response = FileResponse(
-            open(backup_file, 'rb'),
-            content_type='application/sql',
-            as_attachment=True,
-            filename=filename
-        )
-        return response
+        # X-Accel-Redirect si nginx publica el directorio; si no, respuesta con rangos
+        return serve_local_file(request, backup_file, content_type='application/sql',
+                                filename=filename, as_attachment=True)
     except Exception as e:
         return Response({
             'error': str(e)
@@ -7,10 +7,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Count, Q, Avg
+from django.db.models import Count, Q, Avg, Max
 from django.utils import timezone
 from datetime import timedelta
-from api.models import Maintenance, Equipment, Incident
+from api.models import Maintenance, Equipment, Incident, MaintenanceActivity
 from api.models import Dependencia, Sede
 from django.contrib.auth import get_user_model
 User = get_user_model()
@@ -200,21 +200,19 @@ class DashboardDepartmentStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Equipment by department
+        # Agrupado por la FK de dependencia (los textos legacy se migran con backfill_locations)
         equipment_by_dept = Equipment.objects.values(
-            'location'  # Using location as department equivalent
+            'dependencia_rel_id', 'dependencia_rel__nombre'
         ).annotate(count=Count('id')).order_by('-count')
 
-        # Maintenances by department (using equipment location)
         maintenances_by_dept = Maintenance.objects.values(
-            'equipment__location'
+            'dependencia_rel_id', 'dependencia_rel__nombre'
         ).annotate(count=Count('id')).order_by('-count')
 
-        # Incidents by department
         incidents_by_dept = Maintenance.objects.filter(
             is_incident=True
         ).values(
-            'equipment__location'
+            'dependencia_rel_id', 'dependencia_rel__nombre'
         ).annotate(count=Count('id')).order_by('-count')
 
         return Response({
@@ -224,6 +222,39 @@ class DashboardDepartmentStatsView(APIView):
         })
 
 
+class DashboardActivityComplianceView(DashboardStatsView):
+    """
+    Cumplimiento por actividad (SI / NO / NA / PENDIENTE) sobre la tabla
+    maintenance_activity. Acepta los filtros de DashboardStatsView más
+    ?equipment_type= y ?activity= (clave normalizada).
+    """
+
+    def get(self, request):
+        filters = {f'maintenance__{key}': value for key, value in self._build_filters(request).items()}
+        equipment_type = request.query_params.get('equipment_type')
+        if equipment_type:
+            filters['maintenance__equipment_type'] = equipment_type
+        activity = request.query_params.get('activity')
+        if activity:
+            filters['activity_key'] = activity
+
+        rows = MaintenanceActivity.objects.filter(**filters).values('activity_key').annotate(
+            activity_name=Max('activity_name'),
+            total=Count('id'),
+            si=Count('id', filter=Q(value='SI')),
+            no=Count('id', filter=Q(value='NO')),
+            na=Count('id', filter=Q(value='NA')),
+            pendiente=Count('id', filter=Q(value='PENDIENTE')),
+        ).order_by('activity_key')
+
+        activities = []
+        for row in rows:
+            applicable = row['si'] + row['no'] + row['pendiente']
+            row['compliance'] = round(row['si'] * 100.0 / applicable, 1) if applicable else None
+            activities.append(row)
+        return Response({'activities': activities})
+
+
 class FilterOptionsView(APIView):
     """Return distinct values for dashboard filter dropdowns."""
     permission_classes = [IsAuthenticated]
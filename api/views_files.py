@@ -2,9 +2,11 @@ import os
 from urllib.parse import unquote
 
 from django.shortcuts import redirect
-from django.http import HttpResponseNotFound, FileResponse, HttpResponse
+from django.http import HttpResponseNotFound
 from django.core.files.storage import default_storage
 
+from .services.delivery import serve_storage_file
+
 from .models import Template
 
 
@@ -33,18 +35,18 @@ def media_template_fallback(request, subpath: str):
             return redirect(storage_url)
 
         # If the storage URL is the same path we're serving (or a relative /media path),
-        # avoid redirect loop by serving the file contents directly.
-        # default_storage.open returns a file-like object usable by FileResponse.
+        # avoid redirect loop: presigned URL / X-Accel-Redirect, or the file
+        # contents with HTTP Range support.
         try:
-            f = default_storage.open(requested, 'rb')
             # Try to set a sensible content-type for common template types
             if requested.lower().endswith('.pdf'):
                 content_type = 'application/pdf'
             elif requested.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                content_type = 'image/*'
+                content_type = None  # según la extensión
             else:
                 content_type = 'application/octet-stream'
-            return FileResponse(f, content_type=content_type)
+            return serve_storage_file(request, default_storage, requested, content_type=content_type,
+                                      as_attachment=False)
         except Exception:
             # Fall back to redirect if serving fails for some reason
             try:
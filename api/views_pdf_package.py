@@ -13,6 +13,8 @@ from rest_framework import status
 from .models import Maintenance, Incident, Equipment
 from .reports import get_report_generator, IncidentReportPDF, MaintenanceReportPDF
 from .filters import MaintenanceFilter
+from .services.maintenance_serializer import with_report_relations
+from .services.render_cache import pdf_render_blocks
 
 
 class PackageMaintenancePDFsView(APIView):
@@ -39,39 +41,92 @@ class PackageMaintenancePDFsView(APIView):
                 'error': 'Se requiere maintenance_ids o filters'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        if not maintenances.exists():
+        maintenances = list(with_report_relations(maintenances))
+        if not maintenances:
             return Response({
                 'error': 'No se encontraron mantenimientos'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        # Con `template_id` todos los PDFs salen de un solo render por lotes
+        template_pdfs = None
+        template_id = request.data.get('template_id')
+        if template_id:
+            template_pdfs, error = self._render_with_template(template_id, maintenances)
+            if error is not None:
+                return error
+
         # Create BytesIO buffer for ZIP
         zip_buffer = BytesIO()
-        
+        failed = []
+
+        # Sin plantilla, imágenes precargadas en paralelo por bloques
+        blocks = [(maintenances, {})] if template_pdfs is not None else pdf_render_blocks(maintenances, use_cache=False)
+
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for maintenance in maintenances:
-                try:
-                    # Generate PDF
-                    generator = get_report_generator('reportlab')
-                    pdf_buffer = generator.generate(maintenance)
-                    
-                    # Add to ZIP with descriptive filename
-                    placa = maintenance.placa or (maintenance.equipment.serial_number if maintenance.equipment else maintenance.id)
-                    fecha = maintenance.scheduled_date.strftime('%Y%m%d') if getattr(maintenance, 'scheduled_date', None) else 'unknown'
-                    filename = f"mantenimiento_{placa}_{fecha}.pdf"
-                    zip_file.writestr(filename, pdf_buffer.getvalue())
-                    
-                except Exception as e:
-                    print(f"Error generando PDF para mantenimiento {maintenance.id}: {str(e)}")
-                    continue
-        
+            for block, media in blocks:
+                for maintenance in block:
+                    try:
+                        # Generate PDF
+                        if template_pdfs is not None:
+                            pdf_bytes = template_pdfs.get(maintenance.id)
+                            if not pdf_bytes:
+                                failed.append((maintenance.id, 'La plantilla no produjo páginas'))
+                                continue
+                        else:
+                            generator = get_report_generator('reportlab')
+                            pdf_bytes = generator.generate(maintenance, media=media).getvalue()
+                        
+                        # Add to ZIP with descriptive filename
+                        placa = maintenance.placa or (maintenance.equipment.serial_number if maintenance.equipment else maintenance.id)
+                        fecha = maintenance.scheduled_date.strftime('%Y%m%d') if getattr(maintenance, 'scheduled_date', None) else 'unknown'
+                        filename = f"mantenimiento_{placa}_{fecha}.pdf"
+                        zip_file.writestr(filename, pdf_bytes)
+                        
+                    except Exception as e:
+                        print(f"Error generando PDF para mantenimiento {maintenance.id}: {str(e)}")
+                        failed.append((maintenance.id, str(e)))
+                        continue
+
+            if failed:
+                # Los PDFs faltantes quedan listados dentro del ZIP y en el encabezado
+                zip_file.writestr('errores.txt', '\n'.join(
+                    f'Mantenimiento {maintenance_id}: {reason}' for maintenance_id, reason in failed
+                ))
+
+        if len(failed) == len(maintenances):
+            return Response({
+                'error': 'No se pudo generar ningún PDF',
+                'failed': [{'id': maintenance_id, 'error': reason} for maintenance_id, reason in failed],
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
         # Prepare response
         zip_buffer.seek(0)
         response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         response['Content-Disposition'] = f'attachment; filename="mantenimientos_{timestamp}.zip"'
+        if failed:
+            response['X-Failed-Maintenances'] = ','.join(str(maintenance_id) for maintenance_id, _ in failed)
         
         return response
 
+    @staticmethod
+    def _render_with_template(template_id, maintenances):
+        """Renderiza los mantenimientos con una plantilla HTML en un único lote."""
+        from .models import Template
+        from .services.maintenance_serializer import serialize_maintenances
+        from .views_template_manager import render_template_batch
+
+        template = Template.objects.filter(id=template_id, type='pdf').first()
+        if not template:
+            return None, Response({'error': 'Plantilla no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        # Por id (no por instancia) para leer los snapshots vigentes
+        datasets = list(serialize_maintenances([m.id for m in maintenances]))
+        try:
+            pdfs = render_template_batch(template, datasets, split=True)
+        except NotImplementedError as e:
+            return None, Response({'error': str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        return {m.id: pdf for m, pdf in zip(maintenances, pdfs)}, None
+
 
 class PackageIncidentPDFsView(APIView):
     """
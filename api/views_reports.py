@@ -6,14 +6,18 @@ This file shows how to use the ReportLab-based PDF generator with parameterizabl
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.core.files.storage import default_storage
 from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from datetime import timedelta
 from io import BytesIO
 
 from api.models import Maintenance, Report
-from api.reports import get_report_generator
+from api.reports import BatchMaintenanceReportPDF, get_report_generator
+from api.services.delivery import serve_storage_file
+from api.services.report_artifacts import attach_report_file
+from api.services.maintenance_serializer import with_report_relations
+from api.services.render_cache import FORMAT_HEADERS, ensure_maintenance_pdf, pdf_render_blocks, render_maintenance_pdf
 
 
 # Example 1: Generate PDF with default configuration
@@ -37,17 +41,15 @@ def generate_maintenance_report_default(request, maintenance_id):
         pdf_buffer = generator.generate(maintenance)
         
         # Create Report record
-        report = Report.objects.create(
+        report = Report(
             maintenance=maintenance,
             generated_by=request.user,
             report_data={'generated_at': timezone.now().isoformat()},
-            file_size=len(pdf_buffer.getvalue()),
-            expires_at=timezone.now() + timedelta(days=30)
         )
         
         # Save PDF to storage (MinIO)
         filename = f'maintenance_{maintenance_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        report.pdf_file.save(filename, pdf_buffer)
+        attach_report_file(report, filename, pdf_buffer.getvalue())
         
         return Response({
             'status': 'success',
@@ -110,20 +112,18 @@ def generate_maintenance_report_custom(request, maintenance_id):
         pdf_buffer = generator.generate(maintenance)
         
         # Create Report record
-        report = Report.objects.create(
+        report = Report(
             maintenance=maintenance,
             generated_by=request.user,
             report_data={
                 'header_config': final_config,
                 'generated_at': timezone.now().isoformat()
             },
-            file_size=len(pdf_buffer.getvalue()),
-            expires_at=timezone.now() + timedelta(days=30)
         )
         
         # Save PDF to storage
         filename = f'maintenance_{maintenance_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        report.pdf_file.save(filename, pdf_buffer)
+        attach_report_file(report, filename, pdf_buffer.getvalue())
         
         return Response({
             'status': 'success',
@@ -170,12 +170,18 @@ def download_maintenance_report(request, maintenance_id):
         if request.query_params.get('vigencia'):
             header_config['vigencia'] = request.query_params.get('vigencia')
         
-        # Generate PDF
-        generator = get_report_generator('reportlab', header_config if header_config else None)
-        pdf_buffer = generator.generate(maintenance)
+        filename = f'maintenance_{maintenance_id}.pdf'
+        if not header_config:
+            # PDF vigente en storage: URL prefirmada / X-Accel-Redirect
+            key = ensure_maintenance_pdf(maintenance)
+            if key:
+                return serve_storage_file(request, default_storage, key, content_type='application/pdf',
+                                          filename=filename, as_attachment=True)
+
+        pdf_bytes = render_maintenance_pdf(maintenance, use_cache=False, header_config=header_config or None)
         
         # Return as file download
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="maintenance_{maintenance_id}.pdf"'
         
         return response
@@ -203,12 +209,15 @@ def preview_maintenance_report(request, maintenance_id):
     maintenance = get_object_or_404(Maintenance, id=maintenance_id)
     
     try:
-        # Generate PDF with default configuration
-        generator = get_report_generator('reportlab')
-        pdf_buffer = generator.generate(maintenance)
+        # Default configuration, pre-rendered when current
+        key = ensure_maintenance_pdf(maintenance)
+        if key:
+            return serve_storage_file(request, default_storage, key, content_type='application/pdf',
+                                      filename=f'maintenance_{maintenance_id}_preview.pdf', as_attachment=False)
+        pdf_bytes = render_maintenance_pdf(maintenance, use_cache=False)
         
         # Return as inline PDF
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'inline; filename="maintenance_{maintenance_id}_preview.pdf"'
         
         return response
@@ -266,17 +275,15 @@ def batch_generate_reports(request):
             pdf_buffer = generator.generate(maintenance)
             
             # Create Report record
-            report = Report.objects.create(
+            report = Report(
                 maintenance=maintenance,
                 generated_by=request.user,
                 report_data={'header_config': config},
-                file_size=len(pdf_buffer.getvalue()),
-                expires_at=timezone.now() + timedelta(days=30)
             )
             
             # Save PDF
             filename = f'maintenance_{maintenance_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            report.pdf_file.save(filename, pdf_buffer)
+            attach_report_file(report, filename, pdf_buffer.getvalue())
             
             results.append({
                 'maintenance_id': maintenance_id,
@@ -326,28 +333,19 @@ def generate_computer_maintenance_report(request, maintenance_id):
         }, status=400)
     
     try:
-        # Computer-specific header configuration
-        header_config = {
-            'codigo': 'GTI-F-015',
-            'version': '03',
-            'vigencia': '18-Jul-19',
-            'organization': 'ALCALDÍA DE PASTO',
-            'department': 'GESTIÓN DE TECNOLOGÍAS DE LA INFORMACIÓN'
-        }
-        
-        generator = get_report_generator('reportlab', header_config)
-        pdf_buffer = generator.generate(maintenance)
+        # Computer-specific header configuration (pre-rendered on completion)
+        header_config = FORMAT_HEADERS['computer']
+        pdf_buffer = BytesIO(render_maintenance_pdf(maintenance, header_config=header_config))
         
         # Save report
-        report = Report.objects.create(
+        report = Report(
             maintenance=maintenance,
             generated_by=request.user,
-            report_data={'header_config': header_config, 'format': 'GTI-F-015'},
-            file_size=len(pdf_buffer.getvalue())
+            report_data={'header_config': header_config, 'format': 'GTI-F-015'}
         )
         
         filename = f'computer_maintenance_{maintenance_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        report.pdf_file.save(filename, pdf_buffer)
+        attach_report_file(report, filename, pdf_buffer.getvalue())
         
         return Response({
             'status': 'success',
@@ -382,28 +380,19 @@ def generate_printer_scanner_report(request, maintenance_id):
         }, status=400)
     
     try:
-        # Printer/Scanner-specific header configuration
-        header_config = {
-            'codigo': 'GTI-F-016',
-            'version': '02',
-            'vigencia': '18-Jul-19',
-            'organization': 'ALCALDÍA DE PASTO',
-            'department': 'GESTIÓN DE TECNOLOGÍAS DE LA INFORMACIÓN'
-        }
-        
-        generator = get_report_generator('reportlab', header_config)
-        pdf_buffer = generator.generate(maintenance)
+        # Printer/Scanner-specific header configuration (pre-rendered on completion)
+        header_config = FORMAT_HEADERS['printer_scanner']
+        pdf_buffer = BytesIO(render_maintenance_pdf(maintenance, header_config=header_config))
         
         # Save report
-        report = Report.objects.create(
+        report = Report(
             maintenance=maintenance,
             generated_by=request.user,
-            report_data={'header_config': header_config, 'format': 'GTI-F-016'},
-            file_size=len(pdf_buffer.getvalue())
+            report_data={'header_config': header_config, 'format': 'GTI-F-016'}
         )
         
         filename = f'printer_scanner_maintenance_{maintenance_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        report.pdf_file.save(filename, pdf_buffer)
+        attach_report_file(report, filename, pdf_buffer.getvalue())
         
         return Response({
             'status': 'success',
@@ -515,22 +504,39 @@ def generate_filtered_reports(request):
                 'message': 'No se encontraron mantenimientos con los filtros aplicados'
             }, status=404)
         
+        # Relaciones de la clave de render_cache y del reporte (técnico, ubicación, fotos, firmas)
+        filtered_maintenances = with_report_relations(filtered_maintenances)
+
+        if output_format == 'pdf':
+            # Un solo PDF consolidado (portada + un marcador por mantenimiento)
+            from api.services.pdf_merge import SPOOL_MAX_SIZE, merge_available
+
+            if not merge_available():
+                return Response({
+                    'status': 'error',
+                    'message': 'El PDF consolidado requiere el paquete pypdf'
+                }, status=501)
+
+            maintenances = list(filtered_maintenances.order_by('sede_rel__nombre', 'dependencia_rel__nombre', 'scheduled_date', 'id'))
+            output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            BatchMaintenanceReportPDF(maintenances).generate(output=output)
+            return FileResponse(output, as_attachment=True, filename='reportes_filtrados.pdf',
+                                content_type='application/pdf')
+
         if output_format == 'zip':
             # Crear archivo ZIP con todos los PDFs
             temp_dir = tempfile.mkdtemp()
             zip_path = os.path.join(temp_dir, 'reportes.zip')
             
             with ZipFile(zip_path, 'w') as zipf:
-                for maintenance in filtered_maintenances:
-                    try:
-                        generator = get_report_generator('reportlab')
-                        pdf_buffer = generator.generate(maintenance)
-                        
-                        filename = f'mantenimiento_{maintenance.id}_{maintenance.placa or "SN"}.pdf'
-                        zipf.writestr(filename, pdf_buffer.getvalue())
-                    except Exception as e:
-                        print(f"Error generando reporte para mantenimiento {maintenance.id}: {str(e)}")
-                        continue
+                for block, media in pdf_render_blocks(filtered_maintenances):
+                    for maintenance in block:
+                        try:
+                            filename = f'mantenimiento_{maintenance.id}_{maintenance.placa or "SN"}.pdf'
+                            zipf.writestr(filename, render_maintenance_pdf(maintenance, media=media))
+                        except Exception as e:
+                            print(f"Error generando reporte para mantenimiento {maintenance.id}: {str(e)}")
+                            continue
             
             # Enviar archivo ZIP
             with open(zip_path, 'rb') as f:
@@ -545,7 +551,7 @@ def generate_filtered_reports(request):
         else:
             return Response({
                 'status': 'error',
-                'message': 'Formato no soportado. Use "zip"'
+                'message': 'Formato no soportado. Use "zip" o "pdf"'
             }, status=400)
             
     except Exception as e:
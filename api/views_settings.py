@@ -5,15 +5,15 @@ from django.shortcuts import get_object_or_404
 
 from .models import SiteConfiguration
 from .permissions import IsAdmin
+from .services.site_config import get_site_config
 
 
 class SettingsView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
 
     def get(self, request):
-        # Return the singleton configuration (create if missing)
-        obj, _ = SiteConfiguration.objects.get_or_create(id=1)
-        return Response(obj.config)
+        # Return the singleton configuration from the per-process cache
+        return Response(get_site_config())
 
     def post(self, request):
         # Accept a JSON payload and replace the stored configuration
@@ -8,6 +8,10 @@ from django.http import HttpResponse
 from .models import Template
 from .models import ReportTemplate
 from .models import Report
+from .services.field_mapping import map_template_fields, match_key, normalize_field_key
+from .services.path_accessor import resolve_path
+from .services.report_artifacts import expiry_for_new_report, store_artifact
+from .services.template_cache import template_cache_key
 import json
 from datetime import datetime
 
@@ -29,89 +33,20 @@ from datetime import datetime
 
 
 # Helper: normalization and auto-mapping used across endpoints
-def _norm_key(s):
-    try:
-        return ''.join([c for c in str(s).lower() if c.isalnum()])
-    except Exception:
-        return str(s).lower()
-
-
-def _auto_map_value_for_dict(map_to, tpl_key, data_dict, resolve_path_fn):
-    # Try explicit path first
-    if map_to:
-        v = resolve_path_fn(data_dict, map_to) if isinstance(data_dict, (dict, list)) else None
-        if v is not None:
-            return v
-        if isinstance(data_dict, dict) and map_to in data_dict:
-            return data_dict.get(map_to)
-
-    # Heuristic fallback: try to match tpl_key against available keys
-    if not isinstance(data_dict, dict):
-        return None
-
-    tpl_norm = _norm_key(tpl_key)
-    # 1) exact match ignoring case/characters
-    for k in data_dict.keys():
-        if _norm_key(k) == tpl_norm:
-            return data_dict.get(k)
-
-    # 2) substring match (tpl in key or key in tpl)
-    for k in data_dict.keys():
-        kn = _norm_key(k)
-        if tpl_norm in kn or kn in tpl_norm:
-            return data_dict.get(k)
-
-    # 3) token overlap
-    for k in data_dict.keys():
-        k_tokens = set([t for t in _norm_key(k).split() if t])
-        t_tokens = set([t for t in tpl_norm.split() if t])
-        if k_tokens & t_tokens:
-            return data_dict.get(k)
-
-    return None
-
-
-def _find_matching_key(map_to, tpl_key, data_dict, resolve_path_fn):
-    # Returns the matched key name from data_dict if any, else None
-    if map_to:
-        # if map_to exists exactly in dict
-        if isinstance(data_dict, dict) and map_to in data_dict:
-            return map_to
-        # if path resolves to a value, we can't determine the exact key easily
-        # so continue to heuristics
-
-    if not isinstance(data_dict, dict):
-        return None
-
-    tpl_norm = _norm_key(tpl_key)
-    # 1) exact match ignoring case/characters
-    for k in data_dict.keys():
-        if _norm_key(k) == tpl_norm:
-            return k
-
-    # 2) substring match
-    for k in data_dict.keys():
-        kn = _norm_key(k)
-        if tpl_norm in kn or kn in tpl_norm:
-            return k
-
-    # 3) token overlap
-    for k in data_dict.keys():
-        k_tokens = set([t for t in _norm_key(k).split() if t])
-        t_tokens = set([t for t in tpl_norm.split() if t])
-        if k_tokens & t_tokens:
-            return k
-
-    return None
-
-
-def infer_fields_schema_mapping(fs, sample_data, resolve_path_fn):
+# (el motor y su caché viven en services/field_mapping.py)
+def _data_keys(data_dict):
+    return [(k, normalize_field_key(k)) for k in data_dict] if isinstance(data_dict, dict) else []
+
+
+def infer_fields_schema_mapping(fs, sample_data):
     """Given a fields_schema (possibly with simple types), return a new
     dict where each entry is a mapping dict containing at least 'map_to'
     when a sensible match was found against sample_data.
     """
     if not fs or not isinstance(fs, dict):
         return fs
+    sample_data = sample_data or {}
+    keys = _data_keys(sample_data)
     out = {}
     for tpl_key, meta in fs.items():
         # existing dict with explicit map_to -> keep
@@ -125,7 +60,10 @@ def infer_fields_schema_mapping(fs, sample_data, resolve_path_fn):
         else:
             map_to_candidate = meta or tpl_key
 
-        matched_key = _find_matching_key(map_to_candidate, tpl_key, sample_data or {}, resolve_path_fn)
+        if isinstance(sample_data, dict) and map_to_candidate in sample_data:
+            matched_key = map_to_candidate
+        else:
+            matched_key = match_key(tpl_key, keys)
         if matched_key:
             out[tpl_key] = {'map_to': matched_key}
         else:
@@ -134,42 +72,36 @@ def infer_fields_schema_mapping(fs, sample_data, resolve_path_fn):
     return out
 
 
-def resolve_path(obj, path):
-    """Top-level resolver for dotted/indexed paths to support inference usage."""
-    try:
-        cur = obj
-        if path is None or path == '':
-            return None
-        import re
-        tokens = []
-        parts = str(path).split('.')
-        for part in parts:
-            bracket_parts = re.split(r'\[|\]', part)
-            for bp in bracket_parts:
-                if bp == '':
-                    continue
-                tokens.append(bp)
-        for tok in tokens:
-            if isinstance(cur, list):
-                try:
-                    idx = int(tok)
-                    cur = cur[idx]
-                    continue
-                except Exception:
-                    return None
-            if isinstance(cur, dict):
-                if tok in cur:
-                    cur = cur[tok]
-                    continue
-                try:
-                    cur = cur[int(tok)]
-                    continue
-                except Exception:
-                    return None
-            return None
-        return cur
-    except Exception:
-        return None
+def build_template_context(template, data):
+    """Contexto de render para `template`: los datos más los campos mapeados de fields_schema."""
+    mapped_context = map_template_fields(template, data, resolve_path)
+    return {**(data or {}), **mapped_context}
+
+
+def render_template_batch(template, datasets, split=False):
+    """
+    Renderiza varios conjuntos de datos con la misma plantilla PDF.
+
+    Con WeasyPrint todo se compone en un único documento (un solo layout):
+    `split=True` devuelve un PDF por conjunto de datos (bytes o None) y, si no,
+    un único PDF consolidado (bytes). Sin WeasyPrint solo se soporta `split`,
+    renderizando cada documento con ReportLab.
+    """
+    contexts = [build_template_context(template, data) for data in datasets]
+    cache_key = template_cache_key(template)
+    html_content = template.html_content or ''
+    css_content = template.css_content or ''
+
+    if HTMLPDFGenerator:
+        if split:
+            return HTMLPDFGenerator.render_batch_split(html_content, css_content, contexts, cache_key=cache_key)
+        return HTMLPDFGenerator.render_batch(html_content, css_content, contexts, cache_key=cache_key).getvalue()
+    if not ReportLabPDFGenerator or not split:
+        raise NotImplementedError('El PDF consolidado requiere WeasyPrint en este entorno.')
+    return [
+        ReportLabPDFGenerator.render_template(html_content, css_content, context, cache_key=cache_key).getvalue()
+        for context in contexts
+    ]
 
 
 @csrf_exempt
@@ -279,56 +211,6 @@ def generate_report(request):
     # template variable names (keys in fields_schema) are resolved from the
     # serialized maintenance data. This allows templates to use friendly
     # names while mapping them to internal maintenance keys (e.g. map_to).
-    def _resolve_path(obj, path):
-        """Resolve dotted or indexed path in a nested dict/list structure.
-        Examples: 'equipment.serial_number', 'activities[0].task', 'nested.arr[1].x'
-        Returns None if path cannot be resolved.
-        """
-        try:
-            cur = obj
-            if path is None or path == '':
-                return None
-            # support bracket indexes by converting a[0] to a.0 tokens
-            # but keep string keys intact
-            # replace [num] with .num
-            import re
-            tokens = []
-            # split by dot first
-            parts = path.split('.')
-            for part in parts:
-                # find bracket parts
-                bracket_parts = re.split(r'\[|\]', part)
-                for bp in bracket_parts:
-                    if bp == '':
-                        continue
-                    tokens.append(bp)
-
-            for tok in tokens:
-                # if current is list-like and tok is integer index
-                if isinstance(cur, list):
-                    try:
-                        idx = int(tok)
-                        cur = cur[idx]
-                        continue
-                    except Exception:
-                        return None
-                # otherwise treat as dict key
-                if isinstance(cur, dict):
-                    if tok in cur:
-                        cur = cur[tok]
-                        continue
-                    # try numeric key as fallback
-                    try:
-                        cur = cur[int(tok)]
-                        continue
-                    except Exception:
-                        return None
-                # not indexable
-                return None
-            return cur
-        except Exception:
-            return None
-
     mapped_context = {}
     fs = None
     # Prefer fields_schema on a selected Template instance
@@ -344,55 +226,7 @@ def generate_report(request):
 
     if fs and isinstance(fs, dict):
         try:
-            def _auto_map_value(map_to, tpl_key, data_dict):
-                # Try explicit path first
-                if map_to:
-                    v = _resolve_path(data_dict, map_to) if isinstance(data_dict, (dict, list)) else None
-                    if v is not None:
-                        return v
-                    if isinstance(data_dict, dict) and map_to in data_dict:
-                        return data_dict.get(map_to)
-
-                # Heuristic fallback: try to match tpl_key against available keys
-                if not isinstance(data_dict, dict):
-                    return None
-
-                def _norm(s):
-                    try:
-                        return ''.join([c for c in str(s).lower() if c.isalnum()])
-                    except Exception:
-                        return str(s).lower()
-
-                tpl_norm = _norm(tpl_key)
-                # 1) exact match ignoring case/characters
-                for k in data_dict.keys():
-                    if _norm(k) == tpl_norm:
-                        return data_dict.get(k)
-
-                # 2) substring match (tpl in key or key in tpl)
-                for k in data_dict.keys():
-                    kn = _norm(k)
-                    if tpl_norm in kn or kn in tpl_norm:
-                        return data_dict.get(k)
-
-                # 3) token overlap (split on non-alnum)
-                for k in data_dict.keys():
-                    k_tokens = set([t for t in _norm(k).split() if t])
-                    t_tokens = set([t for t in tpl_norm.split() if t])
-                    if k_tokens & t_tokens:
-                        return data_dict.get(k)
-
-                return None
-
-            for tpl_key, meta in fs.items():
-                map_to = None
-                if isinstance(meta, dict):
-                    map_to = meta.get('map_to') or meta.get('source') or tpl_key
-                else:
-                    map_to = meta or tpl_key
-
-                val = _auto_map_value(map_to, tpl_key, data)
-                mapped_context[tpl_key] = val
+            mapped_context = map_template_fields(template_obj or active, data, resolve_path, use_source=True)
         except Exception:
             mapped_context = {}
 
@@ -413,9 +247,8 @@ def generate_report(request):
         if template_obj:
             template_name = (template_obj.name or '').lower()
         
-        equipment_type = ''
-        if maintenance.equipment:
-            equipment_type = (maintenance.equipment.equipment_type or '').lower()
+        # El tipo vive en el mantenimiento (Equipment no tiene equipment_type)
+        equipment_type = (getattr(maintenance.equipment, 'equipment_type', None) or maintenance.equipment_type or '').lower()
         
         # Use printer/scanner generator if template or equipment indicates it
         is_printer_scanner = (
@@ -429,26 +262,17 @@ def generate_report(request):
             'printer' in equipment_type
         )
         
-        try:
-            if is_printer_scanner:
-                from .services.printer_scanner_excel_generator import PrinterScannerExcelGenerator
-                generator = PrinterScannerExcelGenerator()
-                filename_prefix = 'rutina_impresora_escaner'
-            else:
-                from .services.excel_report_generator import ExcelReportGenerator
-                generator = ExcelReportGenerator()
-                filename_prefix = 'rutina_mantenimiento'
-        except Exception as e:
-            return Response({'error': f'Generador Excel no disponible: {str(e)}'}, status=501)
+        from .services.render_cache import render_maintenance_excel
+        filename_prefix = 'rutina_impresora_escaner' if is_printer_scanner else 'rutina_mantenimiento'
 
         try:
-            excel_bytes = generator.generate_report(maintenance)
+            # Rutina pre-renderizada al completar el mantenimiento, si sigue vigente
+            excel_bytes = render_maintenance_excel(maintenance, printer_scanner=is_printer_scanner)
             # Save to default storage so it appears in reports list
-            from django.core.files.base import ContentFile
             from django.core.files.storage import default_storage
             eq_code = maintenance.equipment.code if maintenance.equipment else maintenance.id
             filename = f"reports/{filename_prefix}_{eq_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            file_path = default_storage.save(filename, ContentFile(excel_bytes))
+            file_path, digest, size = store_artifact(filename, excel_bytes, default_storage)
 
             # Create Report record
             try:
@@ -457,7 +281,10 @@ def generate_report(request):
                     title=f"Rutina de Mantenimiento - {maintenance.equipment.name if maintenance.equipment else ''}",
                     content=maintenance.description or '',
                     pdf_file=file_path,
-                    generated_by=request.user
+                    generated_by=request.user,
+                    content_hash=digest,
+                    file_size=size,
+                    expires_at=expiry_for_new_report(),
                 )
             except Exception:
                 report = None
@@ -466,6 +293,9 @@ def generate_report(request):
             response = HttpResponse(excel_bytes, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
             response['Content-Disposition'] = f'attachment; filename="{filename_prefix}_{eq_code}.xlsx"'
             return response
+        except ImportError as e:
+            # render_maintenance_excel importa el generador al usarlo
+            return Response({'error': f'Generador Excel no disponible: {str(e)}'}, status=501)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
@@ -498,31 +328,27 @@ def generate_report(request):
         html_to_use = html_content
         css_to_use = css_content
 
+        cache_key = template_cache_key(template_obj)
+
         if HTMLPDFGenerator:
-            pdf_file = HTMLPDFGenerator.render_template(html_to_use, css_to_use, render_context)
+            pdf_file = HTMLPDFGenerator.render_template(html_to_use, css_to_use, render_context, cache_key=cache_key)
         elif ReportLabPDFGenerator:
             pdf_file = ReportLabPDFGenerator.render_template(
                 html_to_use,
                 css_to_use,
                 render_context,
                 background_bytes=background_bytes,
-                overlays=overlays
+                overlays=overlays,
+                cache_key=cache_key,
             )
         else:
             return Response({'error': 'PDF generation not available'}, status=501)
 
         # Save the PDF to storage
-        from django.core.files.base import ContentFile
         from django.core.files.storage import default_storage
         name_for_file = (template_obj.name if template_obj else (active.name if active else 'report'))
         filename = f"reports/{name_for_file}_{maintenance.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        file_path = default_storage.save(filename, ContentFile(pdf_file.read()))
-
-        # Do not emit debug prints in production; preserve optional saved_size for future logging hooks
-        try:
-            saved_size = default_storage.size(file_path)
-        except Exception:
-            saved_size = None
+        file_path, digest, size = store_artifact(filename, pdf_file.read(), default_storage)
 
         # Create Report instance
         report = Report.objects.create(
@@ -530,7 +356,10 @@ def generate_report(request):
             title=f"Reporte de {maintenance.maintenance_type} - {maintenance.equipment.name if maintenance.equipment else 'Sin equipo'}",
             content='',  # Could add summary
             pdf_file=file_path,
-            generated_by=request.user
+            generated_by=request.user,
+            content_hash=digest,
+            file_size=size,
+            expires_at=expiry_for_new_report(),
         )
 
         # Return PDF as blob for frontend download
@@ -614,6 +443,11 @@ def generate_from_template(request, template_key):
 
         if not template:
             return Response({'error': 'Plantilla no encontrada'}, status=404)
+
+        # Lote: varios mantenimientos renderizados en un solo documento
+        maintenance_ids = request.data.get('maintenance_ids')
+        if maintenance_ids and template.type == 'pdf':
+            return _generate_batch_from_template(request, template, maintenance_ids)
         
         # Get data from request or load from maintenance if maintenance_id is provided
         data = request.data.get('data', {})
@@ -628,92 +462,13 @@ def generate_from_template(request, template_key):
                 return Response({'error': f'Error cargando datos del mantenimiento: {str(e)}'}, status=400)
 
         # Build mapped context from template.fields_schema like in generate_report
-        def _resolve_path(obj, path):
-            try:
-                cur = obj
-                if path is None or path == '':
-                    return None
-                import re
-                tokens = []
-                parts = str(path).split('.')
-                for part in parts:
-                    bracket_parts = re.split(r'\[|\]', part)
-                    for bp in bracket_parts:
-                        if bp == '':
-                            continue
-                        tokens.append(bp)
-                for tok in tokens:
-                    if isinstance(cur, list):
-                        try:
-                            idx = int(tok)
-                            cur = cur[idx]
-                            continue
-                        except Exception:
-                            return None
-                    if isinstance(cur, dict):
-                        if tok in cur:
-                            cur = cur[tok]
-                            continue
-                        try:
-                            cur = cur[int(tok)]
-                            continue
-                        except Exception:
-                            return None
-                    return None
-                return cur
-            except Exception:
-                return None
-
         mapped_context = {}
         fs = getattr(template, 'fields_schema', None)
         html_content = getattr(template, 'html_content', '')
         css_content = getattr(template, 'css_content', '')
         if fs and isinstance(fs, dict):
             try:
-                def _auto_map_value(map_to, tpl_key, data_dict):
-                    # Try explicit path first
-                    if map_to:
-                        v = _resolve_path(data_dict, map_to) if isinstance(data_dict, (dict, list)) else None
-                        if v is not None:
-                            return v
-                        if isinstance(data_dict, dict) and map_to in data_dict:
-                            return data_dict.get(map_to)
-
-                    # Heuristic fallback: try to match tpl_key against available keys
-                    if not isinstance(data_dict, dict):
-                        return None
-
-                    def _norm(s):
-                        try:
-                            return ''.join([c for c in str(s).lower() if c.isalnum()])
-                        except Exception:
-                            return str(s).lower()
-
-                    tpl_norm = _norm(tpl_key)
-                    # 1) exact match ignoring case/characters
-                    for k in data_dict.keys():
-                        if _norm(k) == tpl_norm:
-                            return data_dict.get(k)
-
-                    # 2) substring match (tpl in key or key in tpl)
-                    for k in data_dict.keys():
-                        kn = _norm(k)
-                        if tpl_norm in kn or kn in tpl_norm:
-                            return data_dict.get(k)
-
-                    # 3) token overlap (split on non-alnum)
-                    for k in data_dict.keys():
-                        k_tokens = set([t for t in _norm(k).split() if t])
-                        t_tokens = set([t for t in tpl_norm.split() if t])
-                        if k_tokens & t_tokens:
-                            return data_dict.get(k)
-
-                    return None
-
-                for tpl_key, meta in fs.items():
-                    map_to = meta.get('map_to') if isinstance(meta, dict) else (meta or tpl_key)
-                    val = _auto_map_value(map_to, tpl_key, data)
-                    mapped_context[tpl_key] = val
+                mapped_context = map_template_fields(template, data, resolve_path)
             except Exception:
                 mapped_context = {}
 
@@ -751,16 +506,19 @@ def generate_from_template(request, template_key):
             except Exception:
                 background_bytes = None
 
+            cache_key = template_cache_key(template)
+
             if HTMLPDFGenerator:
                 # HTML generator does not support image-overlay in this simple path
-                pdf_file = HTMLPDFGenerator.render_template(html_content, css_content, render_context)
+                pdf_file = HTMLPDFGenerator.render_template(html_content, css_content, render_context, cache_key=cache_key)
             elif ReportLabPDFGenerator:
                 pdf_file = ReportLabPDFGenerator.render_template(
                     html_content,
                     css_content,
                     render_context,
                     background_bytes=background_bytes,
-                    overlays=overlays
+                    overlays=overlays,
+                    cache_key=cache_key,
                 )
             else:
                 return Response({'error': 'Generación de PDF no disponible en este entorno.'}, status=501)
@@ -775,13 +533,12 @@ def generate_from_template(request, template_key):
 
             # Save the PDF to storage and create a Report record so it appears in "Generados"
             try:
-                from django.core.files.base import ContentFile
                 from django.core.files.storage import default_storage
                 name_for_file = template.name or 'report'
                 filename = f"reports/{name_for_file}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                file_path = default_storage.save(filename, ContentFile(content))
+                file_path, digest, size = store_artifact(filename, content, default_storage)
             except Exception:
-                file_path = None
+                file_path, digest, size = None, '', None
 
             # Optionally link to a maintenance if provided in request
             maintenance_obj = None
@@ -799,7 +556,10 @@ def generate_from_template(request, template_key):
                     title=f"Reporte {template.name}",
                     content='',
                     pdf_file=file_path or '',
-                    generated_by=request.user
+                    generated_by=request.user,
+                    content_hash=digest,
+                    file_size=size,
+                    expires_at=expiry_for_new_report(),
                 )
             except Exception:
                 # If creation fails, continue but don't block download
@@ -855,13 +615,12 @@ def generate_from_template(request, template_key):
                 
                 # Save to storage
                 try:
-                    from django.core.files.base import ContentFile
                     from django.core.files.storage import default_storage
                     name_for_file = template.name or 'report'
                     filename = f"reports/{name_for_file}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                    file_path = default_storage.save(filename, ContentFile(content))
+                    file_path, digest, size = store_artifact(filename, content, default_storage)
                 except Exception:
-                    file_path = None
+                    file_path, digest, size = None, '', None
                 
                 # Create Report record
                 maintenance_obj = None
@@ -879,7 +638,10 @@ def generate_from_template(request, template_key):
                         title=f"Reporte {template.name}",
                         content='',
                         pdf_file=file_path or '',
-                        generated_by=request.user
+                        generated_by=request.user,
+                        content_hash=digest,
+                        file_size=size,
+                        expires_at=expiry_for_new_report(),
                     )
                 except Exception:
                     report = None
@@ -905,6 +667,54 @@ def generate_from_template(request, template_key):
         return Response({'error': str(e)}, status=400)
 
 
+def _generate_batch_from_template(request, template, maintenance_ids):
+    """
+    `maintenance_ids` en generate_from_template: un PDF consolidado o, con
+    `split=true`, un ZIP con un PDF por mantenimiento.
+    """
+    import zipfile
+    from io import BytesIO
+    from .services.maintenance_serializer import serialize_maintenances
+
+    if isinstance(maintenance_ids, str):
+        maintenance_ids = [m for m in maintenance_ids.split(',') if m.strip()]
+    try:
+        ids = list(dict.fromkeys(int(m) for m in maintenance_ids))
+    except (TypeError, ValueError):
+        return Response({'error': 'maintenance_ids debe ser una lista de enteros'}, status=400)
+
+    from .models import Maintenance
+
+    # Solo la placa para nombrar los PDFs; los datos salen de los snapshots vigentes
+    codes = dict(Maintenance.objects.filter(id__in=ids).values_list('id', 'equipment__code'))
+    ids = [mid for mid in ids if mid in codes]
+    if not ids:
+        return Response({'error': 'No se encontraron mantenimientos'}, status=404)
+    datasets = list(serialize_maintenances(ids))
+
+    split = str(request.data.get('split', '')).lower() in ('1', 'true', 'yes')
+    try:
+        result = render_template_batch(template, datasets, split=split)
+    except NotImplementedError as e:
+        return Response({'error': str(e)}, status=501)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if not split:
+        response = HttpResponse(result, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{template.name}_{timestamp}.pdf"'
+        return response
+
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for maintenance_id, pdf_bytes in zip(ids, result):
+            if pdf_bytes:
+                code = codes[maintenance_id] or maintenance_id
+                zip_file.writestr(f'{template.name}_{code}_{maintenance_id}.pdf', pdf_bytes)
+    response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{template.name}_{timestamp}.zip"'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def sample_template_data(request):
@@ -1080,7 +890,7 @@ def suggest_mappings(request, template_key):
 
         # Use helper to infer mappings (non-persistent)
         fs = getattr(template, 'fields_schema', None) or {}
-        suggestions = infer_fields_schema_mapping(fs, sample or {}, resolve_path)
+        suggestions = infer_fields_schema_mapping(fs, sample or {})
 
         sample_keys = list(sample.keys()) if isinstance(sample, dict) else []
         return Response({'suggested_fields_schema': suggestions, 'sample_data_keys': sample_keys})